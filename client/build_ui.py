@@ -0,0 +1,40 @@
+'''Compila as interfaces em `ui/*.ui` para módulos Python em `ui_compiled/`.
+
+Os módulos compilados são carregados pelas janelas no lugar dos arquivos
+`.ui`, evitando a leitura do XML ao abrir a aplicação. Execute novamente
+sempre que uma interface for alterada:
+
+	python build_ui.py
+'''
+import os
+
+from PyQt5 import uic
+
+
+UI_DIR = 'ui'
+COMPILED_DIR = 'ui_compiled'
+
+
+def build_ui(ui_dir=UI_DIR, compiled_dir=COMPILED_DIR):
+	'''Compila as interfaces de um diretório para módulos Python.
+
+	Parameters
+    ----------
+	ui_dir : str
+		Diretório com os arquivos `.ui`
+	compiled_dir : str
+		Diretório em que os módulos compilados são gerados
+	'''
+	os.makedirs(compiled_dir, exist_ok=True)
+	open(os.path.join(compiled_dir, '__init__.py'), 'a').close()
+
+	uic.compileUiDir(
+		ui_dir,
+		map=lambda directory, file: (compiled_dir, file),
+		execute=False,
+	)
+	print(f'Interfaces compiladas em `{compiled_dir}/`.')
+
+
+if __name__ == '__main__':
+	build_ui()
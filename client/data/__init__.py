@@ -1,4 +1,9 @@
 from .bank_client import BankClient
+from .async_bank_client import AsyncBankClient
+from .connection import Connection, ConnectionPool
+from .async_connection import AsyncConnection
+from .store import ClientStore
+from .subscription import Subscription
 
 
 bank = BankClient(server_host='localhost', server_port=8001)
@@ -0,0 +1,426 @@
+import asyncio
+import uuid
+
+from .async_connection import AsyncConnection
+
+
+class AsyncBankClient:
+	'''Cliente assíncrono que conecta com o servidor do banco para fornecer as
+	ações como corrotinas.
+
+	Várias requisições podem estar em andamento ao mesmo tempo na mesma
+	conexão, inclusive de sessões diferentes criadas com `new_session()`, o
+	que permite consultar ou movimentar muitas contas em paralelo sem uma
+	thread por requisição.
+
+	Attributes
+    ----------
+	token : str
+		Token da sessão do usuário
+
+    Methods
+    -------
+	request(action, content={}, retries=0)
+		Método para simplificar a realização de requisições para o servidor
+	new_session()
+		Cria um novo cliente, com uma sessão independente, que compartilha a
+		conexão com o servidor
+	close()
+		Fecha a conexão com o servidor
+	register_client(name, cpf, password)
+		Ação de cadastro do usuário
+	login_client(cpf, password)
+		Ação de login do usuário
+	client_is_logged()
+		Verifica se o usuário está autenticado
+	logout_client()
+		Ação de encerramento da sessão do usuário
+	get_client()
+		Ação de obter as informações do usuário
+	get_client_history(start=None, end=None)
+		Ação de obter histórico de transações do usuário
+	get_client_history_page(limit=100, before=None)
+		Ação de obter uma página do histórico de transações do usuário
+	get_account_summary(start=None, end=None, group_by=None)
+		Ação de obter os totais das transações do usuário por tipo e período
+	withdraw(amount)
+		Ação de saque bancário da conta do usuário
+	deposit(amount)
+		Ação de depósito bancário da conta do usuário
+	transfer(amount, destination_acc_code)
+		Ação de transferência bancária entre contas bancárias
+	bulk_transfer(transfers)
+		Ação de várias transferências bancárias em uma única operação
+	'''
+	def __init__(self, server_port, server_host='localhost', timeout=10.0, retries=2, connection=None):
+		'''
+		Parameters
+        ----------
+		server_port : int
+			Porta em que o servidor está sendo executado
+		server_host : int
+			Endereço em que o servidor está sendo executado (o padrão é `localhost`)
+		timeout : float
+			Tempo máximo (em segundos) de espera pela resposta do servidor
+		retries : int
+			Quantidade de novas tentativas das operações bancárias quando a
+			resposta não é recebida
+		connection : Optional[AsyncConnection]
+			Conexão compartilhada com outros clientes (por padrão, uma nova
+			conexão é criada).
+		'''
+		self._server_host = server_host
+		self._server_port = server_port
+		self._timeout = timeout
+		self._retries = retries
+		self._connection = connection or AsyncConnection(server_host, server_port, timeout=timeout)
+		self._token = None
+
+	@property
+	def token(self):
+		'''Token da sessão do usuário.
+
+		Returns
+        -------
+		str
+			Token da sessão.
+		'''
+		return self._token
+
+	async def request(self, action, content={}, retries=0):
+		'''Método para simplificar a realização de requisições para o servidor.
+
+		Parameters
+        ----------
+		action : str
+			Ação que será solicitada para o servidor
+		content : dict
+			Dados que serão enviados para executar a ação
+		retries : int
+			Quantidade de novas tentativas caso a resposta não seja recebida.
+			Use apenas em ações que podem ser repetidas com segurança.
+
+		Returns
+        -------
+		Any
+			Dados da resposta da requisição que obteve sucesso.
+		None
+			Caso haja algum erro na requisição.
+		'''
+		content = {**content, 'action': action, 'token': self._token}
+
+		for attempt in range(retries + 1):
+			try:
+				data = await self._connection.request(content)
+
+				if data and 'error' in data and data['error']:
+					return None
+				return data
+			except (OSError, asyncio.TimeoutError) as error:
+				if attempt >= retries:
+					print(error)
+					return None
+
+				await asyncio.sleep(0.05 * 2 ** attempt)
+
+	def new_session(self):
+		'''Cria um novo cliente, com uma sessão independente, que compartilha a
+		conexão com o servidor deste cliente.
+
+		Returns
+        -------
+		AsyncBankClient
+			Cliente com uma nova sessão.
+		'''
+		return AsyncBankClient(
+			self._server_port,
+			self._server_host,
+			timeout=self._timeout,
+			retries=self._retries,
+			connection=self._connection,
+		)
+
+	async def close(self):
+		'''Fecha a conexão com o servidor, inclusive para as demais sessões que
+		a compartilham.
+		'''
+		await self._connection.close()
+
+	async def _request_once(self, action, content):
+		'''Realiza a requisição de uma operação bancária com uma chave de
+		idempotência, repetindo-a automaticamente caso a resposta não seja
+		recebida. O servidor executa a operação no máximo uma vez por chave.
+
+		Parameters
+        ----------
+		action : str
+			Ação que será solicitada para o servidor
+		content : dict
+			Dados que serão enviados para executar a ação
+
+		Returns
+        -------
+		Any
+			Dados da resposta da requisição que obteve sucesso.
+		None
+			Caso haja algum erro na requisição.
+		'''
+		content = {**content, 'idempotency_key': uuid.uuid4().hex}
+		return await self.request(action, content, retries=self._retries)
+
+	async def register_client(self, name, cpf, password):
+		'''Ação de cadastro do usuário.
+
+		Parameters
+        ----------
+		name : str
+			Nome do usuário
+		cpf : str
+			CPF do usuário
+		password : str
+			Senha de acesso do usuário
+
+		Returns
+        -------
+		bool
+			Indicando se o cadastro foi realizado com sucesso.
+		'''
+		content = {'name': name, 'cpf': cpf, 'password': password}
+		data = await self.request('register_client', content)
+
+		if not data or not 'token' in data:
+			return False
+
+		self._token = data['token']
+		return True
+
+	async def login_client(self, cpf, password):
+		'''Ação de login do usuário.
+
+		Parameters
+        ----------
+		cpf : str
+			CPF do usuário
+		password : str
+			Senha de acesso do usuário
+
+		Returns
+        -------
+		bool
+			Indicando se o login foi realizado com sucesso.
+		'''
+		content = {'cpf': cpf, 'password': password}
+		data = await self.request('login_client', content)
+
+		if not data or not 'token' in data:
+			return False
+
+		self._token = data['token']
+		return True
+
+	async def client_is_logged(self):
+		'''Verifica se o usuário está autenticado.
+
+		Returns
+        -------
+		bool
+			Indicando se o usuário está autenticado.
+		'''
+		if not self._token:
+			return False
+
+		data = await self.request('client_is_logged', retries=1)
+
+		if not data or not 'is_logged' in data:
+			return False
+		return data['is_logged']
+
+	async def logout_client(self):
+		'''Ação de encerramento da sessão do usuário.
+		'''
+		data = await self.request('logout_client', retries=1)
+		self._token = None
+		return data
+
+	async def get_client(self):
+		'''Ação de obter as informações do usuário.
+
+		Returns
+        -------
+		dict
+			Informações do usuário.
+		'''
+		return await self.request('get_client', retries=1)
+
+	async def get_client_history(self, start=None, end=None):
+		'''Ação de obter histórico de transações do usuário.
+
+		Parameters
+        ----------
+		start : Optional[str]
+			Início do período no formato ISO 8601 (inclusivo)
+		end : Optional[str]
+			Fim do período no formato ISO 8601 (exclusivo, ou o dia inteiro
+			quando apenas a data é informada).
+
+		Returns
+        -------
+		list
+			Histórico de transações do usuário.
+		'''
+		content = {}
+
+		if start:
+			content['from'] = start
+
+		if end:
+			content['to'] = end
+
+		data = await self.request('get_client_history', content, retries=1)
+
+		if not data or not 'history' in data:
+			return []
+		return data['history']
+
+	async def get_client_history_page(self, limit=100, before=None):
+		'''Ação de obter uma página do histórico de transações do usuário, dos
+		registros mais recentes para os mais antigos.
+
+		Parameters
+        ----------
+		limit : int
+			Quantidade máxima de registros da página
+		before : Optional[list]
+			Posição da próxima página, obtida na página anterior (por padrão, a
+			primeira página).
+
+		Returns
+        -------
+		tuple[list, Optional[list]]
+			Registros da página e a posição da próxima página (`None` caso não
+			existam mais registros).
+		None
+			Caso haja algum erro na requisição.
+		'''
+		content = {'limit': limit}
+
+		if before:
+			content['before'] = before
+
+		data = await self.request('get_client_history_page', content, retries=1)
+
+		if not data or not 'history' in data:
+			return None
+		return data['history'], data.get('next')
+
+	async def get_account_summary(self, start=None, end=None, group_by=None):
+		'''Ação de obter os totais das transações do usuário por tipo em um
+		período (por exemplo, quanto foi depositado no mês).
+
+		Parameters
+        ----------
+		start : Optional[str]
+			Início do período no formato ISO 8601 (inclusivo)
+		end : Optional[str]
+			Fim do período no formato ISO 8601 (exclusivo, ou o dia inteiro
+			quando apenas a data é informada).
+		group_by : Optional[str]
+			Separa os totais por `'day'` (dia) ou `'month'` (mês)
+
+		Returns
+        -------
+		list[dict]
+			Totais com o início do período (`period`), o tipo (`type`), a
+			quantidade (`count`) e a soma das quantias (`total`).
+		None
+			Caso haja algum erro na requisição.
+		'''
+		content = {}
+
+		if start:
+			content['from'] = start
+
+		if end:
+			content['to'] = end
+
+		if group_by:
+			content['group_by'] = group_by
+
+		data = await self.request('get_account_summary', content, retries=1)
+
+		if not data or not 'summary' in data:
+			return None
+		return data['summary']
+
+	async def withdraw(self, amount):
+		'''Ação de saque bancário da conta do usuário.
+
+		Parameters
+        ----------
+		amount : float
+			Quantia a ser sacada
+
+		Returns
+        -------
+		bool
+			Indicando se a operação foi realizada com sucesso.
+		'''
+		data = await self._request_once('withdraw', {'amount': amount})
+		return True if data else False
+
+	async def deposit(self, amount):
+		'''Ação de depósito bancário da conta do usuário.
+
+		Parameters
+        ----------
+		amount : float
+			Quantia a ser depositada
+
+		Returns
+        -------
+		bool
+			Indicando se a operação foi realizada com sucesso.
+		'''
+		data = await self._request_once('deposit', {'amount': amount})
+		return True if data else False
+
+	async def transfer(self, amount, destination_acc_code):
+		'''Ação de transferência bancária entre contas bancárias.
+
+		Parameters
+        ----------
+		amount : float
+			Quantia a ser transferida
+		destination_acc_code : int
+			Número da conta de destino
+
+		Returns
+        -------
+		bool
+			Indicando se a operação foi realizada com sucesso.
+		'''
+		data = await self._request_once('transfer', {'amount': amount, 'destination_acc_code': destination_acc_code})
+		return True if data else False
+
+	async def bulk_transfer(self, transfers):
+		'''Ação de várias transferências bancárias (por exemplo, uma folha de
+		pagamento) em uma única operação. Se alguma transferência for inválida,
+		nenhuma é realizada.
+
+		Parameters
+        ----------
+		transfers : list[tuple]
+			Lista de pares (número da conta de destino, quantia)
+
+		Returns
+        -------
+		bool
+			Indicando se a operação foi realizada com sucesso.
+		'''
+		data = await self._request_once('bulk_transfer', {
+			'transfers': [
+				{'destination_acc_code': destination_acc_code, 'amount': amount}
+				for destination_acc_code, amount in transfers
+			],
+		})
+		return True if data else False
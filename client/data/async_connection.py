@@ -0,0 +1,221 @@
+import itertools
+import asyncio
+import codecs
+import json
+
+
+class AsyncConnection:
+	'''Conexão assíncrona com o servidor do banco que permite várias
+	requisições em andamento ao mesmo tempo.
+
+	Cada requisição recebe um identificador (`request_id`), devolvido pelo
+	servidor na resposta, então as respostas podem chegar fora de ordem. A
+	conexão é aberta apenas quando é usada pela primeira vez e reaberta
+	automaticamente após uma falha.
+
+    Methods
+    -------
+	request(content, timeout=None)
+		Envia uma requisição e aguarda a sua resposta
+	close()
+		Fecha a conexão
+	'''
+	_json_decoder = json.JSONDecoder()
+
+	def __init__(self, host, port, timeout=10.0, connect_retries=4, max_backoff=2.0):
+		'''
+		Parameters
+        ----------
+		host : str
+			Endereço em que o servidor está sendo executado
+		port : int
+			Porta em que o servidor está sendo executado
+		timeout : float
+			Tempo máximo (em segundos) de espera pela resposta de cada
+			requisição
+		connect_retries : int
+			Quantidade de novas tentativas de conexão, com espera crescente
+			entre elas
+		max_backoff : float
+			Tempo máximo (em segundos) de espera entre as tentativas de conexão
+		'''
+		self._address = (host, port)
+		self._timeout = timeout
+		self._connect_retries = connect_retries
+		self._max_backoff = max_backoff
+		self._request_ids = itertools.count(1)
+		self._pending = {}
+		self._reader = None
+		self._writer = None
+		self._read_task = None
+		self._connect_locker = None
+
+	@property
+	def connected(self):
+		'''Indica se a conexão está aberta.
+
+		Returns
+        -------
+		bool
+			Booleano indicando se a conexão está aberta.
+		'''
+		return self._writer is not None and not self._writer.is_closing()
+
+	async def request(self, content, timeout=None):
+		'''Envia uma requisição e aguarda a sua resposta.
+
+		Parameters
+        ----------
+		content : dict
+			Dados da requisição
+		timeout : Optional[float]
+			Tempo máximo (em segundos) de espera pela resposta (por padrão, o
+			tempo informado na criação da conexão).
+
+		Returns
+        -------
+		Any
+			Dados da resposta.
+
+		Raises
+        ------
+		OSError
+			Caso não seja possível se comunicar com o servidor.
+		asyncio.TimeoutError
+			Caso a resposta não chegue a tempo.
+		'''
+		await self._ensure_connected()
+
+		request_id = next(self._request_ids)
+		future = asyncio.get_running_loop().create_future()
+		self._pending[request_id] = future
+
+		try:
+			self._writer.write(json.dumps({**content, 'request_id': request_id}).encode())
+			await self._writer.drain()
+			return await asyncio.wait_for(future, timeout or self._timeout)
+		finally:
+			self._pending.pop(request_id, None)
+
+	async def close(self):
+		'''Fecha a conexão. Ela será reaberta no próximo uso.
+		'''
+		writer = self._writer
+		self._writer = None
+		self._fail_pending(ConnectionError('Conexão fechada.'))
+
+		if self._read_task:
+			self._read_task.cancel()
+
+		if writer:
+			writer.close()
+
+			try:
+				await writer.wait_closed()
+			except OSError:
+				pass
+
+	async def _ensure_connected(self):
+		'''Abre a conexão com o servidor caso ela não esteja aberta, tentando
+		novamente com espera crescente caso o servidor esteja indisponível.
+		'''
+		if self.connected:
+			return
+
+		if self._connect_locker is None:
+			self._connect_locker = asyncio.Lock()
+
+		async with self._connect_locker:
+			if self.connected:
+				return
+
+			for attempt in range(self._connect_retries + 1):
+				try:
+					self._reader, self._writer = await asyncio.wait_for(
+						asyncio.open_connection(*self._address),
+						self._timeout,
+					)
+					break
+				except (OSError, asyncio.TimeoutError):
+					if attempt >= self._connect_retries:
+						raise
+
+					await asyncio.sleep(min(self._max_backoff, 0.05 * 2 ** attempt))
+
+			self._read_task = asyncio.ensure_future(self._read_responses(self._reader, self._writer))
+
+	async def _read_responses(self, reader, writer):
+		'''Lê as respostas do servidor e entrega cada uma à requisição com o
+		mesmo identificador.
+
+		Parameters
+        ----------
+		reader : asyncio.StreamReader
+			Leitor da conexão
+		writer : asyncio.StreamWriter
+			Escritor da conexão
+		'''
+		decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+		buffer = ''
+		error = ConnectionError('Conexão encerrada pelo servidor.')
+
+		try:
+			while True:
+				data = await reader.read(64 * 1024)
+
+				if not data:
+					break
+
+				buffer = self._deliver(buffer + decoder.decode(data))
+		except OSError as read_error:
+			error = read_error
+		finally:
+			if self._writer is writer:
+				self._writer = None
+				self._fail_pending(error)
+
+			writer.close()
+
+	def _deliver(self, buffer):
+		'''Entrega as respostas completas presentes no buffer.
+
+		Parameters
+        ----------
+		buffer : str
+			Dados recebidos e ainda não processados
+
+		Returns
+        -------
+		str
+			Dados restantes, que ainda não formam uma resposta completa.
+		'''
+		while True:
+			buffer = buffer.lstrip()
+
+			if not buffer:
+				return buffer
+
+			try:
+				response, end = AsyncConnection._json_decoder.raw_decode(buffer)
+			except ValueError:
+				return buffer
+
+			buffer = buffer[end:]
+			future = self._pending.get(response.get('request_id')) if isinstance(response, dict) else None
+
+			if future and not future.done():
+				future.set_result(response)
+
+	def _fail_pending(self, error):
+		'''Encerra com erro todas as requisições aguardando resposta.
+
+		Parameters
+        ----------
+		error : Exception
+			Erro entregue às requisições
+		'''
+		for future in self._pending.values():
+			if not future.done():
+				future.set_exception(error)
+
+		self._pending.clear()
@@ -1,7 +1,11 @@
 import socket
 import json
+import uuid
 
+from .connection import ConnectionPool
 from .session import Session
+from .store import ClientStore
+from .subscription import Subscription
 
 
 class BankClient:
@@ -11,11 +15,22 @@ class BankClient:
     ----------
 	session : Session
 		Objeto que armazena e gerencia a sessão do usuário
+	store : ClientStore
+		Estado do usuário mantido localmente, atualizado pelas ações
 
     Methods
     -------
-	request(action, content={})
+	request(action, content={}, retries=0)
 		Método para simplificar a realização de requisições para o servidor
+	new_session()
+		Cria um novo cliente, com uma sessão independente, que compartilha as
+		conexões com o servidor
+	warm_up()
+		Abre a conexão com o servidor antes da primeira requisição
+	subscribe(on_event=None)
+		Passa a receber as alterações da conta do usuário
+	unsubscribe()
+		Deixa de receber as alterações da conta do usuário
 	register_client(name, cpf, password)
 		Ação de cadastro do usuário
 	login_client(cpf, password)
@@ -24,18 +39,28 @@ class BankClient:
 		Verifica se o usuário está autenticado
 	logout_client()
 		Ação de encerramento da sessão do usuário
-	get_client()
+	get_client(refresh=False)
 		Ação de obter as informações do usuário
-	get_client_history()
+	get_client_history(start=None, end=None)
 		Ação de obter histórico de transações do usuário
+	get_client_history_page(limit=100, before=None, refresh=False)
+		Ação de obter uma página do histórico de transações do usuário
+	sync_history(limit=100)
+		Verifica se o histórico mudou e atualiza a primeira página armazenada
+	get_account_summary(start=None, end=None, group_by=None)
+		Ação de obter os totais das transações do usuário por tipo e período
 	withdraw(amount)
 		Ação de saque bancário da conta do usuário
 	deposit(amount)
 		Ação de depósito bancário da conta do usuário
 	transfer(amount, destination_acc_code)
 		Ação de transferência bancária entre contas bancárias
+	bulk_transfer(transfers)
+		Ação de várias transferências bancárias em uma única operação
+	export_statement(file, start=None, end=None, format='csv')
+		Ação de exportar o extrato da conta do usuário
 	'''
-	def __init__(self, server_port, server_host='localhost'):
+	def __init__(self, server_port, server_host='localhost', timeout=10.0, retries=2, pool=None, pool_size=4):
 		'''
 		Parameters
         ----------
@@ -43,12 +68,25 @@ class BankClient:
 			Porta em que o servidor está sendo executado
 		server_host : int
 			Endereço em que o servidor está sendo executado (o padrão é `localhost`)
+		timeout : float
+			Tempo máximo (em segundos) de espera pela resposta do servidor
+		retries : int
+			Quantidade de novas tentativas das operações bancárias quando a
+			resposta não é recebida
+		pool : Optional[ConnectionPool]
+			Conjunto de conexões compartilhado com outros clientes (por padrão,
+			um novo conjunto é criado).
+		pool_size : int
+			Quantidade máxima de conexões do novo conjunto
 		'''
 		self._server_host = server_host
 		self._server_port = server_port
+		self._timeout = timeout
+		self._retries = retries
+		self._pool = pool or ConnectionPool(server_host, server_port, size=pool_size, timeout=timeout)
 		self._session = Session(self)
-		self._client_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-		self._client_socket.connect((self._server_host, self._server_port))
+		self._store = ClientStore()
+		self._subscription = None
 
 	@property
 	def session(self):
@@ -61,7 +99,18 @@ class BankClient:
 		'''
 		return self._session
 
-	def request(self, action, content={}):
+	@property
+	def store(self):
+		'''Estado do usuário mantido localmente, atualizado pelas ações.
+
+		Returns
+        -------
+		ClientStore
+			Estado do usuário.
+		'''
+		return self._store
+
+	def request(self, action, content={}, retries=0):
 		'''Método para simplificar a realização de requisições para o servidor.
 
 		Parameters
@@ -70,6 +119,10 @@ class BankClient:
 			Ação que será solicitada para o servidor
 		content : dict
 			Dados que serão enviados para executar a ação
+		retries : int
+			Quantidade de novas tentativas, em uma nova conexão, caso a resposta
+			não seja recebida. Use apenas em ações que podem ser repetidas com
+			segurança.
 
 		Returns
         -------
@@ -78,22 +131,108 @@ class BankClient:
 		None
 			Caso haja algum erro na requisição.
 		'''
-		content.update({'action': action, 'token': self._session.token})
+		content = {**content, 'action': action, 'token': self._session.token}
 
 		try:
-			self._client_socket.send(json.dumps(content).encode())
+			data = self._pool.request(content, retries=retries)
 
-			response = self._client_socket.recv(1024 * 256).decode()
-			data = json.loads(response)
-			
 			if data and 'error' in data and data['error']:
+				if data.get('unauthenticated'):
+					self._session.logout()
+					self._store.clear()
 				return None
 			return data
 		except (Exception, socket.error) as error:
 			print(error)
 			return None
-		finally:
-			pass
+
+	def new_session(self):
+		'''Cria um novo cliente, com uma sessão independente, que compartilha as
+		conexões com o servidor deste cliente. Útil para conduzir várias
+		sessões de usuários em um mesmo processo.
+
+		Returns
+        -------
+		BankClient
+			Cliente com uma nova sessão.
+		'''
+		return BankClient(
+			self._server_port,
+			self._server_host,
+			timeout=self._timeout,
+			retries=self._retries,
+			pool=self._pool,
+		)
+
+	def warm_up(self):
+		'''Abre a conexão com o servidor antes da primeira requisição. Pode ser
+		chamado fora da thread da interface enquanto a aplicação é exibida.
+
+		Returns
+        -------
+		bool
+			Indicando se a conexão foi aberta.
+		'''
+		try:
+			self._pool.warm_up()
+			return True
+		except (Exception, socket.error) as error:
+			print(error)
+			return False
+
+	def subscribe(self, on_event=None):
+		'''Passa a receber as alterações da conta do usuário enviadas pelo
+		servidor, que atualizam o estado local (`store`) sem novas consultas.
+		Caso a inscrição já esteja ativa, apenas a função `on_event` é
+		substituída.
+
+		Parameters
+        ----------
+		on_event : Optional[function]
+			Função chamada, fora da thread da interface, com cada mensagem
+			recebida
+
+		Returns
+        -------
+		Subscription
+			Inscrição ativa.
+		'''
+		if self._subscription and self._subscription.is_alive():
+			self._subscription.on_event = on_event
+			return self._subscription
+
+		self._subscription = Subscription(self, self._server_host, self._server_port, on_event=on_event)
+		self._subscription.start()
+		return self._subscription
+
+	def unsubscribe(self):
+		'''Deixa de receber as alterações da conta do usuário.
+		'''
+		if self._subscription:
+			self._subscription.stop()
+			self._subscription = None
+
+	def _request_once(self, action, content):
+		'''Realiza a requisição de uma operação bancária com uma chave de
+		idempotência, repetindo-a automaticamente caso a resposta não seja
+		recebida. O servidor executa a operação no máximo uma vez por chave.
+
+		Parameters
+        ----------
+		action : str
+			Ação que será solicitada para o servidor
+		content : dict
+			Dados que serão enviados para executar a ação
+
+		Returns
+        -------
+		Any
+			Dados da resposta da requisição que obteve sucesso.
+		None
+			Caso haja algum erro na requisição.
+		'''
+		content = {**content, 'idempotency_key': uuid.uuid4().hex}
+		return self.request(action, content, retries=self._retries)
 	
 	def register_client(self, name, cpf, password):
 		'''Ação de cadastro do usuário.
@@ -118,7 +257,8 @@ class BankClient:
 		if not data or not 'token' in data:
 			return False
 
-		self._session.login(data['token'])
+		self._store.clear()
+		self._session.login(data['token'], data.get('expires_in'))
 		return True
 
 	def login_client(self, cpf, password):
@@ -142,7 +282,8 @@ class BankClient:
 		if not data or not 'token' in data:
 			return False
 
-		self._session.login(data['token'])
+		self._store.clear()
+		self._session.login(data['token'], data.get('expires_in'))
 		return True
 	
 	def client_is_logged(self):
@@ -153,7 +294,7 @@ class BankClient:
 		bool
 			Indicando se o usuário está autenticado.
 		'''
-		data = self.request('client_is_logged')
+		data = self.request('client_is_logged', retries=1)
 
 		if not data or not 'is_logged' in data:
 			return False
@@ -162,31 +303,202 @@ class BankClient:
 	def logout_client(self):
 		'''Ação de encerramento da sessão do usuário.
 		'''
-		return self.request('logout_client')
+		data = self.request('logout_client', retries=1)
+		self.unsubscribe()
+		self._session.logout()
+		self._store.clear()
+		return data
 	
-	def get_client(self):
-		'''Ação de obter as informações do usuário.
+	def get_client(self, refresh=False):
+		'''Ação de obter as informações do usuário. As informações já obtidas
+		são reaproveitadas, com o saldo atualizado pelas operações.
+
+		Parameters
+        ----------
+		refresh : bool
+			Indica se as informações devem ser obtidas novamente do servidor
 
 		Returns
         -------
 		dict
 			Informações do usuário.
 		'''
-		return self.request('get_client')
+		client = None if refresh else self._store.client
+
+		if client:
+			return client
+
+		data = self.request('get_client', retries=1)
+
+		if data and 'account' in data:
+			self._store.set_client(data)
+		return data
 	
-	def get_client_history(self):
+	def get_client_history(self, start=None, end=None):
 		'''Ação de obter histórico de transações do usuário.
 
+		O histórico já obtido fica no estado local: nas próximas chamadas, o
+		servidor envia apenas os registros novos, ou nenhum caso a conta não
+		tenha mudado.
+
+		Parameters
+        ----------
+		start : Optional[str]
+			Início do período no formato ISO 8601 (inclusivo)
+		end : Optional[str]
+			Fim do período no formato ISO 8601 (exclusivo, ou o dia inteiro
+			quando apenas a data é informada).
+
 		Returns
         -------
 		list
 			Histórico de transações do usuário.
 		'''
-		data = self.request('get_client_history')
+		content = {}
+
+		if start:
+			content['from'] = start
+
+		if end:
+			content['to'] = end
+
+		cached = self._store.get_history(start, end)
+
+		if cached:
+			version, history = cached
+			content['version'] = version
+
+			if history:
+				content['since'] = history[-1]['sequence']
+
+		data = self.request('get_client_history', content, retries=1)
+
+		if data and data.get('not_modified'):
+			return list(cached[1])
 
 		if not data or not 'history' in data:
 			return []
-		return data['history']
+
+		history = cached[1] + data['history'] if cached and data.get('delta') else data['history']
+		self._store.set_history(start, end, data.get('version'), history)
+		return list(history)
+
+	def get_client_history_page(self, limit=100, before=None, refresh=False):
+		'''Ação de obter uma página do histórico de transações do usuário, dos
+		registros mais recentes para os mais antigos. As páginas já obtidas são
+		reaproveitadas até que uma operação bancária seja realizada.
+
+		Parameters
+        ----------
+		limit : int
+			Quantidade máxima de registros da página
+		before : Optional[list]
+			Posição da próxima página, obtida na página anterior (por padrão, a
+			primeira página).
+		refresh : bool
+			Indica se a página deve ser obtida novamente do servidor
+
+		Returns
+        -------
+		tuple[list, Optional[list]]
+			Registros da página e a posição da próxima página (`None` caso não
+			existam mais registros).
+		None
+			Caso haja algum erro na requisição.
+		'''
+		page = None if refresh else self._store.get_history_page(limit, before)
+
+		if page:
+			return page
+
+		content = {'limit': limit}
+
+		if before:
+			content['before'] = before
+
+		data = self.request('get_client_history_page', content, retries=1)
+
+		if not data or not 'history' in data:
+			return None
+
+		page = data['history'], data.get('next')
+		self._store.set_history_page(limit, before, page, data.get('version'))
+		return page
+
+	def sync_history(self, limit=100):
+		'''Verifica se o histórico mudou desde que a primeira página foi
+		armazenada, enviando ao servidor apenas a versão conhecida da conta.
+		Caso tenha mudado, as páginas armazenadas são substituídas pela nova
+		primeira página.
+
+		Parameters
+        ----------
+		limit : int
+			Quantidade máxima de registros da página
+
+		Returns
+        -------
+		bool
+			Indicando se o histórico mudou.
+		None
+			Caso haja algum erro na requisição.
+		'''
+		version = self._store.history_version
+
+		if version is None or not self._store.get_history_page(limit):
+			self._store.invalidate_history()
+			return True if self.get_client_history_page(limit) else None
+
+		data = self.request('get_client_history_page', {'limit': limit, 'version': version}, retries=1)
+
+		if not data:
+			return None
+
+		if data.get('not_modified'):
+			return False
+
+		self._store.invalidate_history()
+		self._store.set_history_page(limit, None, (data['history'], data.get('next')), data.get('version'))
+		return True
+
+	def get_account_summary(self, start=None, end=None, group_by=None):
+		'''Ação de obter os totais das transações do usuário por tipo em um
+		período (por exemplo, quanto foi depositado no mês).
+
+		Parameters
+        ----------
+		start : Optional[str]
+			Início do período no formato ISO 8601 (inclusivo)
+		end : Optional[str]
+			Fim do período no formato ISO 8601 (exclusivo, ou o dia inteiro
+			quando apenas a data é informada).
+		group_by : Optional[str]
+			Separa os totais por `'day'` (dia) ou `'month'` (mês)
+
+		Returns
+        -------
+		list[dict]
+			Totais com o início do período (`period`), o tipo (`type`), a
+			quantidade (`count`) e a soma das quantias (`total`).
+		None
+			Caso haja algum erro na requisição.
+		'''
+		content = {}
+
+		if start:
+			content['from'] = start
+
+		if end:
+			content['to'] = end
+
+		if group_by:
+			content['group_by'] = group_by
+
+		data = self.request('get_account_summary', content, retries=1)
+
+		if not data or not 'summary' in data:
+			return None
+		return data['summary']
 
 	def withdraw(self, amount):
 		'''Ação de saque bancário da conta do usuário.
@@ -201,8 +513,8 @@ class BankClient:
 		bool
 			Indicando se a operação foi realizada com sucesso.
 		'''
-		data = self.request('withdraw', {'amount': amount})
-		return True if data else False
+		data = self._request_once('withdraw', {'amount': amount})
+		return self._update_store(data)
 
 	def deposit(self, amount):
 		'''Ação de depósito bancário da conta do usuário.
@@ -217,8 +529,8 @@ class BankClient:
 		bool
 			Indicando se a operação foi realizada com sucesso.
 		'''
-		data = self.request('deposit', {'amount': amount})
-		return True if data else False
+		data = self._request_once('deposit', {'amount': amount})
+		return self._update_store(data)
 
 	def transfer(self, amount, destination_acc_code):
 		'''Ação de transferência bancária entre contas bancárias.
@@ -235,5 +547,109 @@ class BankClient:
 		bool
 			Indicando se a operação foi realizada com sucesso.
 		'''
-		data = self.request('transfer', {'amount': amount, 'destination_acc_code': destination_acc_code})
-		return True if data else False
+		data = self._request_once('transfer', {'amount': amount, 'destination_acc_code': destination_acc_code})
+		return self._update_store(data)
+
+	def bulk_transfer(self, transfers):
+		'''Ação de várias transferências bancárias (por exemplo, uma folha de
+		pagamento) em uma única operação. Se alguma transferência for inválida,
+		nenhuma é realizada.
+
+		Parameters
+        ----------
+		transfers : list[tuple]
+			Lista de pares (número da conta de destino, quantia)
+
+		Returns
+        -------
+		bool
+			Indicando se a operação foi realizada com sucesso.
+		'''
+		data = self._request_once('bulk_transfer', {
+			'transfers': [
+				{'destination_acc_code': destination_acc_code, 'amount': amount}
+				for destination_acc_code, amount in transfers
+			],
+		})
+		return self._update_store(data)
+
+	def _update_store(self, data):
+		'''Atualiza o estado local a partir da resposta de uma operação
+		bancária: o saldo recebido substitui o armazenado e as páginas do
+		histórico são descartadas.
+
+		Parameters
+        ----------
+		data : Optional[dict]
+			Dados da resposta da operação
+
+		Returns
+        -------
+		bool
+			Indicando se a operação foi realizada com sucesso.
+		'''
+		if not data:
+			return False
+
+		if 'balance' in data:
+			self._store.set_balance(data['balance'], data.get('version'))
+		else:
+			self._store.clear()
+
+		self._store.invalidate_history()
+		return True
+
+	def export_statement(self, file, start=None, end=None, format='csv'):
+		'''Ação de exportar o extrato da conta do usuário.
+
+		O extrato é recebido em blocos e escrito no arquivo conforme chega, então
+		o consumo de memória é constante independente do tamanho do histórico.
+
+		Parameters
+        ----------
+		file : object
+			Arquivo aberto em modo binário onde o extrato será escrito
+		start : Optional[str]
+			Início do período no formato ISO 8601 (inclusivo)
+		end : Optional[str]
+			Fim do período no formato ISO 8601 (exclusivo, ou o dia inteiro
+			quando apenas a data é informada).
+		format : str
+			Formato do extrato: `'csv'` ou `'ofx'`
+
+		Returns
+        -------
+		bool
+			Indicando se o extrato foi exportado por completo.
+		'''
+		content = {'action': 'export_statement', 'token': self._session.token, 'format': format}
+
+		if start:
+			content['from'] = start
+
+		if end:
+			content['to'] = end
+
+		try:
+			with self._pool.connection() as connection:
+				connection.send(json.dumps(content).encode())
+				header = connection.read_json()
+
+				if not header or header.get('error'):
+					return False
+
+				connection.read_until(b'\n')
+
+				while True:
+					size = int(connection.read_until(b'\r\n'), 16)
+
+					if size == 0:
+						break
+
+					file.write(connection.read_exact(size + 2)[:-2])
+
+				trailer = json.loads(connection.read_until(b'\n'))
+				return not trailer.get('error')
+		except (Exception, socket.error) as error:
+			print(error)
+			return False
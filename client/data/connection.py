@@ -0,0 +1,365 @@
+from contextlib import contextmanager
+import threading
+import socket
+import queue
+import json
+import time
+
+
+class Connection:
+	'''Conexão com o servidor do banco, aberta apenas quando é usada pela
+	primeira vez e reaberta automaticamente após uma falha.
+
+	As respostas são lidas até formarem um documento JSON completo, então
+	respostas maiores que uma única leitura do socket são recebidas por
+	inteiro.
+
+    Methods
+    -------
+	request(content)
+		Envia uma requisição e aguarda a resposta
+	send(data)
+		Envia dados para o servidor
+	read_json()
+		Lê um documento JSON completo do servidor
+	read_until(delimiter)
+		Lê do servidor até encontrar o delimitador
+	read_exact(size)
+		Lê do servidor uma quantidade exata de bytes
+	open()
+		Abre a conexão caso ela não esteja aberta
+	close()
+		Fecha a conexão
+	'''
+	_json_decoder = json.JSONDecoder()
+
+	def __init__(self, host, port, timeout=10.0, connect_retries=4, max_backoff=2.0):
+		'''
+		Parameters
+        ----------
+		host : str
+			Endereço em que o servidor está sendo executado
+		port : int
+			Porta em que o servidor está sendo executado
+		timeout : float
+			Tempo máximo (em segundos) de espera pela resposta do servidor
+		connect_retries : int
+			Quantidade de novas tentativas de conexão, com espera crescente
+			entre elas
+		max_backoff : float
+			Tempo máximo (em segundos) de espera entre as tentativas de conexão
+		'''
+		self._address = (host, port)
+		self._timeout = timeout
+		self._connect_retries = connect_retries
+		self._max_backoff = max_backoff
+		self._socket = None
+		self._buffer = bytearray()
+
+	@property
+	def connected(self):
+		'''Indica se a conexão está aberta.
+
+		Returns
+        -------
+		bool
+			Booleano indicando se a conexão está aberta.
+		'''
+		return self._socket is not None
+
+	def request(self, content):
+		'''Envia uma requisição e aguarda a resposta.
+
+		Parameters
+        ----------
+		content : dict
+			Dados da requisição
+
+		Returns
+        -------
+		Any
+			Dados da resposta.
+
+		Raises
+        ------
+		socket.error
+			Caso não seja possível se comunicar com o servidor. A conexão é
+			fechada e será reaberta no próximo uso.
+		'''
+		self.send(json.dumps(content).encode())
+		return self.read_json()
+
+	def send(self, data):
+		'''Envia dados para o servidor, abrindo a conexão caso necessário.
+
+		Parameters
+        ----------
+		data : bytes
+			Dados a serem enviados
+		'''
+		self.open()
+
+		try:
+			self._socket.sendall(data)
+		except socket.error:
+			self.close()
+			raise
+
+	def read_json(self):
+		'''Lê um documento JSON completo do servidor.
+
+		Returns
+        -------
+		Any
+			Documento recebido.
+		'''
+		while True:
+			try:
+				text = self._buffer.decode().lstrip()
+			except UnicodeDecodeError:
+				text = ''
+
+			if text:
+				try:
+					data, end = Connection._json_decoder.raw_decode(text)
+					del self._buffer[:len(self._buffer) - len(text[end:].encode())]
+					return data
+				except ValueError:
+					pass
+
+			self._receive()
+
+	def read_until(self, delimiter):
+		'''Lê do servidor até encontrar o delimitador.
+
+		Parameters
+        ----------
+		delimiter : bytes
+			Delimitador que indica o fim do trecho
+
+		Returns
+        -------
+		bytes
+			Trecho lido, sem o delimitador.
+		'''
+		while delimiter not in self._buffer:
+			self._receive()
+
+		index = self._buffer.index(delimiter)
+		data = bytes(self._buffer[:index])
+		del self._buffer[:index + len(delimiter)]
+		return data
+
+	def read_exact(self, size):
+		'''Lê do servidor uma quantidade exata de bytes.
+
+		Parameters
+        ----------
+		size : int
+			Quantidade de bytes a serem lidos
+
+		Returns
+        -------
+		bytes
+			Trecho lido.
+		'''
+		while len(self._buffer) < size:
+			self._receive()
+
+		data = bytes(self._buffer[:size])
+		del self._buffer[:size]
+		return data
+
+	def open(self):
+		'''Abre a conexão caso ela não esteja aberta.
+		'''
+		if not self.connected:
+			self._connect()
+
+	def close(self):
+		'''Fecha a conexão. Ela será reaberta no próximo uso.
+		'''
+		if self._socket:
+			try:
+				self._socket.close()
+			except socket.error:
+				pass
+
+		self._socket = None
+		self._buffer.clear()
+
+	def _connect(self):
+		'''Abre a conexão com o servidor, tentando novamente com espera
+		crescente caso o servidor esteja indisponível.
+		'''
+		for attempt in range(self._connect_retries + 1):
+			client_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+			client_socket.settimeout(self._timeout)
+
+			try:
+				client_socket.connect(self._address)
+				self._socket = client_socket
+				self._buffer.clear()
+				return
+			except socket.error:
+				client_socket.close()
+
+				if attempt >= self._connect_retries:
+					raise
+
+				time.sleep(min(self._max_backoff, 0.05 * 2 ** attempt))
+
+	def _receive(self):
+		'''Recebe dados do servidor e acumula no buffer. Caso o tempo de espera
+		se esgote, a conexão e os dados já recebidos são mantidos.
+		'''
+		if not self.connected:
+			raise ConnectionError('Conexão não está aberta.')
+
+		try:
+			data = self._socket.recv(64 * 1024)
+		except socket.timeout:
+			raise
+		except socket.error:
+			self.close()
+			raise
+
+		if not data:
+			self.close()
+			raise ConnectionError('Conexão encerrada pelo servidor.')
+
+		self._buffer += data
+
+
+class ConnectionPool:
+	'''Conjunto de conexões com o servidor do banco compartilhadas por vários
+	clientes e sessões, inclusive de threads diferentes.
+
+	As conexões são criadas sob demanda até o tamanho máximo do conjunto e,
+	quando todas estão em uso, a próxima requisição aguarda uma delas ser
+	liberada.
+
+    Methods
+    -------
+	connection()
+		Reserva uma conexão durante um escopo
+	request(content, retries=0)
+		Envia uma requisição por uma das conexões e aguarda a resposta
+	warm_up()
+		Abre uma conexão antes do primeiro uso
+	close()
+		Fecha todas as conexões
+	'''
+	def __init__(self, host, port, size=4, timeout=10.0):
+		'''
+		Parameters
+        ----------
+		host : str
+			Endereço em que o servidor está sendo executado
+		port : int
+			Porta em que o servidor está sendo executado
+		size : int
+			Quantidade máxima de conexões abertas
+		timeout : float
+			Tempo máximo (em segundos) de espera pela resposta do servidor
+		'''
+		self._host = host
+		self._port = port
+		self._size = size
+		self._timeout = timeout
+		self._connections = []
+		self._idle = queue.LifoQueue()
+		self._locker = threading.Lock()
+
+	@contextmanager
+	def connection(self):
+		'''Reserva uma conexão durante um escopo. Caso uma exceção seja lançada
+		no escopo, a conexão é fechada, descartando respostas pendentes.
+
+		Yields
+        ------
+		Connection
+			Conexão reservada.
+		'''
+		connection = self._acquire()
+
+		try:
+			yield connection
+		except:
+			connection.close()
+			raise
+		finally:
+			self._idle.put(connection)
+
+	def request(self, content, retries=0):
+		'''Envia uma requisição por uma das conexões e aguarda a resposta.
+
+		Parameters
+        ----------
+		content : dict
+			Dados da requisição
+		retries : int
+			Quantidade de novas tentativas, em uma nova conexão, caso a resposta
+			não seja recebida. Use apenas em ações que podem ser repetidas com
+			segurança.
+
+		Returns
+        -------
+		Any
+			Dados da resposta.
+
+		Raises
+        ------
+		socket.error
+			Caso não seja possível se comunicar com o servidor.
+		'''
+		for attempt in range(retries + 1):
+			try:
+				with self.connection() as connection:
+					return connection.request(content)
+			except socket.error:
+				if attempt >= retries:
+					raise
+
+				time.sleep(0.05 * 2 ** attempt)
+
+	def warm_up(self):
+		'''Abre uma conexão antes do primeiro uso, para que a primeira
+		requisição não aguarde a conexão com o servidor.
+
+		Raises
+        ------
+		socket.error
+			Caso não seja possível se conectar ao servidor.
+		'''
+		with self.connection() as connection:
+			connection.open()
+
+	def close(self):
+		'''Fecha todas as conexões. Elas serão reabertas no próximo uso.
+		'''
+		with self._locker:
+			for connection in self._connections:
+				connection.close()
+
+	def _acquire(self):
+		'''Obtém uma conexão livre, criando uma nova caso o conjunto ainda não
+		esteja completo.
+
+		Returns
+        -------
+		Connection
+			Conexão livre.
+		'''
+		try:
+			return self._idle.get_nowait()
+		except queue.Empty:
+			pass
+
+		with self._locker:
+			if len(self._connections) < self._size:
+				connection = Connection(self._host, self._port, timeout=self._timeout)
+				self._connections.append(connection)
+				return connection
+
+		return self._idle.get()
@@ -1,6 +1,12 @@
+import time
+
+
 class Session:
 	'''Classe que permite gerenciar a sessão do usuário.
 
+	Quando o servidor informa a duração da sessão, ela é considerada ativa até
+	expirar sem consultar o servidor.
+
 	Attributes
     ----------
 	token : str
@@ -10,7 +16,7 @@ class Session:
 
     Methods
     -------
-    login(token)
+    login(token, expires_in=None)
         Cria a sessão do usuário a partir do token
     logout()
         Deleta a sessão do usuário
@@ -18,7 +24,9 @@ class Session:
 	__slots__ = [
 		'_client',
 		'_session_token',
+		'_expires_at',
 	]
+	expiry_margin = 5.0
 
 	def __init__(self, client):
 		'''
@@ -29,6 +37,7 @@ class Session:
 		'''
 		self._client = client
 		self._session_token = None
+		self._expires_at = None
 
 	@property
 	def token(self):
@@ -50,21 +59,34 @@ class Session:
         bool
             Booleano indicando se o usuário tem uma sessão ativa.
         '''
-		return bool(self._session_token) and self._client.client_is_logged()
+		if not self._session_token:
+			return False
 
-	def login(self, token):
+		if self._expires_at is not None:
+			return time.monotonic() < self._expires_at
+		return self._client.client_is_logged()
+
+	def login(self, token, expires_in=None):
 		'''Cria a sessão do usuário a partir do token.
 
 		Parameters
         ----------
 		token : str
 			Token de autorização do usuário
+		expires_in : Optional[float]
+			Tempo (em segundos) até a sessão expirar, informado pelo servidor.
+			Sem ele, a sessão é verificada no servidor.
 		'''
 		self._session_token = token
+		self._expires_at = None
+
+		if expires_in is not None:
+			self._expires_at = time.monotonic() + float(expires_in) - Session.expiry_margin
 		return True
 
 	def logout(self):
 		'''Deleta a sessão do usuário.
 		'''
 		self._session_token = None
+		self._expires_at = None
 		return True
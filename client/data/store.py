@@ -0,0 +1,246 @@
+from threading import Lock
+
+
+class ClientStore:
+	'''Estado do usuário obtido do servidor e mantido localmente, para que as
+	janelas não precisem consultar o servidor novamente a cada navegação.
+
+	O saldo é atualizado a partir das respostas das operações bancárias, e as
+	páginas do histórico são descartadas sempre que uma operação é realizada.
+	Como respostas e notificações podem chegar fora de ordem, um saldo com
+	versão menor que a armazenada é ignorado.
+
+	Attributes
+    ----------
+	client : Optional[dict]
+		Informações do usuário, incluindo a conta e o saldo
+	history_version : Optional[int]
+		Versão da conta correspondente às páginas do histórico armazenadas
+
+    Methods
+    -------
+	set_client(client)
+		Armazena as informações do usuário
+	set_balance(balance, version=None)
+		Atualiza o saldo da conta do usuário
+	get_history_page(limit, before=None)
+		Obtém uma página do histórico armazenada
+	set_history_page(limit, before, page, version=None)
+		Armazena uma página do histórico
+	add_history(history)
+		Adiciona novos registros no início do histórico armazenado
+	invalidate_history()
+		Descarta as páginas do histórico armazenadas
+	get_history(start=None, end=None)
+		Obtém o histórico completo de um período armazenado
+	set_history(start, end, version, history)
+		Armazena o histórico completo de um período
+	clear()
+		Descarta todo o estado armazenado
+	'''
+	def __init__(self):
+		self._locker = Lock()
+		self._client = None
+		self._history_pages = {}
+		self._history_version = None
+		self._histories = {}
+
+	@property
+	def client(self):
+		'''Informações do usuário, incluindo a conta e o saldo.
+
+		Returns
+        -------
+		dict
+			Cópia das informações do usuário.
+		None
+			Caso as informações ainda não tenham sido obtidas.
+		'''
+		with self._locker:
+			if not self._client:
+				return None
+			return {**self._client, 'account': {**self._client['account']}}
+
+	def set_client(self, client):
+		'''Armazena as informações do usuário.
+
+		Parameters
+        ----------
+		client : dict
+			Informações do usuário, como recebidas do servidor
+		'''
+		with self._locker:
+			self._client = {**client, 'account': {**client['account']}}
+
+	def set_balance(self, balance, version=None):
+		'''Atualiza o saldo da conta do usuário, caso ele não seja mais antigo
+		que o armazenado.
+
+		Parameters
+        ----------
+		balance : float
+			Novo saldo da conta
+		version : Optional[int]
+			Versão da conta correspondente ao saldo
+		'''
+		with self._locker:
+			if not self._client:
+				return
+
+			account = self._client['account']
+			current = account.get('version')
+
+			if version is not None and current is not None and version < current:
+				return
+
+			account['balance'] = balance
+
+			if version is not None:
+				account['version'] = version
+
+	@property
+	def history_version(self):
+		'''Versão da conta correspondente às páginas do histórico armazenadas.
+
+		Returns
+        -------
+		int
+			Versão da conta recebida com a primeira página.
+		None
+			Caso a versão não seja conhecida.
+		'''
+		return self._history_version
+
+	def get_history_page(self, limit, before=None):
+		'''Obtém uma página do histórico armazenada.
+
+		Parameters
+        ----------
+		limit : int
+			Quantidade máxima de registros da página
+		before : Optional[list]
+			Posição da página
+
+		Returns
+        -------
+		tuple[list, Optional[list]]
+			Registros da página e a posição da próxima página.
+		None
+			Caso a página não esteja armazenada.
+		'''
+		with self._locker:
+			return self._history_pages.get(ClientStore._page_key(limit, before))
+
+	def set_history_page(self, limit, before, page, version=None):
+		'''Armazena uma página do histórico.
+
+		Parameters
+        ----------
+		limit : int
+			Quantidade máxima de registros da página
+		before : Optional[list]
+			Posição da página
+		page : tuple[list, Optional[list]]
+			Registros da página e a posição da próxima página
+		version : Optional[int]
+			Versão da conta recebida com a primeira página
+		'''
+		with self._locker:
+			self._history_pages[ClientStore._page_key(limit, before)] = page
+
+			if version is not None:
+				self._history_version = version
+
+	def add_history(self, history):
+		'''Adiciona novos registros nas primeiras páginas do histórico
+		armazenadas, na posição indicada pela sequência de cada registro, que
+		segue a ordem de confirmação mesmo quando as notificações chegam fora
+		de ordem. As posições das demais páginas continuam válidas, pois elas
+		contêm apenas registros mais antigos.
+
+		Parameters
+        ----------
+		history : list
+			Novos registros
+		'''
+		with self._locker:
+			for key, (rows, next_page) in list(self._history_pages.items()):
+				if key[1] is not None:
+					continue
+
+				ids = {row['id'] for row in rows}
+				added = [row for row in history if row['id'] not in ids]
+				rows = sorted(added + rows, key=lambda row: row.get('sequence') or 0, reverse=True)
+				self._history_pages[key] = (rows, next_page)
+
+	def invalidate_history(self):
+		'''Descarta as páginas do histórico armazenadas.
+		'''
+		with self._locker:
+			self._history_pages.clear()
+			self._history_version = None
+
+	def get_history(self, start=None, end=None):
+		'''Obtém o histórico completo de um período armazenado.
+
+		Parameters
+        ----------
+		start : Optional[str]
+			Início do período
+		end : Optional[str]
+			Fim do período
+
+		Returns
+        -------
+		tuple[int, list]
+			Versão da conta e registros do histórico, do mais antigo para o
+			mais recente.
+		None
+			Caso o histórico do período não esteja armazenado.
+		'''
+		with self._locker:
+			return self._histories.get((start, end))
+
+	def set_history(self, start, end, version, history):
+		'''Armazena o histórico completo de um período.
+
+		Parameters
+        ----------
+		start : Optional[str]
+			Início do período
+		end : Optional[str]
+			Fim do período
+		version : int
+			Versão da conta correspondente ao histórico
+		history : list
+			Registros do histórico, do mais antigo para o mais recente
+		'''
+		with self._locker:
+			self._histories[(start, end)] = (version, history)
+
+	def clear(self):
+		'''Descarta todo o estado armazenado.
+		'''
+		with self._locker:
+			self._client = None
+			self._history_pages.clear()
+			self._history_version = None
+			self._histories.clear()
+
+	@staticmethod
+	def _page_key(limit, before):
+		'''Monta a chave de uma página do histórico.
+
+		Parameters
+        ----------
+		limit : int
+			Quantidade máxima de registros da página
+		before : Optional[list]
+			Posição da página
+
+		Returns
+        -------
+		tuple
+			Chave da página.
+		'''
+		return limit, tuple(before) if before else None
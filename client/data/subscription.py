@@ -0,0 +1,146 @@
+import threading
+import socket
+import json
+
+from .connection import Connection
+
+
+class Subscription(threading.Thread):
+	'''Acompanha as alterações da conta do usuário enviadas pelo servidor
+	(ação `subscribe`), em uma conexão própria mantida aberta.
+
+	Cada alteração recebida atualiza o estado local do cliente (`store`) e é
+	repassada para a função `on_event`. Caso a conexão caia, a inscrição é
+	refeita com espera crescente enquanto o usuário tiver uma sessão.
+
+	Attributes
+    ----------
+	on_event : Optional[function]
+		Função chamada, na thread da inscrição, com cada mensagem recebida
+
+    Methods
+    -------
+	run()
+		Mantém a inscrição até ser parada ou a sessão ser encerrada
+	stop()
+		Encerra a inscrição
+	'''
+	def __init__(self, client, host, port, on_event=None, heartbeat=60.0, max_backoff=30.0):
+		'''
+		Parameters
+        ----------
+		client : BankClient
+			Cliente com a sessão do usuário e o estado local
+		host : str
+			Endereço em que o servidor está sendo executado
+		port : int
+			Porta em que o servidor está sendo executado
+		on_event : Optional[function]
+			Função chamada com cada mensagem recebida: a confirmação da
+			inscrição (`event` igual a `'subscribed'`) e as alterações da conta
+			(`event` igual a `'account'`).
+		heartbeat : float
+			Intervalo (em segundos) sem mensagens após o qual a sessão é
+			verificada, mantendo a conexão ativa no servidor
+		max_backoff : float
+			Tempo máximo (em segundos) de espera entre as tentativas de
+			inscrição
+		'''
+		super(Subscription, self).__init__(name='subscription', daemon=True)
+		self._client = client
+		self._connection = Connection(host, port, timeout=heartbeat)
+		self._max_backoff = max_backoff
+		self._stop_event = threading.Event()
+		self.on_event = on_event
+
+	def run(self):
+		'''Mantém a inscrição até ser parada ou a sessão ser encerrada.
+		'''
+		attempt = 0
+		resumed = False
+
+		while not self._stop_event.is_set():
+			token = self._client.session.token
+
+			if not token:
+				break
+
+			try:
+				if not self._listen(token, resumed):
+					break
+			except Exception as error:
+				if not self._stop_event.is_set():
+					print(error)
+
+			self._connection.close()
+			self._stop_event.wait(min(self._max_backoff, 0.5 * 2 ** attempt))
+			attempt += 1
+			resumed = True
+
+		self._connection.close()
+
+	def stop(self):
+		'''Encerra a inscrição, fechando a sua conexão.
+		'''
+		self._stop_event.set()
+		self._connection.close()
+
+	def _listen(self, token, resumed):
+		'''Realiza a inscrição e recebe as mensagens até a conexão cair.
+
+		Parameters
+        ----------
+		token : str
+			Token da sessão do usuário
+		resumed : bool
+			Indica se a inscrição está sendo refeita após uma falha
+
+		Returns
+        -------
+		bool
+			`False` caso a inscrição tenha sido recusada ou a sessão encerrada.
+		'''
+		response = self._connection.request({'action': 'subscribe', 'token': token})
+
+		if not isinstance(response, dict) or response.get('error'):
+			return False
+
+		self._apply({**response, 'event': 'subscribed', 'resumed': resumed})
+
+		while not self._stop_event.is_set():
+			try:
+				message = self._connection.read_json()
+			except socket.timeout:
+				self._connection.send(json.dumps({'action': 'client_is_logged', 'token': token}).encode())
+				continue
+
+			if not isinstance(message, dict):
+				continue
+
+			if message.get('is_logged') is False:
+				return False
+
+			if 'event' in message:
+				self._apply(message)
+		return True
+
+	def _apply(self, message):
+		'''Atualiza o estado local com uma mensagem e a repassa para `on_event`.
+
+		Parameters
+        ----------
+		message : dict
+			Mensagem recebida
+		'''
+		store = self._client.store
+
+		if 'account' in message:
+			store.set_balance(message['account']['balance'], message['account'].get('version'))
+
+		if message['event'] == 'subscribed':
+			store.invalidate_history()
+		elif message.get('history'):
+			store.add_history(message['history'])
+
+		if self.on_event and not self._stop_event.is_set():
+			self.on_event(message)
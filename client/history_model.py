@@ -0,0 +1,167 @@
+from datetime import datetime
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, Qt
+
+
+class HistoryTableModel(QAbstractTableModel):
+	'''Modelo da tabela de histórico de transações bancárias.
+
+	O histórico é carregado em páginas, das transações mais recentes para as
+	mais antigas, à medida que o usuário rola a tabela. Os registros são
+	guardados como recebidos do servidor e formatados apenas quando exibidos.
+
+	Attributes
+    ----------
+	columns : tuple[str]
+		Nomes das colunas da tabela
+
+    Methods
+    -------
+	reset()
+		Descarta os registros carregados e volta para a primeira página
+	canFetchMore(parent)
+		Indica se existem mais registros para carregar
+	fetchMore(parent)
+		Carrega a próxima página de registros
+	prepend(history)
+		Adiciona novos registros no início da tabela
+	'''
+	columns = ('Tipo', 'Data e hora', 'Descrição')
+
+	def __init__(self, fetch_page, on_page=None, parent=None):
+		'''
+		Parameters
+        ----------
+		fetch_page : function
+			Função que busca uma página, chamada com a posição da página e a
+			função que recebe o resultado de `bank.get_client_history_page`
+		on_page : Optional[function]
+			Função chamada com a quantidade de registros após cada página
+			carregada
+		parent : Optional[QObject]
+			Objeto pai do modelo
+		'''
+		super(HistoryTableModel, self).__init__(parent)
+		self._fetch_page = fetch_page
+		self._on_page = on_page
+		self._history = []
+		self._ids = set()
+		self._next = None
+		self._exhausted = False
+		self._fetching = False
+		self._generation = 0
+
+	def rowCount(self, parent=QModelIndex()):
+		return 0 if parent.isValid() else len(self._history)
+
+	def columnCount(self, parent=QModelIndex()):
+		return 0 if parent.isValid() else len(HistoryTableModel.columns)
+
+	def data(self, index, role=Qt.DisplayRole):
+		if not index.isValid() or role != Qt.DisplayRole:
+			return None
+
+		log = self._history[index.row()]
+		column = index.column()
+
+		if column == 0:
+			return log['type']
+
+		if column == 1:
+			return datetime.fromisoformat(log['timestamp']).strftime('%d/%m/%Y %H:%M:%S')
+
+		return log['message']
+
+	def headerData(self, section, orientation, role=Qt.DisplayRole):
+		if role != Qt.DisplayRole:
+			return None
+
+		if orientation == Qt.Horizontal:
+			return HistoryTableModel.columns[section]
+		return section + 1
+
+	def reset(self):
+		'''Descarta os registros carregados e volta para a primeira página. As
+		páginas ainda em andamento são ignoradas quando chegarem.
+		'''
+		self.beginResetModel()
+		self._history = []
+		self._ids = set()
+		self._next = None
+		self._exhausted = False
+		self._fetching = False
+		self._generation += 1
+		self.endResetModel()
+
+	def canFetchMore(self, parent=QModelIndex()):
+		'''Indica se existem mais registros para carregar.
+
+		Returns
+        -------
+		bool
+			Booleano indicando se a próxima página pode ser buscada.
+		'''
+		return not parent.isValid() and not self._exhausted and not self._fetching
+
+	def fetchMore(self, parent=QModelIndex()):
+		'''Busca a próxima página de registros. Ela é adicionada ao fim da
+		tabela quando chegar.
+		'''
+		if not self.canFetchMore(parent):
+			return
+
+		generation = self._generation
+		self._fetching = True
+		self._fetch_page(self._next, lambda page: self._add_page(generation, page))
+
+	def _add_page(self, generation, page):
+		'''Adiciona uma página recebida ao fim da tabela.
+
+		Parameters
+        ----------
+		generation : int
+			Geração do modelo quando a página foi solicitada
+		page : Optional[tuple[list, Optional[list]]]
+			Registros da página e a posição da próxima página
+		'''
+		if generation != self._generation:
+			return
+
+		self._fetching = False
+
+		if not page:
+			self._exhausted = True
+			return
+
+		history, next_page = page
+		self._next = next_page
+		self._exhausted = next_page is None
+		history = [log for log in history if log['id'] not in self._ids]
+
+		if history:
+			first = len(self._history)
+			self.beginInsertRows(QModelIndex(), first, first + len(history) - 1)
+			self._history.extend(history)
+			self._ids.update(log['id'] for log in history)
+			self.endInsertRows()
+
+		if self._on_page:
+			self._on_page(len(self._history))
+
+	def prepend(self, history):
+		'''Adiciona novos registros no início da tabela, ignorando os que já
+		foram carregados.
+
+		Parameters
+        ----------
+		history : list
+			Novos registros, do mais antigo para o mais recente
+		'''
+		history = [log for log in reversed(history) if log['id'] not in self._ids]
+
+		if not history:
+			return
+
+		self.beginInsertRows(QModelIndex(), 0, len(history) - 1)
+		self._history[0:0] = history
+		self._ids.update(log['id'] for log in history)
+		self.endInsertRows()
@@ -1,6 +1,8 @@
+from PyQt5.QtCore import Qt
 from PyQt5.QtWidgets import QMainWindow, QStackedLayout
 
 from windows import *
+from worker import RequestGroup
 from data import bank
 
 
@@ -8,6 +10,10 @@ class Navigator(QMainWindow):
 	'''Classe que implementa toda a lógica de navegação entre as telas da
 	aplicação.
 
+	As janelas são criadas apenas na primeira navegação para cada uma delas,
+	e a conexão com o servidor é aberta em segundo plano enquanto a janela de
+	login é exibida.
+
 	Methods
     -------
 	add_window(window_controller_constructor)
@@ -33,8 +39,12 @@ class Navigator(QMainWindow):
 		super(Navigator, self).__init__()
 		self.setObjectName('navigator')
 		self._nav_stack = QStackedLayout()
-		self._window_controllers = []
-		self._last_window_id = self._nav_stack.currentIndex()
+		self._window_constructors = []
+		self._window_controllers = {}
+		self._current_window_id = -1
+		self._last_window_id = -1
+		self._requests = RequestGroup(on_loading=self._set_loading)
+		self._background_requests = RequestGroup()
 
 		self.add_window(LoginWindow)
 		self.add_window(RegisterWindow)
@@ -43,23 +53,48 @@ class Navigator(QMainWindow):
 		self.add_window(DepositWindow)
 		self.add_window(TransferWindow)
 
+		self.go_to_login_window()
+		self._background_requests.run(bank.warm_up)
+
 	def add_window(self, window_controller_constructor):
-		'''Adiciona uma nova janela na pilha de navegação.
+		'''Adiciona uma nova janela na pilha de navegação. A janela é criada
+		apenas quando for exibida pela primeira vez.
 
 		Parameters
         ----------
 		window_controller_constructor : Window
 			Classe construtora da janela
 		'''
-		window_controller = window_controller_constructor(self)
-		self._window_controllers.append(window_controller)
-		self._nav_stack.addWidget(window_controller.window)
+		self._window_constructors.append(window_controller_constructor)
+
+	def _get_window(self, window_id):
+		'''Obtém o controlador de uma janela, criando-o caso a janela ainda não
+		tenha sido exibida.
+
+		Parameters
+        ----------
+		window_id : int
+			ID da janela
+
+		Returns
+        -------
+		Window
+			Controlador da janela.
+		'''
+		if window_id not in self._window_controllers:
+			window_controller = self._window_constructors[window_id](self)
+			self._window_controllers[window_id] = window_controller
+			self._nav_stack.addWidget(window_controller.window)
+
+		return self._window_controllers[window_id]
 
 	def go_to_window(self, window_id, private=False):
 		'''Navega para uma janela uma determinada janela com base no ID.
 
 		Caso a janela seja privada, o usuário deve estar autenticado, caso
-		contrário será direcionado para a página de login.
+		contrário será direcionado para a página de login. A verificação da
+		sessão é feita fora da thread da interface, e uma navegação ainda não
+		concluída é cancelada por uma nova navegação.
 
 		Parameters
         ----------
@@ -68,16 +103,53 @@ class Navigator(QMainWindow):
 		private : bool
 			Indica se a janela é privada ou não.
 		'''
-		if len(self._window_controllers) <= 0 or 0 > window_id >= len(self._window_controllers):
+		if not 0 <= window_id < len(self._window_constructors):
 			return
 
-		if private and not bank.session.has_session:
-			self.go_to_login_window()
-			return
-		
-		self._last_window_id = self._nav_stack.currentIndex()
-		self._window_controllers[window_id].load_initial_state()
-		self._nav_stack.setCurrentIndex(window_id)
+		self._requests.cancel()
+
+		if not private:
+			return self._show_window(window_id)
+
+		self._requests.run(
+			lambda: bank.session.has_session,
+			on_result=lambda has_session: self._show_window(window_id) if has_session else self.go_to_login_window(),
+			on_error=lambda _: self.go_to_login_window(),
+		)
+
+	def _show_window(self, window_id):
+		'''Exibe uma janela, cancelando as requisições em andamento da janela
+		anterior.
+
+		Parameters
+        ----------
+		window_id : int
+			ID da janela que será exibida
+		'''
+		current_window_id = self._current_window_id
+
+		if current_window_id >= 0:
+			self._window_controllers[current_window_id].cancel_requests()
+
+		window_controller = self._get_window(window_id)
+
+		self._last_window_id = current_window_id
+		self._current_window_id = window_id
+		window_controller.load_initial_state()
+		self._nav_stack.setCurrentWidget(window_controller.window)
+
+	def _set_loading(self, loading):
+		'''Indica o carregamento enquanto a navegação não é concluída.
+
+		Parameters
+        ----------
+		loading : bool
+			Indica se existe uma navegação em andamento
+		'''
+		if loading:
+			self.setCursor(Qt.WaitCursor)
+		else:
+			self.unsetCursor()
 
 	def go_back(self):
 		'''Navega para a janela anterior.
@@ -0,0 +1,47 @@
+import importlib
+import os
+
+from PyQt5.QtWidgets import QMainWindow
+
+from build_ui import UI_DIR, COMPILED_DIR
+
+
+def load_ui(name):
+	'''Cria a janela de uma interface.
+
+	Usa o módulo gerado por `build_ui.py` quando ele existe e está atualizado,
+	e caso contrário lê o arquivo `.ui` diretamente, como durante o
+	desenvolvimento.
+
+	Parameters
+    ----------
+	name : str
+		Nome da interface, sem a extensão (por exemplo, `login`)
+
+	Returns
+    -------
+	QMainWindow
+		Janela da interface, com os seus elementos como atributos.
+	'''
+	ui_path = os.path.join(UI_DIR, f'{name}.ui')
+	compiled_path = os.path.join(COMPILED_DIR, f'{name}.py')
+
+	try:
+		is_compiled = os.path.getmtime(compiled_path) >= os.path.getmtime(ui_path)
+	except OSError:
+		is_compiled = False
+
+	if not is_compiled:
+		from PyQt5 import uic
+		return uic.loadUi(ui_path)
+
+	module = importlib.import_module(f'{COMPILED_DIR}.{name}')
+	form_class = next(value for key, value in vars(module).items() if key.startswith('Ui_'))
+
+	window = QMainWindow()
+	form = form_class()
+	form.setupUi(window)
+
+	for attr, widget in vars(form).items():
+		setattr(window, attr, widget)
+	return window
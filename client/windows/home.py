@@ -1,8 +1,13 @@
-from datetime import datetime
-from PyQt5 import uic
-from PyQt5.QtWidgets import QTableWidgetItem
+from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import QHeaderView, QMessageBox
 
 from data import bank
+from history_model import HistoryTableModel
+from ui_loader import load_ui
+from worker import NotificationSignals, RequestGroup
+
+
+HISTORY_PAGE_SIZE = 100
 
 
 class HomeWindow:
@@ -17,6 +22,8 @@ class HomeWindow:
     -------
 	load_initial_state()
 		Carrega o estado inicial da aplicação
+	cancel_requests()
+		Cancela as requisições em andamento da janela
 	close()
 		Fecha a janela atual
 	'''
@@ -28,7 +35,7 @@ class HomeWindow:
 		navigator : Navigator
 			Controlador da navegação da aplicação
 		'''
-		self._window = uic.loadUi('ui/home.ui')
+		self._window = load_ui('home')
 		self._navigator = navigator
 
 		self._account_code_label = self._window.account_code_label
@@ -43,6 +50,11 @@ class HomeWindow:
 		self._update_history_btn = self._window.update_history_btn
 		self._history_table = self._window.history_table
 
+		self._requests = RequestGroup(on_loading=self._set_loading)
+		self._notifications = NotificationSignals()
+		self._notifications.received.connect(self._on_notification)
+		self._history_model = HistoryTableModel(self._fetch_history_page, on_page=self._resize_history_table)
+		self._load_history_table()
 		self._load_events()
 	
 	@property
@@ -58,14 +70,88 @@ class HomeWindow:
 	
 	def load_initial_state(self):
 		'''Carrega o estado inicial da aplicação.
+
+		As informações do usuário e a primeira página do histórico são buscadas
+		em paralelo, fora da thread da interface. As demais páginas são
+		buscadas conforme o usuário rola a tabela. O que já estiver no estado
+		local (`bank.store`) não é buscado novamente, e as alterações da conta
+		enviadas pelo servidor passam a ser aplicadas assim que chegam.
+		'''
+		bank.subscribe(self._notifications.received.emit)
+		self._requests.cancel()
+		self._requests.run(bank.get_client, on_result=self._load_client, on_error=self._show_connection_error)
+
+		self._history_columns_resized = False
+		self._history_model.reset()
+		self._history_model.fetchMore()
+
+	def _refresh(self):
+		'''Carrega novamente as informações do usuário e verifica se o
+		histórico mudou. A tabela só é recarregada caso tenha mudado.
+		'''
+		self._requests.run(bank.get_client, True, on_result=self._load_client, on_error=self._show_connection_error)
+		self._requests.run(
+			bank.sync_history,
+			HISTORY_PAGE_SIZE,
+			on_result=self._on_history_synced,
+			on_error=self._show_connection_error,
+		)
+
+	def _on_history_synced(self, changed):
+		'''Recarrega a tabela de histórico caso ele tenha mudado. A primeira
+		página já está no estado local.
+
+		Parameters
+        ----------
+		changed : Optional[bool]
+			Indica se o histórico mudou
+		'''
+		if not changed:
+			return
+
+		self._history_columns_resized = False
+		self._history_model.reset()
+		self._history_model.fetchMore()
+
+	def _load_client(self, client):
+		'''Exibe as informações do usuário.
+
+		Parameters
+        ----------
+		client : Optional[dict]
+			Informações do usuário
 		'''
-		client = bank.get_client()
+		if not client:
+			return
+
 		balance = f"R$ {float(client['account']['balance']):.2f}".replace('.', ',')
 
 		self._account_code_label.setText(f"Conta: {client['account']['code']}")
 		self._welcome_label.setText(f"Olá, {client['name']}!")
 		self._balance_value_label.setText(balance)
-		self._load_history_table()
+
+	def _on_notification(self, message):
+		'''Aplica uma alteração da conta enviada pelo servidor: o saldo é
+		atualizado e os novos registros são adicionados no início da tabela.
+		Caso a inscrição tenha sido refeita após uma falha, o histórico é
+		carregado novamente, pois alterações podem ter sido perdidas.
+
+		Parameters
+        ----------
+		message : dict
+			Mensagem recebida
+		'''
+		client = bank.store.client
+
+		if client:
+			self._load_client(client)
+
+		if message['event'] == 'subscribed' and message.get('resumed'):
+			self._history_columns_resized = False
+			self._history_model.reset()
+			self._history_model.fetchMore()
+		elif message.get('history'):
+			self._history_model.prepend(message['history'])
 
 	def _load_events(self):
 		'''Carrega os eventos da aplicação.
@@ -73,37 +159,91 @@ class HomeWindow:
 		self._withdraw_btn.clicked.connect(self._navigator.go_to_withdraw_window)
 		self._deposit_btn.clicked.connect(self._navigator.go_to_deposit_window)
 		self._transfer_btn.clicked.connect(self._navigator.go_to_transfer_window)
-		self._update_history_btn.clicked.connect(lambda: self.load_initial_state())
+		self._update_history_btn.clicked.connect(lambda: self._refresh())
 		self._logout_btn.clicked.connect(lambda: self._logout())
 
 	def _load_history_table(self):
 		'''Carrega a tabela de histórico de transações bancárias.
+
+		As linhas têm altura fixa e a largura das colunas é calculada a partir
+		de uma amostra dos registros, então o tamanho da tabela não depende da
+		quantidade de registros carregados.
 		'''
-		self._clear_history_table()
-		history = bank.get_client_history()
+		self._history_columns_resized = False
+		self._history_table.setModel(self._history_model)
+		self._history_table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+		self._history_table.horizontalHeader().setResizeContentsPrecision(HISTORY_PAGE_SIZE)
 
-		for log in reversed(history):
-			date_time = datetime.fromisoformat(log['timestamp']).strftime('%d/%m/%Y %H:%M:%S')
-			row_position = self._history_table.rowCount()
+	def _fetch_history_page(self, before, on_result):
+		'''Busca uma página do histórico de transações fora da thread da
+		interface.
 
-			self._history_table.insertRow(row_position)
-			self._history_table.setItem(row_position, 0, QTableWidgetItem(log['type']))
-			self._history_table.setItem(row_position, 1, QTableWidgetItem(date_time))
-			self._history_table.setItem(row_position, 2, QTableWidgetItem(log['message']))
-		
-		self._history_table.resizeColumnsToContents()
-		self._history_table.resizeRowsToContents()
-	
-	def _clear_history_table(self):
-		'''Limpa a tabela de histórico de transações bancárias.
+		Parameters
+        ----------
+		before : Optional[list]
+			Posição da página
+		on_result : function
+			Função que recebe a página
 		'''
-		self._history_table.setRowCount(0)
+		def on_error(error):
+			on_result(None)
+			self._show_connection_error(error)
+
+		self._requests.run(bank.get_client_history_page, HISTORY_PAGE_SIZE, before, on_result=on_result, on_error=on_error)
+
+	def _resize_history_table(self, row_count):
+		'''Ajusta a largura das colunas quando a primeira página é carregada.
+
+		Parameters
+        ----------
+		row_count : int
+			Quantidade de registros carregados
+		'''
+		if self._history_columns_resized or not row_count:
+			return
+
+		self._history_columns_resized = True
+		self._history_table.resizeColumnsToContents()
 
 	def _logout(self):
 		'''Encerra a sessão do usuário.
 		'''
-		bank.logout_client()
-		self._navigator.go_to_login_window()
+		self._requests.cancel()
+		self._requests.run(
+			bank.logout_client,
+			on_result=lambda _: self._navigator.go_to_login_window(),
+			on_error=lambda _: self._navigator.go_to_login_window(),
+		)
+
+	def cancel_requests(self):
+		'''Cancela as requisições em andamento da janela.
+		'''
+		self._requests.cancel()
+
+	def _set_loading(self, loading):
+		'''Indica o carregamento enquanto existirem requisições em andamento.
+
+		Parameters
+        ----------
+		loading : bool
+			Indica se existem requisições em andamento
+		'''
+		self._update_history_btn.setEnabled(not loading)
+
+		if loading:
+			self._window.setCursor(Qt.WaitCursor)
+		else:
+			self._window.unsetCursor()
+
+	def _show_connection_error(self, error):
+		'''Exibe a falha de comunicação com o servidor.
+
+		Parameters
+        ----------
+		error : str
+			Mensagem de erro
+		'''
+		QMessageBox.warning(self._window, 'Erro de conexão', 'Não foi possível se comunicar com o servidor!')
 
 	def close(self):
 		'''Fecha a janela atual.
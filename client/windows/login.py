@@ -1,7 +1,9 @@
-from PyQt5 import uic
+from PyQt5.QtCore import Qt
 from PyQt5.QtWidgets import QMessageBox
 
 from data import bank
+from ui_loader import load_ui
+from worker import RequestGroup
 
 
 class LoginWindow:
@@ -16,6 +18,8 @@ class LoginWindow:
     -------
 	load_initial_state()
 		Carrega o estado inicial da aplicação
+	cancel_requests()
+		Cancela as requisições em andamento da janela
 	close()
 		Fecha a janela atual
 	'''
@@ -27,7 +31,7 @@ class LoginWindow:
 		navigator : Navigator
 			Controlador da navegação da aplicação
 		'''
-		self._window = uic.loadUi('ui/login.ui')
+		self._window = load_ui('login')
 		self._navigator = navigator
 
 		self._cpf_input = self._window.cpf_input
@@ -36,6 +40,7 @@ class LoginWindow:
 		self._login_submit_btn = self._window.login_submit_btn
 		self._register_link_btn = self._window.register_link_btn
 
+		self._requests = RequestGroup(on_loading=self._set_loading)
 		self._load_events()
 	
 	@property
@@ -70,7 +75,23 @@ class LoginWindow:
 			QMessageBox.warning(self._window, 'Erro ao entrar', 'Preencha todos os campos para entrar!')
 			return
 
-		if not bank.login_client(cpf, password):
+		self._requests.run(
+			bank.login_client,
+			cpf,
+			password,
+			on_result=self._on_login,
+			on_error=self._show_connection_error,
+		)
+
+	def _on_login(self, success):
+		'''Trata o resultado da ação de login.
+
+		Parameters
+        ----------
+		success : bool
+			Indica se o login foi realizado
+		'''
+		if not success:
 			QMessageBox.warning(self._window, 'Erro ao cadastrar', 'Credenciais inválidas: CPF e/ou senha incorretos!')
 			return
 		
@@ -83,6 +104,36 @@ class LoginWindow:
 		self._cpf_input.setText('')
 		self._password_input.setText('')
 
+	def cancel_requests(self):
+		'''Cancela as requisições em andamento da janela.
+		'''
+		self._requests.cancel()
+
+	def _set_loading(self, loading):
+		'''Indica o carregamento enquanto existirem requisições em andamento.
+
+		Parameters
+        ----------
+		loading : bool
+			Indica se existem requisições em andamento
+		'''
+		self._login_submit_btn.setEnabled(not loading)
+
+		if loading:
+			self._window.setCursor(Qt.WaitCursor)
+		else:
+			self._window.unsetCursor()
+
+	def _show_connection_error(self, error):
+		'''Exibe a falha de comunicação com o servidor.
+
+		Parameters
+        ----------
+		error : str
+			Mensagem de erro
+		'''
+		QMessageBox.warning(self._window, 'Erro de conexão', 'Não foi possível se comunicar com o servidor!')
+
 	def close(self):
 		'''Fecha a janela atual.
 		'''
@@ -1,7 +1,9 @@
-from PyQt5 import uic
+from PyQt5.QtCore import Qt
 from PyQt5.QtWidgets import QMessageBox
 
 from data import bank
+from ui_loader import load_ui
+from worker import RequestGroup
 
 
 class RegisterWindow:
@@ -16,6 +18,8 @@ class RegisterWindow:
     -------
 	load_initial_state()
 		Carrega o estado inicial da aplicação
+	cancel_requests()
+		Cancela as requisições em andamento da janela
 	close()
 		Fecha a janela atual
 	'''
@@ -27,7 +31,7 @@ class RegisterWindow:
 		navigator : Navigator
 			Controlador da navegação da aplicação
 		'''
-		self._window = uic.loadUi('ui/register.ui')
+		self._window = load_ui('register')
 		self._navigator = navigator
 
 		self._name_input = self._window.name_input
@@ -37,6 +41,7 @@ class RegisterWindow:
 		self._register_submit_btn = self._window.register_submit_btn
 		self._login_link_btn = self._window.login_link_btn
 
+		self._requests = RequestGroup(on_loading=self._set_loading)
 		self._load_events()
 	
 	@property
@@ -72,7 +77,24 @@ class RegisterWindow:
 			QMessageBox.warning(self._window, 'Erro ao cadastrar', 'Preencha todos os campos para cadastrar-se!')
 			return
 
-		if not bank.register_client(name, cpf, password):
+		self._requests.run(
+			bank.register_client,
+			name,
+			cpf,
+			password,
+			on_result=self._on_register,
+			on_error=self._show_connection_error,
+		)
+
+	def _on_register(self, success):
+		'''Trata o resultado da ação de cadastro.
+
+		Parameters
+        ----------
+		success : bool
+			Indica se o cadastro foi realizado
+		'''
+		if not success:
 			QMessageBox.warning(self._window, 'Erro ao cadastrar', 'Esse CPF já está cadastrado!')
 			return
 
@@ -86,6 +108,36 @@ class RegisterWindow:
 		self._cpf_input.setText('')
 		self._password_input.setText('')
 
+	def cancel_requests(self):
+		'''Cancela as requisições em andamento da janela.
+		'''
+		self._requests.cancel()
+
+	def _set_loading(self, loading):
+		'''Indica o carregamento enquanto existirem requisições em andamento.
+
+		Parameters
+        ----------
+		loading : bool
+			Indica se existem requisições em andamento
+		'''
+		self._register_submit_btn.setEnabled(not loading)
+
+		if loading:
+			self._window.setCursor(Qt.WaitCursor)
+		else:
+			self._window.unsetCursor()
+
+	def _show_connection_error(self, error):
+		'''Exibe a falha de comunicação com o servidor.
+
+		Parameters
+        ----------
+		error : str
+			Mensagem de erro
+		'''
+		QMessageBox.warning(self._window, 'Erro de conexão', 'Não foi possível se comunicar com o servidor!')
+
 	def close(self):
 		'''Fecha a janela atual.
 		'''
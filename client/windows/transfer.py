@@ -1,7 +1,9 @@
-from PyQt5 import uic
+from PyQt5.QtCore import Qt
 from PyQt5.QtWidgets import QMessageBox
 
 from data import bank
+from ui_loader import load_ui
+from worker import RequestGroup
 
 
 class TransferWindow:
@@ -16,6 +18,8 @@ class TransferWindow:
     -------
 	load_initial_state()
 		Carrega o estado inicial da aplicação
+	cancel_requests()
+		Cancela as requisições em andamento da janela
 	close()
 		Fecha a janela atual
 	'''
@@ -27,7 +31,7 @@ class TransferWindow:
 		navigator : Navigator
 			Controlador da navegação da aplicação
 		'''
-		self._window = uic.loadUi('ui/transfer.ui')
+		self._window = load_ui('transfer')
 		self._navigator = navigator
 
 		self._amount_value_input = self._window.amount_value_input
@@ -36,6 +40,7 @@ class TransferWindow:
 		self._back_btn = self._window.back_btn
 		self._confirm_btn = self._window.confirm_btn
 
+		self._requests = RequestGroup(on_loading=self._set_loading)
 		self._load_events()
 	
 	@property
@@ -70,13 +75,52 @@ class TransferWindow:
 			QMessageBox.warning(self._window, 'Erro ao transferir', 'Informe o valor da transferência!')
 			return
 
+		self._requests.run(
+			TransferWindow._request_transfer,
+			amount,
+			destination_account_code,
+			on_result=self._on_transfer,
+			on_error=self._show_connection_error,
+		)
+
+	@staticmethod
+	def _request_transfer(amount, destination_account_code):
+		'''Realiza as requisições da ação de transferência. Executada fora da
+		thread da interface. O número da conta do usuário vem do estado local,
+		então normalmente apenas a transferência é enviada ao servidor.
+
+		Parameters
+        ----------
+		amount : str
+			Quantia a ser transferida
+		destination_account_code : str
+			Número da conta de destino
+
+		Returns
+        -------
+		str
+			Resultado da transferência: `'done'`, `'own_account'` ou `'failed'`.
+		'''
 		client = bank.get_client()
 
-		if destination_account_code == client['account']['code']:
+		if client and destination_account_code == client['account']['code']:
+			return 'own_account'
+
+		return 'done' if bank.transfer(amount, destination_account_code) else 'failed'
+
+	def _on_transfer(self, result):
+		'''Trata o resultado da ação de transferência.
+
+		Parameters
+        ----------
+		result : str
+			Resultado da transferência
+		'''
+		if result == 'own_account':
 			QMessageBox.warning(self._window, 'Erro ao transferir', 'Não é permitido transferir para sua conta!')
 			return
 
-		if not bank.transfer(amount, destination_account_code):
+		if result != 'done':
 			QMessageBox.warning(self._window, 'Erro ao transferir', 'Conta de destino inexistente, saldo insuficiente, ou o valor informado foi menor ou igual a zero!')
 			return
 
@@ -90,6 +134,36 @@ class TransferWindow:
 		self._amount_value_input.setText('')
 		self._destination_account_code_input.setText('')
 
+	def cancel_requests(self):
+		'''Cancela as requisições em andamento da janela.
+		'''
+		self._requests.cancel()
+
+	def _set_loading(self, loading):
+		'''Indica o carregamento enquanto existirem requisições em andamento.
+
+		Parameters
+        ----------
+		loading : bool
+			Indica se existem requisições em andamento
+		'''
+		self._confirm_btn.setEnabled(not loading)
+
+		if loading:
+			self._window.setCursor(Qt.WaitCursor)
+		else:
+			self._window.unsetCursor()
+
+	def _show_connection_error(self, error):
+		'''Exibe a falha de comunicação com o servidor.
+
+		Parameters
+        ----------
+		error : str
+			Mensagem de erro
+		'''
+		QMessageBox.warning(self._window, 'Erro de conexão', 'Não foi possível se comunicar com o servidor!')
+
 	def close(self):
 		'''Fecha a janela atual.
 		'''
@@ -1,7 +1,9 @@
-from PyQt5 import uic
+from PyQt5.QtCore import Qt
 from PyQt5.QtWidgets import QMessageBox
 
 from data import bank
+from ui_loader import load_ui
+from worker import RequestGroup
 
 
 class WithdrawWindow:
@@ -16,6 +18,8 @@ class WithdrawWindow:
     -------
 	load_initial_state()
 		Carrega o estado inicial da aplicação
+	cancel_requests()
+		Cancela as requisições em andamento da janela
 	close()
 		Fecha a janela atual
 	'''
@@ -27,7 +31,7 @@ class WithdrawWindow:
 		navigator : Navigator
 			Controlador da navegação da aplicação
 		'''
-		self._window = uic.loadUi('ui/withdraw.ui')
+		self._window = load_ui('withdraw')
 		self._navigator = navigator
 
 		self._amount_value_input = self._window.amount_value_input
@@ -35,6 +39,7 @@ class WithdrawWindow:
 		self._back_btn = self._window.back_btn
 		self._confirm_btn = self._window.confirm_btn
 
+		self._requests = RequestGroup(on_loading=self._set_loading)
 		self._load_events()
 	
 	@property
@@ -68,7 +73,22 @@ class WithdrawWindow:
 			QMessageBox.warning(self._window, 'Erro ao sacar', 'Informe o valor do saque!')
 			return
 
-		if not bank.withdraw(amount):
+		self._requests.run(
+			bank.withdraw,
+			amount,
+			on_result=self._on_withdraw,
+			on_error=self._show_connection_error,
+		)
+
+	def _on_withdraw(self, success):
+		'''Trata o resultado da ação de saque.
+
+		Parameters
+        ----------
+		success : bool
+			Indica se o saque foi realizado
+		'''
+		if not success:
 			QMessageBox.warning(self._window, 'Erro ao sacar', 'Saldo insuficiente, ou o valor informado foi menor ou igual a zero!')
 			return
 
@@ -81,6 +101,36 @@ class WithdrawWindow:
 		'''
 		self._amount_value_input.setText('')
 
+	def cancel_requests(self):
+		'''Cancela as requisições em andamento da janela.
+		'''
+		self._requests.cancel()
+
+	def _set_loading(self, loading):
+		'''Indica o carregamento enquanto existirem requisições em andamento.
+
+		Parameters
+        ----------
+		loading : bool
+			Indica se existem requisições em andamento
+		'''
+		self._confirm_btn.setEnabled(not loading)
+
+		if loading:
+			self._window.setCursor(Qt.WaitCursor)
+		else:
+			self._window.unsetCursor()
+
+	def _show_connection_error(self, error):
+		'''Exibe a falha de comunicação com o servidor.
+
+		Parameters
+        ----------
+		error : str
+			Mensagem de erro
+		'''
+		QMessageBox.warning(self._window, 'Erro de conexão', 'Não foi possível se comunicar com o servidor!')
+
 	def close(self):
 		'''Fecha a janela atual.
 		'''
@@ -0,0 +1,220 @@
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+
+class RequestSignals(QObject):
+	'''Sinais emitidos por um `RequestWorker`, entregues na thread da interface.
+
+	Attributes
+    ----------
+	finished : pyqtSignal
+		Emitido com o resultado da função executada
+	failed : pyqtSignal
+		Emitido com a mensagem de erro caso a função lance uma exceção
+	'''
+	finished = pyqtSignal(object)
+	failed = pyqtSignal(str)
+
+
+class NotificationSignals(QObject):
+	'''Sinais que entregam na thread da interface as mensagens recebidas em
+	outra thread, como as alterações da conta enviadas pelo servidor.
+
+	Attributes
+    ----------
+	received : pyqtSignal
+		Emitido com cada mensagem recebida
+	'''
+	received = pyqtSignal(object)
+
+
+class RequestWorker(QRunnable):
+	'''Tarefa que executa uma requisição ao servidor fora da thread da
+	interface, para que a janela continue respondendo enquanto aguarda.
+
+	Attributes
+    ----------
+	signals : RequestSignals
+		Sinais com o resultado da requisição
+	cancelled : bool
+		Indica se o resultado da requisição deve ser descartado
+
+    Methods
+    -------
+	run()
+		Executa a função e emite o resultado
+	cancel()
+		Descarta o resultado da requisição
+	'''
+	def __init__(self, function, *args, **kwargs):
+		'''
+		Parameters
+        ----------
+		function : function
+			Função que realiza a requisição
+		*args
+			Argumentos posicionais da função
+		**kwargs
+			Argumentos nomeados da função
+		'''
+		super(RequestWorker, self).__init__()
+		self.setAutoDelete(False)
+		self.signals = RequestSignals()
+		self._function = function
+		self._args = args
+		self._kwargs = kwargs
+		self._cancelled = False
+
+	@property
+	def cancelled(self):
+		'''Indica se o resultado da requisição deve ser descartado.
+
+		Returns
+        -------
+		bool
+			Booleano indicando se a requisição foi cancelada.
+		'''
+		return self._cancelled
+
+	def run(self):
+		'''Executa a função e emite o resultado, caso a requisição não tenha
+		sido cancelada.
+		'''
+		if self._cancelled:
+			return
+
+		try:
+			result = self._function(*self._args, **self._kwargs)
+		except Exception as error:
+			if not self._cancelled:
+				self.signals.failed.emit(str(error))
+			return
+
+		if not self._cancelled:
+			self.signals.finished.emit(result)
+
+	def cancel(self):
+		'''Descarta o resultado da requisição. Uma requisição já enviada ao
+		servidor não é interrompida, mas a sua resposta é ignorada.
+		'''
+		self._cancelled = True
+
+
+class RequestGroup:
+	'''Conjunto das requisições em andamento de uma janela, executadas pelo
+	`QThreadPool` global da aplicação.
+
+	Permite indicar o carregamento enquanto existirem requisições em
+	andamento e cancelar todas elas quando o usuário sai da janela.
+
+	Attributes
+    ----------
+	loading : bool
+		Indica se existem requisições em andamento
+
+    Methods
+    -------
+	run(function, *args, on_result=None, on_error=None)
+		Executa uma requisição fora da thread da interface
+	cancel()
+		Cancela todas as requisições em andamento
+	'''
+	def __init__(self, on_loading=None):
+		'''
+		Parameters
+        ----------
+		on_loading : Optional[function]
+			Função chamada com `True` quando a primeira requisição começa e com
+			`False` quando a última termina ou é cancelada.
+		'''
+		self._on_loading = on_loading
+		self._workers = set()
+
+	@property
+	def loading(self):
+		'''Indica se existem requisições em andamento.
+
+		Returns
+        -------
+		bool
+			Booleano indicando se existem requisições em andamento.
+		'''
+		return bool(self._workers)
+
+	def run(self, function, *args, on_result=None, on_error=None):
+		'''Executa uma requisição fora da thread da interface. As funções de
+		retorno são chamadas na thread da interface, apenas se a requisição
+		não for cancelada.
+
+		Parameters
+        ----------
+		function : function
+			Função que realiza a requisição
+		*args
+			Argumentos da função
+		on_result : Optional[function]
+			Função chamada com o resultado da requisição
+		on_error : Optional[function]
+			Função chamada com a mensagem de erro da requisição
+
+		Returns
+        -------
+		RequestWorker
+			Tarefa que executa a requisição.
+		'''
+		worker = RequestWorker(function, *args)
+		worker.signals.finished.connect(lambda result: self._finish(worker, on_result, result))
+		worker.signals.failed.connect(lambda error: self._finish(worker, on_error, error))
+
+		self._workers.add(worker)
+
+		if len(self._workers) == 1:
+			self._set_loading(True)
+
+		QThreadPool.globalInstance().start(worker)
+		return worker
+
+	def cancel(self):
+		'''Cancela todas as requisições em andamento.
+		'''
+		if not self._workers:
+			return
+
+		for worker in self._workers:
+			worker.cancel()
+
+		self._workers.clear()
+		self._set_loading(False)
+
+	def _finish(self, worker, callback, value):
+		'''Conclui uma requisição e repassa o resultado.
+
+		Parameters
+        ----------
+		worker : RequestWorker
+			Tarefa concluída
+		callback : Optional[function]
+			Função que recebe o resultado
+		value : Any
+			Resultado ou mensagem de erro da requisição
+		'''
+		if worker not in self._workers or worker.cancelled:
+			return
+
+		self._workers.discard(worker)
+
+		if not self._workers:
+			self._set_loading(False)
+
+		if callback:
+			callback(value)
+
+	def _set_loading(self, loading):
+		'''Repassa a mudança do estado de carregamento.
+
+		Parameters
+        ----------
+		loading : bool
+			Indica se existem requisições em andamento
+		'''
+		if self._on_loading:
+			self._on_loading(loading)
@@ -1,6 +1,29 @@
+from datetime import datetime
+
 from lib.server import Server
 from lib.json import Json
-from data import bank, session_manager
+from lib.rate_limit import RateLimiter
+from lib.lru import LRUCache
+from lib.stream import ChunkedWriter
+from lib.period import parse_period
+from data import bank, notifier, committer, session_manager, session_sweep, partition_maintenance
+from data.db import bank_db
+from data.models import Account, History, DailyAccountStats
+from data.statement import Statement
+from settings import (
+    SERVER_HOST, SERVER_PORT, SERVER_IDLE_TIMEOUT, SERVER_READ_TIMEOUT, SERVER_MAX_CONNECTIONS,
+    SERVER_DRAIN_TIMEOUT, SERVER_MAX_REQUEST_SIZE, SERVER_WORKERS, SERVER_MAX_IN_FLIGHT,
+    RATE_LIMIT_IP, RATE_LIMIT_IP_BURST, RATE_LIMIT_TOKEN, RATE_LIMIT_TOKEN_BURST,
+    RATE_LIMIT_EXPENSIVE, RATE_LIMIT_EXPENSIVE_BURST,
+    BULK_TRANSFER_MAX_LINES, IDEMPOTENCY_CACHE_SIZE, HISTORY_PAGE_MAX_SIZE,
+)
+
+
+ip_limiter = RateLimiter(RATE_LIMIT_IP, RATE_LIMIT_IP_BURST)
+token_limiter = RateLimiter(RATE_LIMIT_TOKEN, RATE_LIMIT_TOKEN_BURST)
+expensive_limiter = RateLimiter(RATE_LIMIT_EXPENSIVE, RATE_LIMIT_EXPENSIVE_BURST)
+idempotency_cache = LRUCache(IDEMPOTENCY_CACHE_SIZE)
+write_positions = LRUCache()
 
 
 class AppController:
@@ -11,7 +34,7 @@ class AppController:
     close()
 		Fecha a conexão com o banco de dados
 	'''
-    def __init__(self, request, response):
+    def __init__(self, request, response, address=None):
         '''
         Parameters
         ----------
@@ -19,22 +42,29 @@ class AppController:
 			Dados da requisição do cliente
         response : function
             Função que envia a resposta da requisição para o cliente
+        address : Optional[tuple]
+            Tupla contendo o endereço e a porta do socket cliente
         '''
         self._request = request
         self._response = response
+        self._address = address
+        self._captured = None
         self._data = Json.parse_from_json(self._request)
         self._router = {
             'register_client': {
                 'is_private': False,
                 'handler': self._register_client,
+                'limiter': expensive_limiter,
             },
             'client_is_logged': {
                 'is_private': False,
                 'handler': self._client_is_logged,
+                'read_only': True,
             },
             'login_client': {
                 'is_private': False,
                 'handler': self._login_client,
+                'limiter': expensive_limiter,
             },
             'logout_client': {
                 'is_private': True,
@@ -43,22 +73,57 @@ class AppController:
             'get_client': {
                 'is_private': True,
                 'handler': self._get_client,
+                'read_only': True,
             },
             'get_client_history': {
                 'is_private': True,
                 'handler': self._get_client_history,
+                'limiter': expensive_limiter,
+                'read_only': True,
+            },
+            'get_client_history_page': {
+                'is_private': True,
+                'handler': self._get_client_history_page,
+                'read_only': True,
+            },
+            'get_account_summary': {
+                'is_private': True,
+                'handler': self._get_account_summary,
+                'read_only': True,
+            },
+            'subscribe': {
+                'is_private': True,
+                'handler': self._subscribe,
+            },
+            'export_statement': {
+                'is_private': True,
+                'handler': self._export_statement,
+                'limiter': expensive_limiter,
+            },
+            'bulk_transfer': {
+                'is_private': True,
+                'handler': self._bulk_transfer,
+                'limiter': expensive_limiter,
+                'idempotent': True,
+                'writes': True,
             },
             'withdraw': {
                 'is_private': True,
                 'handler': self._withdraw,
+                'idempotent': True,
+                'writes': True,
             },
             'deposit': {
                 'is_private': True,
                 'handler': self._deposit,
+                'idempotent': True,
+                'writes': True,
             },
             'transfer': {
                 'is_private': True,
                 'handler': self._transfer,
+                'idempotent': True,
+                'writes': True,
             },
         }
 
@@ -75,24 +140,163 @@ class AppController:
             return self.send({'error': True, 'message': 'Operação inválida.'})
 
         action = self._router[self._data['action'].lower()]
+        token = self._data['token'] if 'token' in self._data else None
+        ip = self._address[0] if self._address else None
 
-        if action['is_private']:
-            token = self._data['token'] if 'token' in self._data else None
+        retry_after = self._throttle(action, token, ip)
+
+        if retry_after:
+            return self.send({
+                'error': True,
+                'message': 'Muitas requisições. Tente novamente em instantes.',
+                'retry_after': round(retry_after, 3),
+            })
 
+        if action['is_private']:
             if not token or not session_manager.check(token):
-                return self.send({'error': True, 'message': 'Usuário não autenticado.'})
+                return self.send({'error': True, 'message': 'Usuário não autenticado.', 'unauthenticated': True})
+
+        if action.get('read_only') and bank_db.has_replicas:
+            with bank_db.read_replica(write_positions.get(token)):
+                return action['handler']()
+
+        try:
+            if action.get('idempotent') and 'idempotency_key' in self._data:
+                return self._run_once(self._data['action'].lower(), action)
+            return action['handler']()
+        finally:
+            if action.get('writes'):
+                self._track_write(token)
+
+    def _track_write(self, token):
+        '''Registra a posição do WAL após uma escrita da sessão, para que as
+        próximas leituras da mesma sessão só sejam atendidas por réplicas que
+        já aplicaram essa escrita.
+
+        Parameters
+        ----------
+        token : Optional[str]
+            Token da sessão que realizou a escrita
+        '''
+        if token and bank_db.has_replicas:
+            lsn = bank_db.current_lsn()
+
+            if lsn:
+                write_positions.set(token, lsn)
+
+    def _run_once(self, name, action):
+        '''Executa uma ação no máximo uma vez por chave de idempotência
+        (`idempotency_key`), permitindo que o cliente repita com segurança uma
+        requisição cuja resposta não recebeu.
+
+        As respostas de chaves já usadas são obtidas primeiro do cache em
+        memória e depois do banco de dados, e são reenviadas com o campo
+        `replayed` sem executar a ação novamente.
+
+        Parameters
+        ----------
+        name : str
+            Nome da ação solicitada
+        action : dict
+            Rota da ação solicitada
+        '''
+        key = self._data['idempotency_key']
+
+        if not isinstance(key, str) or not 0 < len(key) <= 64:
+            return self.send({'error': True, 'message': 'Chave de idempotência inválida.'})
+
+        client_id = session_manager.get_id_by_token(self._data['token'])
+        cached = idempotency_cache.get((client_id, key))
+
+        if cached:
+            response, replayed = (cached[1], True) if cached[0] == name else (None, True)
+        else:
+            response, replayed = bank.run_once(client_id, key, name, lambda: self._capture(action['handler']))
+
+        if response is None:
+            return self.send({'error': True, 'message': 'Chave de idempotência já utilizada em outra operação.'})
+
+        if not response.get('error'):
+            idempotency_cache.set((client_id, key), (name, response))
+
+        return self.send({**response, 'replayed': True} if replayed else response)
+
+    def _capture(self, handler):
+        '''Executa um manipulador capturando a sua resposta em vez de enviá-la
+        ao cliente.
+
+        Parameters
+        ----------
+        handler : function
+            Manipulador da ação
+
+        Returns
+        -------
+        dict
+            Resposta do manipulador.
+        '''
+        self._captured = []
+
+        try:
+            handler()
+            return self._captured[0] if self._captured else {'error': True, 'message': 'Erro no servidor.'}
+        finally:
+            self._captured = None
 
-        return action['handler']()
+    def _throttle(self, action, token, ip):
+        '''Aplica os limites de taxa por endereço IP, por token de sessão e,
+        para as ações mais custosas, o limite específico da ação.
+
+        Parameters
+        ----------
+        action : dict
+            Rota da ação solicitada
+        token : Optional[str]
+            Token de sessão enviado na requisição
+        ip : Optional[str]
+            Endereço IP de origem da requisição
+
+        Returns
+        -------
+        float
+            Zero caso a requisição seja permitida, ou o tempo (em segundos) que
+            o cliente deve aguardar antes de tentar novamente.
+        '''
+        if ip:
+            retry_after = ip_limiter.hit(ip)
+
+            if retry_after:
+                return retry_after
+
+        if token and session_manager.check(token):
+            retry_after = token_limiter.hit(token)
+
+            if retry_after:
+                return retry_after
+
+        if 'limiter' in action:
+            key = (self._data['action'].lower(), token if action['is_private'] else ip)
+            return action['limiter'].hit(key)
+        return 0.0
 
     def send(self, content):
         '''Método que simplifica o envio de uma resposta no formato JSON para o
         cliente.
 
+        Caso a requisição tenha um identificador (`request_id`), ele é
+        devolvido na resposta, permitindo ao cliente associar as respostas às
+        requisições quando várias estão em andamento na mesma conexão.
+
         Parameters
         ----------
         content : dict
             Conteúdo da resposta no formato de dicionário do Python
         '''
+        if self._captured is not None:
+            return self._captured.append(content)
+
+        if isinstance(self._data, dict) and 'request_id' in self._data:
+            content = {**content, 'request_id': self._data['request_id']}
         return self._response(Json.parse_to_json(content) or '{"error": true, "message": "Erro no servidor."}')
 
     def _register_client(self):
@@ -111,7 +315,14 @@ class AppController:
             return self.send({'error': True, 'message': 'Não foi possível realizar o cadastro.'})
 
         token = session_manager.add(client.id)
-        return self.send({'error': False, 'message': 'Usuário cadastrado com sucesso.', 'token': token})
+        self._track_write(token)
+
+        return self.send({
+            'error': False,
+            'message': 'Usuário cadastrado com sucesso.',
+            'token': token,
+            'expires_in': session_manager.ttl,
+        })
 
     def _client_is_logged(self):
         '''Manipulador da ação para verificar se o usuário tem um token de
@@ -135,7 +346,12 @@ class AppController:
         if not token:
             return self.send({'error': True, 'message': 'Credenciais inválidas.'})
 
-        return self.send({'error': False, 'message': 'Acesso liberado com sucesso.', 'token': token})
+        return self.send({
+            'error': False,
+            'message': 'Acesso liberado com sucesso.',
+            'token': token,
+            'expires_in': session_manager.ttl,
+        })
 
     def _logout_client(self):
         '''Manipulador da ação de destruir a sessão do usuário na aplicação.
@@ -165,32 +381,337 @@ class AppController:
             'account': {
                 'code': account.code,
                 'balance': account.balance,
+                'version': account.version,
             },
         })
 
     def _get_client_history(self):
         '''Manipulador da ação de obter o histórico de transações referentes ao
         usuário que está autenticado.
+
+        A resposta traz a versão da conta (`version`). Caso o usuário informe a
+        versão que já conhece e ela não tenha mudado, a resposta traz apenas
+        `not_modified`. Caso informe a sequência do último registro que já
+        conhece (`since`), apenas os registros confirmados depois dele são
+        enviados.
         '''
         token = self._data['token']
         client_id = session_manager.get_id_by_token(token)
-        client = bank.get_client(client_id)
 
-        if not client:
+        try:
+            start, end = self._parse_period()
+        except (TypeError, ValueError):
+            return self.send({'error': True, 'message': 'Período inválido.'})
+
+        try:
+            version = self._data.get('version')
+            version = int(version) if version is not None else None
+            since = self._data.get('since')
+            since = int(since) if since is not None else None
+        except (TypeError, ValueError):
+            return self.send({'error': True, 'message': 'Versão do histórico inválida.'})
+
+        result = bank.sync_client_history(client_id, version, since, start, end)
+
+        if not result:
             return self.send({'error': True, 'message': 'Usuário não encontrado.'})
 
-        history = bank.get_client_history(client.id)
+        version, history = result
+
+        if history is None:
+            return self.send({'error': False, 'not_modified': True, 'version': version})
 
         return self.send({
             'error': False,
-            'history': list(map(lambda log: {
-                'id': log.id,
-                'type': log.type,
-                'timestamp': str(log.timestamp),
-                'message': log.message,
-            }, history))
+            'version': version,
+            'delta': since is not None,
+            'history': list(map(self._serialize_history, history))
         })
 
+    def _get_account_summary(self):
+        '''Manipulador da ação de obter os totais das transações do usuário que
+        está autenticado por tipo em um período (por exemplo, quanto foi
+        depositado no mês), calculados a partir dos totais diários da conta.
+
+        Os totais podem ser separados por dia ou mês com o campo `group_by`
+        (`'day'` ou `'month'`). O período é considerado em dias inteiros.
+        '''
+        token = self._data['token']
+        client_id = session_manager.get_id_by_token(token)
+        group_by = self._data.get('group_by')
+
+        try:
+            start, end = self._parse_period()
+        except (TypeError, ValueError):
+            return self.send({'error': True, 'message': 'Período inválido.'})
+
+        if group_by is not None and group_by not in DailyAccountStats.GROUPS:
+            return self.send({'error': True, 'message': 'Agrupamento inválido.'})
+
+        summary = bank.get_account_summary(client_id, start, end, group_by)
+
+        if summary is None:
+            return self.send({'error': True, 'message': 'Não foi possível obter o resumo.'})
+
+        return self.send({
+            'error': False,
+            'summary': [
+                {
+                    'period': period.isoformat() if period else None,
+                    'type': kind,
+                    'count': int(count),
+                    'total': round(total, 2),
+                }
+                for period, kind, count, total in summary
+            ],
+        })
+
+    def _get_client_history_page(self):
+        '''Manipulador da ação de obter uma página do histórico de transações
+        referentes ao usuário que está autenticado, dos registros mais recentes
+        para os mais antigos.
+
+        A página tem até `limit` registros. A resposta traz no campo `next` a
+        posição a ser enviada em `before` para obter a próxima página, ou
+        `None` quando não existirem mais registros.
+
+        A primeira página traz também a versão da conta (`version`). Caso o
+        usuário informe a versão que já conhece e ela não tenha mudado, a
+        resposta traz apenas `not_modified`.
+        '''
+        token = self._data['token']
+        client_id = session_manager.get_id_by_token(token)
+
+        try:
+            start, end = self._parse_period()
+        except (TypeError, ValueError):
+            return self.send({'error': True, 'message': 'Período inválido.'})
+
+        try:
+            limit = int(self._data['limit'])
+            before = AppController._parse_cursor(self._data.get('before'))
+            version = self._data.get('version')
+            version = int(version) if version is not None else None
+        except (KeyError, IndexError, TypeError, ValueError):
+            return self.send({'error': True, 'message': 'Paginação inválida.'})
+
+        if not 0 < limit <= HISTORY_PAGE_MAX_SIZE:
+            return self.send({'error': True, 'message': f'Informe um limite entre 1 e {HISTORY_PAGE_MAX_SIZE}.'})
+
+        response = {'error': False}
+
+        if before is None:
+            account = bank.get_client_account(client_id)
+            response['version'] = account.version if account else None
+
+            if version is not None and version == response['version']:
+                return self.send({**response, 'not_modified': True})
+
+        history = bank.get_client_history_page(client_id, limit, before, start, end)
+        last = history[-1] if len(history) == limit else None
+
+        return self.send({
+            **response,
+            'history': list(map(self._serialize_history, history)),
+            'next': [last.timestamp.isoformat(), last.id] if last else None,
+        })
+
+    @staticmethod
+    def _parse_cursor(cursor):
+        '''Converte a posição de um registro do histórico enviada pelo usuário
+        (data e hora no formato ISO 8601 e ID do registro).
+
+        Parameters
+        ----------
+        cursor : Optional[list]
+            Posição enviada na requisição
+
+        Returns
+        -------
+        tuple[datetime, int]
+            Data e hora e ID do registro.
+        None
+            Caso a posição não seja informada.
+        '''
+        if cursor is None:
+            return None
+        return datetime.fromisoformat(cursor[0]), int(cursor[1])
+
+    def _subscribe(self):
+        '''Manipulador da ação de acompanhar as alterações da conta do usuário
+        que está autenticado.
+
+        Após a resposta, a conexão recebe uma mensagem com o campo `event`
+        igual a `'account'` sempre que uma operação que movimenta a conta é
+        confirmada, com o saldo e a versão atualizados (`account`) e os novos
+        registros do histórico (`history`). As mensagens podem chegar fora da
+        ordem de confirmação: a versão e a sequência dos registros indicam a
+        ordem. A inscrição termina quando a conexão é fechada ou a sessão
+        expira.
+        '''
+        token = self._data['token']
+        client_id = session_manager.get_id_by_token(token)
+        account = bank.get_client_account(client_id)
+
+        if not account:
+            return self.send({'error': True, 'message': 'Conta não encontrada.'})
+
+        response = self._response
+        code = account.code
+
+        def push(change):
+            if not session_manager.check(token):
+                return False
+
+            balance, version, logs = change
+            response(Json.parse_to_json({
+                'event': 'account',
+                'account': {'code': code, 'balance': balance, 'version': version},
+                'history': list(map(AppController._serialize_history, logs)),
+            }))
+
+        bank.subscribe(account.id, push)
+        account = bank.get_client_account(client_id)
+
+        return self.send({
+            'error': False,
+            'message': 'Inscrição realizada.',
+            'account': {'code': code, 'balance': account.balance, 'version': account.version},
+        })
+
+    def _bulk_transfer(self):
+        '''Manipulador da ação de realizar várias transferências a partir da
+        conta do usuário que está autenticado (por exemplo, uma folha de
+        pagamento) em uma única operação.
+
+        As transferências são informadas em `transfers`, uma lista de objetos
+        com os campos `destination_acc_code` e `amount`.
+        '''
+        token = self._data['token']
+        transfers = self._data.get('transfers')
+
+        if not isinstance(transfers, list) or not 0 < len(transfers) <= BULK_TRANSFER_MAX_LINES:
+            return self.send({
+                'error': True,
+                'message': f'Informe entre 1 e {BULK_TRANSFER_MAX_LINES} transferências.',
+            })
+
+        try:
+            lines = [(line['destination_acc_code'], line['amount']) for line in transfers]
+        except (KeyError, TypeError):
+            return self.send({'error': True, 'message': 'Transferências inválidas.'})
+
+        client_id = session_manager.get_id_by_token(token)
+        origin_account = bank.get_client_account(client_id)
+
+        if not origin_account:
+            return self.send({'error': True, 'message': 'Conta não encontrada.'})
+
+        account = bank.bulk_transfer(origin_account.id, lines)
+
+        if not account:
+            return self.send({'error': True, 'message': 'Não foi possível realizar as transferências.'})
+        return self.send({
+            'error': False,
+            'message': 'Transferências realizadas.',
+            'count': len(lines),
+            'balance': account.balance,
+            'version': account.version,
+        })
+
+    def _export_statement(self):
+        '''Manipulador da ação de exportar o extrato da conta do usuário que
+        está autenticado, em CSV ou OFX, opcionalmente limitado a um período.
+
+        Após uma resposta inicial em JSON (terminada por `\n`), o extrato é
+        transmitido em blocos (`<tamanho em hexadecimal>\r\n<dados>\r\n`)
+        até um bloco de tamanho zero, seguido de uma linha JSON indicando se a
+        exportação foi concluída.
+        '''
+        if 'request_id' in self._data:
+            return self.send({'error': True, 'message': 'Exportação indisponível em requisições identificadas.'})
+
+        token = self._data['token']
+        client_id = session_manager.get_id_by_token(token)
+        account = bank.get_client_account(client_id)
+
+        if not account:
+            return self.send({'error': True, 'message': 'Conta não encontrada.'})
+
+        format = str(self._data.get('format', 'csv')).lower()
+
+        if format not in Statement.FORMATS:
+            return self.send({'error': True, 'message': 'Formato de extrato inválido.'})
+
+        try:
+            start, end = self._parse_period()
+        except (TypeError, ValueError):
+            return self.send({'error': True, 'message': 'Período inválido.'})
+
+        self._response(Json.parse_to_json({'error': False, 'stream': True, 'format': format}) + '\n')
+        writer = ChunkedWriter(self._response)
+
+        try:
+            bank.export_statement(writer, account.id, start, end, format)
+            trailer = {'error': False, 'message': 'Extrato exportado.'}
+        except Exception as error:
+            print(error)
+            trailer = {'error': True, 'message': 'Não foi possível exportar o extrato.'}
+
+        writer.close()
+        return self._response(Json.parse_to_json(trailer) + '\n')
+
+    def _parse_period(self):
+        '''Obtém o período informado na requisição pelos campos `from` e `to`,
+        no formato ISO 8601.
+
+        Returns
+        -------
+        tuple[Optional[datetime], Optional[datetime]]
+            O início (inclusivo) e o fim (exclusivo) do período.
+        '''
+        return parse_period(self._data.get('from'), self._data.get('to'))
+
+    @staticmethod
+    def _serialize_history(log):
+        '''Converte um registro de transação para o formato de resposta,
+        montando a descrição legível a partir dos dados tipados.
+
+        Parameters
+        ----------
+        log : History
+            Registro de transação
+
+        Returns
+        -------
+        dict
+            Registro de transação no formato de resposta.
+        '''
+        counterparty = log.counterparty_account_id
+        counterparty_code = Account.format_code(counterparty) if counterparty else None
+
+        if log.amount is None:
+            message = log.message
+        elif log.type == History.OPENING:
+            message = f'Saldo inicial: {Account.format_money(log.amount)}'
+        elif log.type == History.TRANSFER_SENT:
+            message = f'Quantia: {Account.format_money(log.amount)}, N° conta destino: {counterparty_code}'
+        elif log.type == History.TRANSFER_RECEIVED:
+            message = f'Quantia: {Account.format_money(log.amount)}, N° conta origem: {counterparty_code}'
+        else:
+            message = f'Quantia: {Account.format_money(log.amount)}'
+
+        return {
+            'id': log.id,
+            'type': log.type,
+            'timestamp': str(log.timestamp),
+            'amount': log.amount,
+            'counterparty_account_code': counterparty_code,
+            'balance_after': log.balance_after,
+            'sequence': log.sequence,
+            'message': message,
+        }
+
     def _withdraw(self):
         '''Manipulador da ação de realizar saque na conta do usuário que está
         autenticado.
@@ -204,9 +725,11 @@ class AppController:
         if not account:
             return self.send({'error': True, 'message': 'Conta não encontrada.'})
 
-        if not bank.withdraw(amount, account.id):
+        account = bank.withdraw(amount, account.id)
+
+        if not account:
             return self.send({'error': True, 'message': 'Não foi possível sacar a quantia.'})
-        return self.send({'error': False, 'message': 'Saque realizado.'})
+        return self.send({'error': False, 'message': 'Saque realizado.', 'balance': account.balance, 'version': account.version})
 
     def _deposit(self):
         '''Manipulador da ação de realizar depósito na conta do usuário que está
@@ -221,9 +744,11 @@ class AppController:
         if not account:
             return self.send({'error': True, 'message': 'Conta não encontrada.'})
 
-        if not bank.deposit(amount, account.id):
+        account = bank.deposit(amount, account.id)
+
+        if not account:
             return self.send({'error': True, 'message': 'Não foi possível depositar a quantia.'})
-        return self.send({'error': False, 'message': 'Depósito realizado.'})
+        return self.send({'error': False, 'message': 'Depósito realizado.', 'balance': account.balance, 'version': account.version})
 
     def _transfer(self):
         '''Manipulador da ação de realizar transferência a partir conta do
@@ -236,9 +761,30 @@ class AppController:
         client_id = session_manager.get_id_by_token(token)
         origin_account = bank.get_client_account(client_id)
 
-        if not bank.transfer(amount, origin_account.id, destination_acc_code):
-            return self.send({'error': True, 'message': 'Não foi possível transferir a quantia.'})
-        return self.send({'error': False, 'message': 'Transferência realizada.'})
-
+        account = bank.transfer(amount, origin_account.id, destination_acc_code)
 
-app = Server(AppController)
+        if not account:
+            return self.send({'error': True, 'message': 'Não foi possível transferir a quantia.'})
+        return self.send({'error': False, 'message': 'Transferência realizada.', 'balance': account.balance, 'version': account.version})
+
+
+app = Server(
+    AppController,
+    host=SERVER_HOST,
+    port=SERVER_PORT,
+    idle_timeout=SERVER_IDLE_TIMEOUT,
+    read_timeout=SERVER_READ_TIMEOUT,
+    max_connections=SERVER_MAX_CONNECTIONS,
+    drain_timeout=SERVER_DRAIN_TIMEOUT,
+    max_request_size=SERVER_MAX_REQUEST_SIZE,
+    workers=SERVER_WORKERS,
+    max_in_flight=SERVER_MAX_IN_FLIGHT,
+)
+
+if committer:
+    app.add_shutdown_hook(committer.close)
+
+app.add_shutdown_hook(partition_maintenance.close)
+app.add_shutdown_hook(session_sweep.close)
+app.add_shutdown_hook(notifier.close)
+app.add_shutdown_hook(bank_db.close)
@@ -1,21 +1,73 @@
+from concurrent.futures import ThreadPoolExecutor
+import subprocess
 import random
 import socket
 import json
+import uuid
+import time
+import sys
+import os
 
 HOST = 'localhost'
 PORT = 8001
 
 server_address = (HOST, PORT)
+failures = []
+
+# Tempo para o limite de requisições por token ser recarregado antes de uma
+# rajada de requisições simultâneas.
+RATE_LIMIT_WAIT = 2
+
+def connect():
+	client_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+	client_socket.connect(server_address)
+	client_socket.settimeout(10)
+	return client_socket
+
+def read_json(client_socket, buffer=b''):
+	decoder = json.JSONDecoder()
+
+	while True:
+		text = buffer.decode(errors='ignore').lstrip()
+
+		try:
+			data, end = decoder.raw_decode(text)
+			return data, text[end:].encode()
+		except ValueError:
+			chunk = client_socket.recv(4096)
+
+			if not chunk:
+				raise ConnectionError('Conexão encerrada pelo servidor.')
+			buffer += chunk
+
+def read_chunks(client_socket, buffer=b''):
+	content = b''
+
+	while True:
+		while b'\r\n' not in buffer:
+			buffer += client_socket.recv(4096)
+
+		size, buffer = buffer.split(b'\r\n', 1)
+		size = int(size, 16)
+
+		if size == 0:
+			return content, buffer
+
+		while len(buffer) < size + 2:
+			buffer += client_socket.recv(4096)
+
+		content += buffer[:size]
+		buffer = buffer[size + 2:]
 
 def test(data={}):
-	try:		
+	try:
 		client_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
 		client_socket.connect(server_address)
+		client_socket.settimeout(10)
 
 		client_socket.send(json.dumps(data).encode())
 
-		raw_data = client_socket.recv(1024).decode()
-		data = json.loads(raw_data)
+		data, _ = read_json(client_socket)
 		print(data)
 		print()
 		return data
@@ -25,14 +77,175 @@ def test(data={}):
 	finally:
 		client_socket.close()
 
+def test_concurrently(requests):
+	time.sleep(RATE_LIMIT_WAIT)
 
-if __name__ == '__main__':
+	with ThreadPoolExecutor(max_workers=8) as executor:
+		return list(executor.map(test, requests))
+
+def check(condition, message):
+	print(f'=> {"OK" if condition else "FALHOU"}: {message}')
+	print()
+
+	if not condition:
+		failures.append(message)
+
+def register():
 	cpf = random.randint(10000000000, 99999999999)
 	data = test({'action': 'register_client', 'name': 'Pedro', 'cpf': cpf, 'password': '123'})
+	return data['token'] if data and 'token' in data else None
+
+def get_account(token):
+	data = test({'action': 'get_client', 'token': token})
+	return data['account'] if data and not data['error'] else None
+
+def test_idempotent_retry(token):
+	request = {'action': 'deposit', 'token': token, 'amount': 50, 'idempotency_key': uuid.uuid4().hex}
+	before = get_account(token)
+	first = test(request)
+	retry = test(request)
+	after = get_account(token)
+
+	check(first and not first['error'] and not first.get('replayed'), 'depósito com chave de idempotência')
+	check(retry and retry.get('replayed') and retry['balance'] == first['balance'], 'repetição devolve a resposta registrada')
+	check(after['balance'] == before['balance'] + 50, 'repetição não deposita novamente')
+
+def test_concurrent_retry(token):
+	request = {'action': 'deposit', 'token': token, 'amount': 50, 'idempotency_key': uuid.uuid4().hex}
+	before = get_account(token)
+	responses = test_concurrently([request] * 5)
+	after = get_account(token)
+	executed = [data for data in responses if data and not data['error'] and not data.get('replayed')]
+
+	check(len(executed) == 1, 'tentativas simultâneas executam o depósito uma única vez')
+	check(after['balance'] == before['balance'] + 50, 'saldo após as tentativas simultâneas')
+
+def test_bulk_transfer(token, destination_code):
+	before = get_account(token)
+	data = test({
+		'action': 'bulk_transfer',
+		'token': token,
+		'transfers': [
+			{'destination_acc_code': destination_code, 'amount': 10},
+			{'destination_acc_code': destination_code, 'amount': 15},
+		],
+	})
+
+	check(data and not data['error'] and data['count'] == 2, 'transferências em lote')
+	check(data and data['balance'] == before['balance'] - 25, 'saldo após as transferências em lote')
+
+def test_account_summary(token):
+	data = test({'action': 'get_account_summary', 'token': token, 'group_by': 'day'})
+	check(data and not data['error'] and len(data['summary']) > 0, 'resumo da conta por dia')
+
+def test_export_statement(token):
+	client_socket = connect()
+
+	try:
+		client_socket.send(json.dumps({'action': 'export_statement', 'token': token, 'format': 'csv'}).encode())
+		header, buffer = read_json(client_socket)
+		content, buffer = read_chunks(client_socket, buffer)
+		trailer, _ = read_json(client_socket, buffer)
+	finally:
+		client_socket.close()
+
+	print(content.decode())
+	check(header.get('stream') and not trailer['error'], 'exportação do extrato')
+	check(len(content.decode().strip().splitlines()) > 1, 'extrato com registros')
+
+def test_subscribe(token, destination_token, destination_code):
+	client_socket = connect()
+
+	try:
+		client_socket.send(json.dumps({'action': 'subscribe', 'token': destination_token}).encode())
+		data, buffer = read_json(client_socket)
+		check(not data['error'], 'inscrição nas alterações da conta')
+
+		test({'action': 'transfer', 'token': token, 'amount': 5, 'destination_acc_code': destination_code})
+		event, _ = read_json(client_socket, buffer)
+	finally:
+		client_socket.close()
+
+	check(event.get('event') == 'account', 'evento após a transferência')
+	check(event['account']['balance'] == data['account']['balance'] + 5, 'saldo do evento')
+
+def test_concurrent_operations(token):
+	before = get_account(token)
+	deposit = {'action': 'deposit', 'token': token, 'amount': 3}
+	overdraft = {'action': 'withdraw', 'token': token, 'amount': before['balance'] + 1000}
+	responses = test_concurrently([deposit, overdraft] * 8)
+	after = get_account(token)
+
+	check(all(data and not data['error'] for data in responses[0::2]), 'depósitos simultâneos concluídos')
+	check(all(data and data['error'] for data in responses[1::2]), 'saques acima do saldo recusados')
+	check(after['balance'] == before['balance'] + 24, 'saques recusados não desfazem os depósitos simultâneos')
+
+def test_hot_account(token, destination_token, destination_code):
+	result = subprocess.run(
+		[sys.executable, 'cli.py', 'hot-account', '--account', destination_code, '--slots', '4'],
+		cwd=os.path.dirname(os.path.abspath(__file__)),
+	)
+	check(result.returncode == 0, 'conta dividida em saldos parciais')
+
+	before = get_account(destination_token)
+	transfer = {'action': 'transfer', 'token': token, 'amount': 2, 'destination_acc_code': destination_code}
+	withdraw = {'action': 'withdraw', 'token': destination_token, 'amount': 1}
+	responses = test_concurrently([transfer] * 15 + [withdraw] * 10)
+	credited = sum(2 for data in responses[:15] if data and not data['error'])
+	debited = sum(1 for data in responses[15:] if data and not data['error'])
+	after = get_account(destination_token)
+
+	check(credited == 30 and debited == 10, 'créditos e débitos simultâneos na conta dividida')
+	check(after['balance'] == before['balance'] + credited - debited, 'saldo da conta dividida após as operações')
+
+	overdraft = test({'action': 'withdraw', 'token': destination_token, 'amount': after['balance'] + 1})
+	check(overdraft and overdraft['error'], 'saque acima do saldo da conta dividida recusado')
+	check(get_account(destination_token)['balance'] == after['balance'], 'saldo mantido após o saque recusado')
+
+def test_delta_sync(token, destination_token, destination_code):
+	full = test({'action': 'get_client_history', 'token': destination_token})
+	last = full['history'][-1]['sequence']
+
+	transfer = {'action': 'transfer', 'token': token, 'amount': 1, 'destination_acc_code': destination_code}
+	test_concurrently([transfer] * 10)
+
+	delta = test({'action': 'get_client_history', 'token': destination_token, 'version': full['version'], 'since': last})
+	history = delta['history'] if delta and not delta['error'] else []
+	sequences = [row['sequence'] for row in history]
+	balance = get_account(destination_token)['balance']
+
+	check(delta and delta['delta'] and sequences == list(range(last + 1, last + 11)), 'sincronização após créditos simultâneos')
+	check(history and delta['version'] == sequences[-1], 'versão igual à sequência do último registro')
+	check(history and history[-1]['balance_after'] == balance, 'saldo do último registro igual ao saldo da conta')
+
+def test_verify_ledger():
+	result = subprocess.run([sys.executable, 'cli.py', 'verify-ledger'], cwd=os.path.dirname(os.path.abspath(__file__)))
+	check(result.returncode == 0, 'livro razão consistente após as transferências')
+
+
+if __name__ == '__main__':
+	token = register()
+	destination_token = register()
+
+	if token and destination_token:
+		destination_code = get_account(destination_token)['code']
+
+		test({'action': 'deposit', 'token': token, 'amount': 1000})
+		test({'action': 'withdraw', 'token': token, 'amount': 500})
+		test({'action': 'transfer', 'token': token, 'amount': 200, 'destination_acc_code': destination_code})
+		test({'action': 'get_client_history', 'token': token})
+
+		test_idempotent_retry(token)
+		test_concurrent_retry(token)
+		test_bulk_transfer(token, destination_code)
+		test_account_summary(token)
+		test_export_statement(token)
+		test_subscribe(token, destination_token, destination_code)
+		test_concurrent_operations(token)
+		test_hot_account(token, destination_token, destination_code)
+		test_delta_sync(token, destination_token, destination_code)
+		test_verify_ledger()
+	else:
+		failures.append('cadastro dos clientes')
 
-	if data and 'token' in data:
-		test({'action': 'get_client', 'token': data['token']})
-		test({'action': 'deposit', 'token': data['token'], 'amount': 1000})
-		test({'action': 'withdraw', 'token': data['token'], 'amount': 500})
-		test({'action': 'transfer', 'token': data['token'], 'amount': 200, 'destination_acc_code': '0046'})
-		test({'action': 'get_client_history', 'token': data['token']})
+	sys.exit(1 if failures else 0)
@@ -0,0 +1,168 @@
+import argparse
+import json
+import sys
+
+from lib.period import parse_period
+
+
+def export_statement(args):
+    '''Exporta o extrato de uma conta para um arquivo (ou para a saída padrão).
+
+    Parameters
+    ----------
+    args : argparse.Namespace
+        Argumentos da linha de comando
+    '''
+    from data import bank
+
+    start, end = parse_period(args.start, args.end)
+    output = open(args.output, 'wb') if args.output else sys.stdout.buffer
+
+    try:
+        bank.export_statement(output, int(args.account), start, end, args.format)
+    finally:
+        if args.output:
+            output.close()
+
+
+def import_clients(args):
+    '''Importa clientes e contas bancárias em massa a partir de um arquivo CSV
+    ou JSONL.
+
+    Parameters
+    ----------
+    args : argparse.Namespace
+        Argumentos da linha de comando
+    '''
+    from data.importer import ClientImporter
+
+    importer = ClientImporter(
+        args.input,
+        format=args.format,
+        batch_size=args.batch_size,
+        processes=args.processes,
+        checkpoint=args.checkpoint,
+    )
+    stats = importer.run()
+
+    print(
+        f'=> Importação concluída: {stats["imported"]} clientes importados, '
+        f'{stats["skipped"]} já cadastrados e {stats["rejected"]} linhas inválidas'
+    )
+
+
+def configure_hot_account(args):
+    '''Define a quantidade de saldos parciais de uma conta com muitas
+    movimentações simultâneas.
+
+    Parameters
+    ----------
+    args : argparse.Namespace
+        Argumentos da linha de comando
+    '''
+    from data import bank
+
+    if not bank.configure_hot_account(int(args.account), args.slots):
+        sys.exit('=> Não foi possível configurar a conta')
+
+    print(f'=> Conta {args.account} configurada com {args.slots} saldos parciais')
+
+
+def analytics_report(args):
+    '''Calcula os indicadores de todas as contas do banco e os escreve em JSON
+    em um arquivo (ou na saída padrão).
+
+    Parameters
+    ----------
+    args : argparse.Namespace
+        Argumentos da linha de comando
+    '''
+    from data.analytics import Analytics
+
+    start, end = parse_period(args.start, args.end)
+    report = Analytics.report(start, end)
+    output = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+
+    try:
+        json.dump(report, output, ensure_ascii=False, indent=2)
+        output.write('\n')
+    finally:
+        if args.output:
+            output.close()
+
+
+def verify_ledger(args):
+    '''Confere o saldo das contas com o livro razão, encerrando com erro caso
+    alguma divergência seja encontrada.
+
+    Parameters
+    ----------
+    args : argparse.Namespace
+        Argumentos da linha de comando
+    '''
+    from data import bank
+
+    result = bank.verify_ledger()
+
+    if result is None:
+        sys.exit('=> Não foi possível verificar o livro razão')
+
+    for entry_id, total in result['entries']:
+        print(f'=> Lançamento {entry_id} desbalanceado: soma das partidas {total:.2f}')
+
+    for account_id, balance, total in result['accounts']:
+        print(f'=> Conta {account_id} divergente: saldo {balance:.2f}, partidas {total:.2f}')
+
+    if result['entries'] or result['accounts']:
+        sys.exit(1)
+
+    print('=> Livro razão consistente')
+
+
+def build_parser():
+    '''Cria o interpretador dos argumentos da linha de comando.
+
+    Returns
+    -------
+    argparse.ArgumentParser
+        Interpretador dos argumentos.
+    '''
+    parser = argparse.ArgumentParser(description='Ferramentas administrativas do SmartBank.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    statement = commands.add_parser('export-statement', help='Exporta o extrato de uma conta em CSV ou OFX.')
+    statement.add_argument('--account', required=True, help='Número da conta')
+    statement.add_argument('--from', dest='start', help='Início do período (ISO 8601)')
+    statement.add_argument('--to', dest='end', help='Fim do período (ISO 8601, inclusivo quando for apenas a data)')
+    statement.add_argument('--format', choices=['csv', 'ofx'], default='csv', help='Formato do extrato')
+    statement.add_argument('--output', help='Arquivo de destino (por padrão, a saída padrão)')
+    statement.set_defaults(handler=export_statement)
+
+    clients = commands.add_parser('import-clients', help='Importa clientes e contas em massa de um arquivo CSV ou JSONL.')
+    clients.add_argument('input', help='Arquivo com os campos name, cpf, password e, opcionalmente, balance')
+    clients.add_argument('--format', choices=['csv', 'jsonl'], help='Formato do arquivo (por padrão, obtido pela extensão)')
+    clients.add_argument('--batch-size', type=int, default=5000, help='Quantidade de clientes carregados em cada lote')
+    clients.add_argument('--processes', type=int, help='Quantidade de processos que criptografam as senhas')
+    clients.add_argument('--checkpoint', help='Arquivo de checkpoint (por padrão, <input>.checkpoint)')
+    clients.set_defaults(handler=import_clients)
+
+    hot = commands.add_parser('hot-account', help='Divide o saldo de uma conta com muitas movimentações em saldos parciais.')
+    hot.add_argument('--account', required=True, help='Número da conta')
+    hot.add_argument('--slots', type=int, required=True, help='Quantidade de saldos parciais (0 reúne o saldo novamente)')
+    hot.set_defaults(handler=configure_hot_account)
+
+    analytics = commands.add_parser('analytics-report', help='Calcula indicadores de todas as contas (saldos, movimentação e fluxo líquido).')
+    analytics.add_argument('--from', dest='start', help='Início do período do histórico (ISO 8601)')
+    analytics.add_argument('--to', dest='end', help='Fim do período do histórico (ISO 8601, inclusivo quando for apenas a data)')
+    analytics.add_argument('--output', help='Arquivo JSON de destino (por padrão, a saída padrão)')
+    analytics.set_defaults(handler=analytics_report)
+
+    ledger = commands.add_parser('verify-ledger', help='Confere o saldo das contas com o livro razão.')
+    ledger.set_defaults(handler=verify_ledger)
+
+    return parser
+
+
+if __name__ == '__main__':
+    args = build_parser().parse_args()
+    args.handler(args)
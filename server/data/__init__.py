@@ -1,6 +1,16 @@
+from settings import SESSION_TTL, SESSION_SWEEP_INTERVAL, GROUP_COMMIT_WINDOW, GROUP_COMMIT_MAX_BATCH, HISTORY_PARTITION_INTERVAL
+from lib.notifier import Notifier
+from lib.group_commit import GroupCommitter
+from lib.scheduler import PeriodicTask
+from .db import bank_db
 from .bank_handler import Bank
 from .session import Session
+from .models import History
 
 
-bank = Bank()
-session_manager = Session(bank)
+notifier = Notifier()
+committer = GroupCommitter(bank_db, GROUP_COMMIT_WINDOW, GROUP_COMMIT_MAX_BATCH) if GROUP_COMMIT_WINDOW > 0 else None
+bank = Bank(notifier, committer)
+session_manager = Session(bank, ttl=SESSION_TTL)
+session_sweep = PeriodicTask(session_manager.sweep, SESSION_SWEEP_INTERVAL, name='session-sweep')
+partition_maintenance = PeriodicTask(History.ensure_partitions, HISTORY_PARTITION_INTERVAL, name='history-partitions')
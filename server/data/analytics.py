@@ -0,0 +1,299 @@
+from datetime import date, timedelta
+import struct
+import io
+
+import numpy as np
+
+from data.db import bank_db
+from data.models import Account, AccountSlot, History
+
+
+class Analytics:
+    '''Classe responsável por calcular indicadores de todas as contas do banco
+    (distribuição dos saldos, frequência de movimentação e fluxo líquido).
+
+    As colunas necessárias das contas e do histórico são carregadas de uma só
+    vez através de `COPY ... TO STDOUT` no formato binário do PostgreSQL e
+    convertidas diretamente em vetores do NumPy, sem criar um objeto por
+    linha. Os agrupamentos e percentis são calculados sobre os vetores.
+
+    Methods
+    -------
+    report(start=None, end=None, percentiles=PERCENTILES)
+        Calcula os indicadores de todas as contas em um período
+    '''
+    PERCENTILES = (10, 25, 50, 75, 90, 99)
+
+    TYPES = (
+        History.OPENING,
+        History.WITHDRAW,
+        History.DEPOSIT,
+        History.TRANSFER_SENT,
+        History.TRANSFER_RECEIVED,
+    )
+
+    _epoch = date(2000, 1, 1)
+    _signature = b'PGCOPY\n\xff\r\n\x00'
+
+    @staticmethod
+    def report(start=None, end=None, percentiles=PERCENTILES):
+        '''Calcula os indicadores de todas as contas em um período.
+
+        Parameters
+        ----------
+        start : Optional[datetime]
+            Início do período do histórico (inclusivo)
+        end : Optional[datetime]
+            Fim do período do histórico (exclusivo)
+        percentiles : Iterable[float]
+            Percentis calculados para as distribuições
+
+        Returns
+        -------
+        dict
+            Indicadores das contas (`accounts`), totais por tipo de transação
+            (`types`), movimentação por conta (`activity`), fluxo líquido por
+            conta (`net_flow`) e totais diários (`daily`).
+
+        Raises
+        ------
+        psycopg2.Error
+            Caso não seja possível carregar os dados.
+        '''
+        accounts = Analytics._load(
+            f'''SELECT id, {AccountSlot.balance_sql('accounts')}::FLOAT8
+            FROM {Account.table_name} accounts
+            ORDER BY id''',
+            [],
+            [('id', '>i4'), ('balance', '>f8')],
+        )
+        history = Analytics._load_history(start, end)
+
+        ids = accounts['id']
+        balances = accounts['balance'].astype(np.float64)
+        index = np.searchsorted(ids, history['account_id'])
+        amounts = history['amount'].astype(np.float64)
+        types = history['type'].astype(np.intp)
+
+        known = index < len(ids)
+        known[known] = ids[index[known]] == history['account_id'][known]
+        index, amounts, types, days = index[known], amounts[known], types[known], history['day'][known]
+
+        activity = np.bincount(index, minlength=len(ids))
+        net_flow = np.bincount(index, weights=amounts, minlength=len(ids))
+
+        return {
+            'period': {
+                'from': start.isoformat() if start else None,
+                'to': end.isoformat() if end else None,
+            },
+            'accounts': {
+                'count': int(len(ids)),
+                'total_balance': round(float(balances.sum()), 2),
+                'mean_balance': Analytics._round(balances.mean() if len(ids) else 0.0),
+                'balance_percentiles': Analytics._percentiles(balances, percentiles),
+            },
+            'types': Analytics._by_type(types, amounts),
+            'activity': {
+                'transactions': int(len(index)),
+                'active_accounts': int(np.count_nonzero(activity)),
+                'percentiles': Analytics._percentiles(activity, percentiles),
+            },
+            'net_flow': {
+                'total': Analytics._round(net_flow.sum()),
+                'inflow_accounts': int(np.count_nonzero(net_flow > 0)),
+                'outflow_accounts': int(np.count_nonzero(net_flow < 0)),
+                'percentiles': Analytics._percentiles(net_flow, percentiles),
+            },
+            'daily': Analytics._daily(days, amounts),
+        }
+
+    @staticmethod
+    def _load_history(start, end):
+        '''Carrega a conta, o dia, o tipo e a quantia com sinal (negativa nas
+        saídas) dos registros de transações de um período.
+
+        Parameters
+        ----------
+        start : Optional[datetime]
+            Início do período (inclusivo)
+        end : Optional[datetime]
+            Fim do período (exclusivo)
+
+        Returns
+        -------
+        numpy.ndarray
+            Vetor estruturado com os campos `account_id`, `day` (dias desde
+            2000-01-01), `type` (índice em `TYPES`) e `amount`.
+        '''
+        query = []
+        params = []
+
+        if start:
+            query.append('timestamp >= %s')
+            params.append(start)
+
+        if end:
+            query.append('timestamp < %s')
+            params.append(end)
+
+        type_index = ' '.join(
+            f"WHEN '{type}' THEN {index}" for index, type in enumerate(Analytics.TYPES)
+        )
+
+        return Analytics._load(
+            f'''SELECT account_id,
+                (timestamp::DATE - DATE '{Analytics._epoch.isoformat()}')::INT4,
+                (CASE type {type_index} ELSE -1 END)::INT4,
+                (CASE WHEN type IN ('{History.WITHDRAW}', '{History.TRANSFER_SENT}')
+                    THEN -COALESCE(amount, 0) ELSE COALESCE(amount, 0) END)::FLOAT8
+            FROM {History.table_name}
+            {'WHERE ' + ' AND '.join(query) if query else ''}''',
+            params,
+            [('account_id', '>i4'), ('day', '>i4'), ('type', '>i4'), ('amount', '>f8')],
+        )
+
+    @staticmethod
+    def _load(sql, params, columns):
+        '''Carrega o resultado de uma consulta através de `COPY` no formato
+        binário, convertendo-o em um vetor estruturado sem percorrer as linhas
+        em Python.
+
+        As colunas da consulta precisam ter tamanho fixo e não podem ser nulas,
+        então cada linha ocupa a mesma quantidade de bytes.
+
+        Parameters
+        ----------
+        sql : str
+            Uma consulta SQL válida (sem `;` ao final)
+        params : list
+            Uma lista de valores que serão inseridos no SQL informado
+        columns : list[tuple[str, str]]
+            Nome e tipo do NumPy (big-endian) de cada coluna, na ordem da
+            consulta
+
+        Returns
+        -------
+        numpy.ndarray
+            Vetor estruturado com as colunas da consulta.
+        '''
+        buffer = io.BytesIO()
+        bank_db.copy_to(sql, buffer, params, options='FORMAT binary')
+        data = buffer.getbuffer()
+
+        if bytes(data[:len(Analytics._signature)]) != Analytics._signature:
+            raise ValueError('Formato binário do COPY inválido.')
+
+        extension, = struct.unpack_from('>i', data, len(Analytics._signature) + 4)
+        offset = len(Analytics._signature) + 8 + extension
+
+        fields = [('count', '>i2')]
+
+        for name, dtype in columns:
+            fields += [(f'{name}_size', '>i4'), (name, dtype)]
+
+        rows = np.frombuffer(data[offset:len(data) - 2], dtype=np.dtype(fields))
+        result = np.empty(len(rows), dtype=[(name, dtype.lstrip('>')) for name, dtype in columns])
+
+        for name, _ in columns:
+            result[name] = rows[name]
+        return result
+
+    @staticmethod
+    def _by_type(types, amounts):
+        '''Agrupa a quantidade e a soma das quantias por tipo de transação.
+
+        Parameters
+        ----------
+        types : numpy.ndarray
+            Índice do tipo de cada registro
+        amounts : numpy.ndarray
+            Quantia com sinal de cada registro
+
+        Returns
+        -------
+        dict
+            Quantidade (`count`) e soma das quantias (`total`, sem sinal) de
+            cada tipo.
+        '''
+        valid = types >= 0
+        counts = np.bincount(types[valid], minlength=len(Analytics.TYPES))
+        totals = np.bincount(types[valid], weights=np.abs(amounts[valid]), minlength=len(Analytics.TYPES))
+
+        return {
+            type: {'count': int(counts[index]), 'total': Analytics._round(totals[index])}
+            for index, type in enumerate(Analytics.TYPES)
+        }
+
+    @staticmethod
+    def _daily(days, amounts):
+        '''Agrupa a quantidade de registros e o fluxo líquido por dia.
+
+        Parameters
+        ----------
+        days : numpy.ndarray
+            Dia de cada registro (dias desde 2000-01-01)
+        amounts : numpy.ndarray
+            Quantia com sinal de cada registro
+
+        Returns
+        -------
+        list[dict]
+            Data (`day`), quantidade (`count`) e fluxo líquido (`net`) de cada
+            dia com registros.
+        '''
+        if not len(days):
+            return []
+
+        unique, inverse = np.unique(days, return_inverse=True)
+        counts = np.bincount(inverse)
+        nets = np.bincount(inverse, weights=amounts)
+
+        return [
+            {
+                'day': (Analytics._epoch + timedelta(days=int(day))).isoformat(),
+                'count': int(count),
+                'net': Analytics._round(net),
+            }
+            for day, count, net in zip(unique, counts, nets)
+        ]
+
+    @staticmethod
+    def _percentiles(values, percentiles):
+        '''Calcula os percentis de uma distribuição.
+
+        Parameters
+        ----------
+        values : numpy.ndarray
+            Valores da distribuição
+        percentiles : Iterable[float]
+            Percentis calculados
+
+        Returns
+        -------
+        dict[str, float]
+            Valor de cada percentil, indexado por `p<percentil>`.
+        '''
+        percentiles = list(percentiles)
+
+        if not len(values):
+            return {f'p{p:g}': 0.0 for p in percentiles}
+
+        result = np.percentile(values, percentiles)
+        return {f'p{p:g}': Analytics._round(value) for p, value in zip(percentiles, result)}
+
+    @staticmethod
+    def _round(value):
+        '''Arredonda um valor do NumPy para duas casas decimais.
+
+        Parameters
+        ----------
+        value : numpy.number
+            Valor calculado
+
+        Returns
+        -------
+        float
+            Valor arredondado.
+        '''
+        return round(float(value), 2)
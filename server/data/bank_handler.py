@@ -1,6 +1,7 @@
-from threading import Lock
-
-from data.models import Client, Account, History
+from lib.json import Json
+from data.db import bank_db
+from data.models import Client, Account, AccountSlot, History, IdempotencyKey, Journal, DailyAccountStats
+from data.statement import Statement
 
 
 class Bank:
@@ -15,18 +16,51 @@ class Bank:
         Obtém as informações de um usuário
     get_client_account(client_id):
         Obtém as informações da conta de um usuário
-    get_client_history(client_id):
+    get_client_history(client_id, start=None, end=None):
         Obtém as informações do histórico de transações de um usuário
+    get_client_history_page(client_id, limit, before=None, start=None, end=None):
+        Obtém uma página do histórico de transações de um usuário
+    get_account_summary(client_id, start=None, end=None, group_by=None):
+        Obtém os totais das transações de um usuário por tipo em um período
+    sync_client_history(client_id, version=None, since=None, start=None, end=None):
+        Obtém apenas as alterações do histórico de transações de um usuário
     withdraw(amount, account_code):
         Realiza a operação de saque em uma conta
     deposit(amount, account_code):
         Realiza a operação de depósito em uma conta
     transfer(amount, origin_acc_code, destination_acc_code):
         Realiza a operação de transferência entre conta contas
+    bulk_transfer(origin_acc_code, transfers):
+        Realiza várias transferências de uma conta de origem em uma única
+        operação
+    export_statement(file, account_id, start=None, end=None, format='csv'):
+        Exporta o extrato de uma conta para um destino
+    configure_hot_account(account_code, slots):
+        Divide o saldo de uma conta com muitas movimentações em saldos
+        parciais
+    verify_ledger():
+        Confere o saldo das contas com o livro razão
+    run_once(client_id, key, action, operation):
+        Executa uma operação no máximo uma vez por chave de idempotência
+    subscribe(account_id, callback):
+        Inscreve uma função para receber as alterações de uma conta
+    unsubscribe(account_id, callback):
+        Remove a inscrição de uma função nas alterações de uma conta
     '''
-    _locker = Lock()
-
-    def __init__(self):
+    def __init__(self, notifier=None, committer=None):
+        '''
+        Parameters
+        ----------
+        notifier : Optional[Notifier]
+            Notificador usado para publicar as alterações das contas após o
+            `COMMIT` de cada operação (por padrão, nada é publicado).
+        committer : Optional[GroupCommitter]
+            Agrupador que executa as operações que movimentam dinheiro de
+            várias requisições concorrentes em uma única transação (por
+            padrão, cada operação é confirmada na sua própria transação).
+        '''
+        self._notifier = notifier
+        self._committer = committer
         self._migrate()
     
     def _migrate(self):
@@ -34,7 +68,11 @@ class Bank:
         '''
         Client.migrate()
         Account.migrate()
+        AccountSlot.migrate()
+        Journal.migrate()
         History.migrate()
+        DailyAccountStats.migrate()
+        IdempotencyKey.migrate()
 
     def register_client(self, name, cpf, password):
         '''Realiza o cadastro e criação de conta de um usuário.
@@ -55,17 +93,24 @@ class Bank:
         None
             Caso não seja possível realizar o cadastro.
         '''
-        client = Client(name, cpf, password)
+        with bank_db.transaction() as transaction:
+            client = Client(name, cpf, password)
 
-        if not client.save():
-            return None
-        
-        account = Account(client.id)
-        account.save()
+            if not client.save():
+                transaction.rollback()
+                return None
+            
+            account = Account(client.id)
+
+            if not account.save():
+                transaction.rollback()
+                return None
+
+            log = History(History.OPENING, account.id, amount=account.balance, balance_after=account.balance)
 
-        log = History('ABERTURA DA CONTA', f'Saldo inicial: {Account.format_money(account.balance)}', account.id)
-        log.save()
-        return client
+            if not Bank._save_logs([log]):
+                transaction.rollback()
+        return None if transaction.failed else client
     
     def delete_client(self, client_id):
         pass
@@ -104,20 +149,245 @@ class Bank:
         '''
         return Account.get(client_id)
     
-    def get_client_history(self, client_id):
-        '''Obtém as informações do histórico de transações de um usuário.
+    def get_client_history(self, client_id, start=None, end=None):
+        '''Obtém as informações do histórico de transações de um usuário,
+        opcionalmente limitado a um período.
+
+        Parameters
+        ----------
+        client_id : int
+            ID de um usuário
+        start : Optional[datetime]
+            Início do período (inclusivo)
+        end : Optional[datetime]
+            Fim do período (exclusivo)
+
+        Returns
+        -------
+        list[History]
+            Lista com o histórico de transações do usuário buscado.
+        '''
+        account = Account.get(client_id)
+
+        if not account:
+            return []
+        return History.getAllByAccountId(account.id, start, end)
+
+    def sync_client_history(self, client_id, version=None, since=None, start=None, end=None):
+        '''Obtém apenas as alterações do histórico de transações de um usuário
+        em relação ao que ele já conhece.
+
+        A versão da conta é consultada antes do histórico: se ela for igual à
+        informada, o histórico não é consultado.
+
+        Parameters
+        ----------
+        client_id : int
+            ID de um usuário
+        version : Optional[int]
+            Versão da conta já conhecida pelo usuário
+        since : Optional[int]
+            Sequência do último registro já conhecido pelo usuário (por padrão,
+            todo o histórico é obtido).
+        start : Optional[datetime]
+            Início do período (inclusivo)
+        end : Optional[datetime]
+            Fim do período (exclusivo)
+
+        Returns
+        -------
+        tuple[int, Optional[list[History]]]
+            A versão atual da conta e os registros posteriores a `since` (ou
+            `None`, caso a versão não tenha mudado).
+        None
+            Caso a conta não seja encontrada.
+        '''
+        account = Account.get(client_id)
+
+        if not account:
+            return None
+
+        if version is not None and version == account.version:
+            return account.version, None
+        return account.version, History.getAllByAccountId(account.id, start, end, since)
+
+    def get_client_history_page(self, client_id, limit, before=None, start=None, end=None):
+        '''Obtém uma página do histórico de transações de um usuário, dos
+        registros mais recentes para os mais antigos.
 
         Parameters
         ----------
         client_id : int
             ID de um usuário
+        limit : int
+            Quantidade máxima de registros da página
+        before : Optional[tuple[datetime, int]]
+            Data e hora e ID do último registro da página anterior
+        start : Optional[datetime]
+            Início do período (inclusivo)
+        end : Optional[datetime]
+            Fim do período (exclusivo)
+
+        Returns
+        -------
+        list[History]
+            Lista com uma página do histórico de transações do usuário.
+        '''
+        account = Account.get(client_id)
+
+        if not account:
+            return []
+        return History.getPageByAccountId(account.id, limit, before, start, end)
+
+    def get_account_summary(self, client_id, start=None, end=None, group_by=None):
+        '''Obtém a quantidade e a soma das quantias das transações de um
+        usuário por tipo em um período, a partir dos totais diários da conta.
+
+        Parameters
+        ----------
+        client_id : int
+            ID do usuário
+        start : Optional[datetime]
+            Início do período (inclusivo)
+        end : Optional[datetime]
+            Fim do período (exclusivo)
+        group_by : Optional[str]
+            Separa os totais por `'day'` (dia) ou `'month'` (mês)
 
         Returns
         -------
-        lis[tuple]
-            Lista de tuplas com o histórico de transações do usuário buscado.
+        list[tuple]
+            Linhas `(início do dia ou mês, tipo, quantidade, soma)`.
+        None
+            Caso a conta não seja encontrada.
         '''
-        return Account.get(client_id).history
+        account = Account.get(client_id)
+
+        if not account:
+            return None
+        return DailyAccountStats.summary(account.id, start, end, group_by)
+
+    def bulk_transfer(self, origin_acc_code, transfers):
+        '''Realiza várias transferências de uma conta de origem (por exemplo,
+        uma folha de pagamento) em uma única transação.
+
+        O total é validado uma única vez contra o saldo da origem, todos os
+        créditos são aplicados com um único comando e todos os registros de
+        histórico são inseridos de uma só vez. Se qualquer transferência for
+        inválida, nenhuma é realizada.
+
+        Parameters
+        ----------
+        origin_acc_code : int
+            Número da conta de origem
+        transfers : list[tuple]
+            Lista de pares (número da conta de destino, quantia)
+
+        Returns
+        -------
+        Account
+            Conta de origem com o saldo atualizado, caso a operação seja
+            concluída.
+        None
+            Caso a operação não seja concluída.
+        '''
+        return self._commit(lambda: self._bulk_transfer(origin_acc_code, transfers))
+
+    def _bulk_transfer(self, origin_acc_code, transfers):
+        '''Realiza as transferências de `bulk_transfer()`.
+        '''
+        try:
+            lines = [(int(destination_acc_code), float(amount)) for destination_acc_code, amount in transfers]
+        except (TypeError, ValueError):
+            return None
+
+        if not lines or any(amount <= 0 for _, amount in lines):
+            return None
+
+        credits = {}
+
+        for destination_id, amount in lines:
+            credits[destination_id] = credits.get(destination_id, 0.0) + amount
+
+        with bank_db.transaction() as transaction:
+            origin_account = Account.get(origin_acc_code)
+
+            if not origin_account or origin_account.id in credits:
+                transaction.rollback()
+                return None
+
+            total = sum(credits.values())
+
+            if origin_account.balance < total:
+                transaction.rollback()
+                return None
+
+            balances = Journal.post(
+                Journal.TRANSFER,
+                [(origin_account.id, -total)] + list(credits.items()),
+            )
+
+            if not balances:
+                transaction.rollback()
+                return None
+
+            origin_balance = balances[origin_account.id] + total
+            destination_balances = {
+                destination_id: balances[destination_id] - credit
+                for destination_id, credit in credits.items()
+            }
+            logs = []
+
+            for destination_id, amount in lines:
+                origin_balance -= amount
+                destination_balances[destination_id] += amount
+
+                logs.append(History(
+                    History.TRANSFER_SENT,
+                    origin_account.id,
+                    amount=amount,
+                    balance_after=origin_balance,
+                    counterparty_account_id=destination_id,
+                ))
+                logs.append(History(
+                    History.TRANSFER_RECEIVED,
+                    destination_id,
+                    amount=amount,
+                    balance_after=destination_balances[destination_id],
+                    counterparty_account_id=origin_account.id,
+                ))
+
+            accounts = Bank._save_logs(logs)
+
+            if not accounts:
+                transaction.rollback()
+                return None
+
+            origin_account = Account(origin_account.id, *accounts[origin_account.id])
+            self._notify(origin_account.id, *accounts[origin_account.id], logs[0::2])
+
+            for destination_id, destination_logs in Bank._group_by_account(logs[1::2]).items():
+                self._notify(destination_id, *accounts[destination_id], destination_logs)
+        return None if transaction.failed else origin_account
+
+    def export_statement(self, file, account_id, start=None, end=None, format='csv'):
+        '''Exporta o extrato de uma conta para um destino, com consumo de
+        memória constante independente do tamanho do histórico.
+
+        Parameters
+        ----------
+        file : object
+            Objeto com o método `write()` que recebe o extrato em bytes
+        account_id : int
+            ID da conta bancária
+        start : Optional[datetime]
+            Início do período (inclusivo)
+        end : Optional[datetime]
+            Fim do período (exclusivo)
+        format : str
+            Formato do extrato: `'csv'` ou `'ofx'`
+        '''
+        Statement.write(file, account_id, start, end, format)
 
     def withdraw(self, amount, account_code):
         '''Realiza a operação de saque em uma conta.
@@ -131,19 +401,40 @@ class Bank:
 
         Returns
         -------
-        bool
-            Booleano indicando se a operação foi concluída.
+        Account
+            Conta com o saldo atualizado, caso a operação seja concluída.
+        None
+            Caso a operação não seja concluída.
+        '''
+        return self._commit(lambda: self._withdraw(amount, account_code))
+
+    def _withdraw(self, amount, account_code):
+        '''Realiza o saque de `withdraw()`.
         '''
-        Bank._lock()
-        account = Account.get(account_code)
+        with bank_db.transaction() as transaction:
+            account = Account.get(account_code)
+            amount = float(amount)
+
+            if not account or amount <= 0 or account.balance < amount:
+                transaction.rollback()
+                return None
+
+            balances = Journal.post(Journal.WITHDRAW, [(account.id, -amount), (None, amount)])
 
-        if (not account) or (account and not account.withdraw(amount)):
-            return False
-        
-        log = History('SAQUE', f'Quantia: {Account.format_money(amount)}', account.id)
-        saved = log.save()
-        Bank._unlock()
-        return saved
+            if not balances:
+                transaction.rollback()
+                return None
+
+            log = History(History.WITHDRAW, account.id, amount=amount, balance_after=balances[account.id])
+            accounts = Bank._save_logs([log])
+
+            if not accounts:
+                transaction.rollback()
+                return None
+
+            account = Account(account.id, *accounts[account.id])
+            self._notify(account.id, account.balance, account.version, [log])
+        return None if transaction.failed else account
 
     def deposit(self, amount, account_code):
         '''Realiza a operação de depósito em uma conta.
@@ -157,19 +448,40 @@ class Bank:
 
         Returns
         -------
-        bool
-            Booleano indicando se a operação foi concluída.
+        Account
+            Conta com o saldo atualizado, caso a operação seja concluída.
+        None
+            Caso a operação não seja concluída.
+        '''
+        return self._commit(lambda: self._deposit(amount, account_code))
+
+    def _deposit(self, amount, account_code):
+        '''Realiza o depósito de `deposit()`.
         '''
-        Bank._lock()
-        account = Account.get(account_code)
+        with bank_db.transaction() as transaction:
+            account = Account.get(account_code)
+            amount = float(amount)
+
+            if not account or amount <= 0:
+                transaction.rollback()
+                return None
+
+            balances = Journal.post(Journal.DEPOSIT, [(None, -amount), (account.id, amount)])
+
+            if not balances:
+                transaction.rollback()
+                return None
 
-        if (not account) or (account and not account.deposit(amount)):
-            return False
-        
-        log = History('DEPÓSITO', f'Quantia: {Account.format_money(amount)}', account.id)
-        saved = log.save()
-        Bank._unlock()
-        return saved
+            log = History(History.DEPOSIT, account.id, amount=amount, balance_after=balances[account.id])
+            accounts = Bank._save_logs([log])
+
+            if not accounts:
+                transaction.rollback()
+                return None
+
+            account = Account(account.id, *accounts[account.id])
+            self._notify(account.id, account.balance, account.version, [log])
+        return None if transaction.failed else account
 
     def transfer(self, amount, origin_acc_code, destination_acc_code):
         '''Realiza a operação de transferência entre contas.
@@ -183,31 +495,292 @@ class Bank:
         destination_acc_code : int
             Número da conta de destino para onde será realizada a transferência
 
+        Returns
+        -------
+        Account
+            Conta de origem com o saldo atualizado, caso a operação seja
+            concluída.
+        None
+            Caso a operação não seja concluída.
+        '''
+        return self._commit(lambda: self._transfer(amount, origin_acc_code, destination_acc_code))
+
+    def _transfer(self, amount, origin_acc_code, destination_acc_code):
+        '''Realiza a transferência de `transfer()`.
+        '''
+        with bank_db.transaction() as transaction:
+            origin_account = Account.get(origin_acc_code)
+            destination_account = Account.get(destination_acc_code)
+            
+            if not origin_account or not destination_account:
+                transaction.rollback()
+                return None
+
+            if origin_account.id == destination_account.id:
+                transaction.rollback()
+                return None
+            
+            amount = float(amount)
+
+            if amount <= 0 or origin_account.balance < amount:
+                transaction.rollback()
+                return None
+
+            balances = Journal.post(
+                Journal.TRANSFER,
+                [(origin_account.id, -amount), (destination_account.id, amount)],
+            )
+
+            if not balances:
+                transaction.rollback()
+                return None
+
+            origin_log = History(
+                History.TRANSFER_SENT,
+                origin_account.id,
+                amount=amount,
+                balance_after=balances[origin_account.id],
+                counterparty_account_id=destination_account.id,
+            )
+            destination_log = History(
+                History.TRANSFER_RECEIVED,
+                destination_account.id,
+                amount=amount,
+                balance_after=balances[destination_account.id],
+                counterparty_account_id=origin_account.id,
+            )
+            accounts = Bank._save_logs([origin_log, destination_log])
+
+            if not accounts:
+                transaction.rollback()
+                return None
+
+            origin_account = Account(origin_account.id, *accounts[origin_account.id])
+            destination_account = Account(destination_account.id, *accounts[destination_account.id])
+            self._notify(origin_account.id, origin_account.balance, origin_account.version, [origin_log])
+            self._notify(destination_account.id, destination_account.balance, destination_account.version, [destination_log])
+        return None if transaction.failed else origin_account
+
+    def configure_hot_account(self, account_code, slots):
+        '''Divide o saldo de uma conta com muitas movimentações simultâneas
+        (por exemplo, a de um lojista) em saldos parciais, para que os
+        créditos na conta não aguardem uns aos outros.
+
+        Parameters
+        ----------
+        account_code : int
+            Número da conta bancária
+        slots : int
+            Quantidade de saldos parciais (zero reúne o saldo novamente)
+
         Returns
         -------
         bool
             Booleano indicando se a operação foi concluída.
         '''
-        Bank._lock()
-        origin_account = Account.get(origin_acc_code)
-        destination_account = Account.get(destination_acc_code)
-        
-        if not origin_account or not destination_account:
-            return False
-        
-        if not origin_account.transfer(destination_account, amount):
-            return False
-        
-        origin_log = History('TRANSFERÊNCIA ENVIADA', f'Quantia: {Account.format_money(amount)}, N° conta destino: {destination_account.code}', origin_account.id)
-        destination_log = History('TRANSFERÊNCIA RECEBIDA', f'Quantia: {Account.format_money(amount)}, N° conta origem: {origin_account.code}', destination_account.id)
-        saved = origin_log.save() and destination_log.save()
-        Bank._unlock()
-        return saved
+        with bank_db.transaction() as transaction:
+            if not AccountSlot.configure(int(account_code), int(slots)):
+                transaction.rollback()
+        return not transaction.failed
+
+    def verify_ledger(self):
+        '''Confere se cada lançamento do livro razão está balanceado e se o
+        saldo de cada conta é igual à soma das suas partidas.
+
+        Returns
+        -------
+        dict
+            Lançamentos desbalanceados (`entries`) e contas com o saldo
+            divergente (`accounts`). Ambos vazios quando o livro razão está
+            consistente.
+        None
+            Caso não seja possível realizar a verificação.
+        '''
+        return Journal.verify()
+
+    def run_once(self, client_id, key, action, operation):
+        '''Executa uma operação no máximo uma vez por chave de idempotência.
+
+        A reserva da chave, a operação e o registro da resposta acontecem na
+        mesma transação: se a operação falhar, a chave é liberada para uma nova
+        tentativa; se for concluída, novas tentativas com a mesma chave recebem
+        a resposta registrada, sem executar a operação novamente.
+
+        Parameters
+        ----------
+        client_id : int
+            ID do usuário
+        key : str
+            Chave de idempotência informada pelo usuário
+        action : str
+            Nome da operação
+        operation : function
+            Função que executa a operação e retorna a resposta como dicionário,
+            com o campo `error` indicando se houve falha.
+
+        Returns
+        -------
+        tuple[Optional[dict], bool]
+            A resposta da operação e um booleano indicando se a resposta foi
+            obtida de uma execução anterior. A resposta é `None` caso a chave
+            já tenha sido usada em outra operação.
+        '''
+        return self._commit(
+            lambda: self._run_once(client_id, key, action, operation),
+            ({'error': True, 'message': 'Não foi possível concluir a operação.'}, False),
+        )
+
+    def _run_once(self, client_id, key, action, operation):
+        '''Executa a operação de `run_once()`.
+        '''
+        with bank_db.transaction() as transaction:
+            if not IdempotencyKey.claim(client_id, key, action):
+                transaction.rollback()
+                record = IdempotencyKey.get(client_id, key)
+
+                if not record or record[0] != action or record[1] is None:
+                    return None, True
+                return Json.parse_from_json(record[1]), True
+
+            response = operation()
+
+            if response.get('error') or not IdempotencyKey.store(client_id, key, Json.parse_to_json(response)):
+                transaction.rollback()
+
+        if transaction.failed and not response.get('error'):
+            return {'error': True, 'message': 'Não foi possível concluir a operação.'}, False
+        return response, False
+
+    def subscribe(self, account_id, callback):
+        '''Inscreve uma função para receber as alterações de uma conta, após o
+        `COMMIT` de cada operação que a movimentar.
+
+        Parameters
+        ----------
+        account_id : int
+            ID da conta bancária
+        callback : function
+            Função que recebe o saldo e a versão atualizados e a lista de novos
+            registros de transações (`History`) da conta. Retornar `False`
+            encerra a inscrição.
+        '''
+        if self._notifier:
+            self._notifier.subscribe(account_id, callback)
+
+    def unsubscribe(self, account_id, callback):
+        '''Remove a inscrição de uma função nas alterações de uma conta.
+
+        Parameters
+        ----------
+        account_id : int
+            ID da conta bancária
+        callback : function
+            Função inscrita com `subscribe()`
+        '''
+        if self._notifier:
+            self._notifier.unsubscribe(account_id, callback)
+
+    def _commit(self, operation, default=None):
+        '''Executa uma operação que movimenta dinheiro, através do agrupador
+        de transações quando existir.
+
+        Parameters
+        ----------
+        operation : function
+            Função sem parâmetros que realiza a operação
+        default : Any
+            Resultado caso a transação do grupo não seja confirmada
+
+        Returns
+        -------
+        Any
+            Resultado da operação.
+        '''
+        if not self._committer:
+            return operation()
+        return self._committer.submit(operation, default)
+
+    def _notify(self, account_id, balance, version, logs):
+        '''Agenda a publicação da alteração de uma conta para após o `COMMIT`
+        da transação atual.
+
+        Parameters
+        ----------
+        account_id : int
+            ID da conta bancária
+        balance : float
+            Saldo da conta após a operação
+        version : int
+            Versão da conta após a operação
+        logs : list[History]
+            Novos registros de transações da conta
+        '''
+        if self._notifier:
+            notifier = self._notifier
+            bank_db.on_commit(lambda: notifier.publish(account_id, (balance, version, logs)))
 
     @staticmethod
-    def _lock():
-        Bank._locker.acquire()
+    def _save_logs(logs):
+        '''Salva novos registros de transações e os soma aos totais diários das
+        contas. Deve ser o último passo de uma operação, pois as contas
+        movimentadas ficam bloqueadas até o `COMMIT`.
+
+        Cada registro recebe como sequência uma nova versão da sua conta,
+        reservada com `Account.advance_versions()`, então as sequências seguem
+        a ordem de confirmação das operações. O saldo após cada registro é
+        ajustado pelo saldo lido após o bloqueio, que inclui os créditos
+        simultâneos confirmados antes em contas com saldos parciais.
+
+        Parameters
+        ----------
+        logs : list[History]
+            Registros de transações ainda não salvos
+
+        Returns
+        -------
+        dict[int, tuple[float, int]]
+            Saldo e versão de cada conta movimentada após a operação,
+            indexados pelo ID da conta.
+        None
+            Caso não seja possível salvar os registros.
+        '''
+        groups = Bank._group_by_account(logs)
+        accounts = Account.advance_versions({
+            account_id: len(account_logs)
+            for account_id, account_logs in groups.items()
+        })
+
+        if not accounts:
+            return None
+
+        for account_id, account_logs in groups.items():
+            balance, version = accounts[account_id]
+            last_balance = account_logs[-1].balance_after
+
+            for sequence, log in enumerate(account_logs, version - len(account_logs) + 1):
+                log.sequence = sequence
+                log.balance_after = balance - (last_balance - log.balance_after)
+
+        if not History.save_many(logs) or not DailyAccountStats.add(logs):
+            return None
+        return accounts
 
     @staticmethod
-    def _unlock():
-        Bank._locker.release()
+    def _group_by_account(logs):
+        '''Agrupa registros de transações por conta, mantendo a ordem.
+
+        Parameters
+        ----------
+        logs : list[History]
+            Registros de transações
+
+        Returns
+        -------
+        dict[int, list[History]]
+            Registros de cada conta.
+        '''
+        groups = {}
+
+        for log in logs:
+            groups.setdefault(log.account_id, []).append(log)
+        return groups
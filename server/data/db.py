@@ -8,4 +8,7 @@ bank_db = Pyg(
     user=PG_USER,
     password=PG_PASSWORD,
     host=PG_HOST,
+    replicas=PG_REPLICAS,
+    max_replica_lag=PG_REPLICA_MAX_LAG,
+    pool_size=PG_POOL_SIZE,
 )
@@ -0,0 +1,349 @@
+from multiprocessing import Pool
+from datetime import datetime
+import json
+import csv
+import io
+import os
+
+from lib.crypt import Crypt
+from data.db import bank_db
+from data.models import Client, Account, History, Journal, DailyAccountStats
+
+
+class ClientImporter:
+    '''Classe responsável por importar clientes e contas bancárias em massa a
+    partir de um arquivo CSV ou JSONL (por exemplo, na migração dos clientes de
+    outro banco).
+
+    As senhas são criptografadas em paralelo por vários processos enquanto o
+    lote anterior é carregado no banco de dados. Cada lote é carregado através
+    de `COPY` em uma tabela temporária e, a partir dela, os clientes, as contas
+    e os registros de abertura são inseridos com um único comando, em uma
+    única transação. O saldo inicial das contas importadas é lançado no livro
+    razão em um único lançamento de abertura por lote. CPFs já cadastrados
+    são ignorados, então importar o mesmo arquivo novamente não duplica
+    clientes.
+
+    Após cada lote, a quantidade de linhas processadas é gravada em um arquivo
+    de checkpoint, permitindo retomar uma importação interrompida.
+
+    Methods
+    -------
+    run()
+        Importa todos os clientes do arquivo
+    '''
+    FORMATS = ('csv', 'jsonl')
+
+    _staging_table = 'import_clients'
+
+    def __init__(self, path, format=None, batch_size=5000, processes=None, checkpoint=None):
+        '''
+        Parameters
+        ----------
+        path : str
+            Caminho do arquivo com os clientes, com os campos `name`, `cpf`,
+            `password` e, opcionalmente, `balance` (saldo inicial).
+        format : Optional[str]
+            Formato do arquivo: `'csv'` ou `'jsonl'` (por padrão, obtido pela
+            extensão do arquivo).
+        batch_size : int
+            Quantidade de clientes carregados em cada lote
+        processes : Optional[int]
+            Quantidade de processos usados para criptografar as senhas (por
+            padrão, a quantidade de CPUs).
+        checkpoint : Optional[str]
+            Caminho do arquivo de checkpoint (por padrão, o caminho do arquivo
+            importado com a extensão `.checkpoint`).
+        '''
+        self._path = path
+        self._format = format or os.path.splitext(path)[1].lstrip('.').lower()
+        self._batch_size = batch_size
+        self._processes = processes
+        self._checkpoint = checkpoint or f'{path}.checkpoint'
+
+        if self._format not in ClientImporter.FORMATS:
+            raise ValueError(f'Formato de arquivo não suportado: {self._format}')
+
+    def run(self):
+        '''Importa todos os clientes do arquivo, retomando a partir do último
+        checkpoint quando existir.
+
+        Returns
+        -------
+        dict
+            Quantidade de linhas lidas (`lines`), de clientes importados
+            (`imported`), de clientes já cadastrados (`skipped`) e de linhas
+            inválidas (`rejected`).
+
+        Raises
+        ------
+        RuntimeError
+            Caso não seja possível carregar um lote. Os lotes anteriores
+            continuam importados e o checkpoint aponta para o lote que falhou.
+        '''
+        stats = self._load_checkpoint()
+        batches = self._batches(stats['lines'])
+
+        with Pool(self._processes) as pool:
+            pending = self._hash_batch(pool, next(batches, None))
+
+            while pending:
+                lines, rows, rejected, passwords = pending
+                hashes = passwords.get()
+                pending = self._hash_batch(pool, next(batches, None))
+
+                imported = self._load_batch([
+                    (line, name, cpf, password, balance)
+                    for (line, name, cpf, balance), password in zip(rows, hashes)
+                ])
+
+                if imported is None:
+                    raise RuntimeError(f'Não foi possível importar o lote após a linha {stats["lines"]}.')
+
+                stats['lines'] += lines
+                stats['imported'] += imported
+                stats['skipped'] += len(rows) - imported
+                stats['rejected'] += rejected
+                self._save_checkpoint(stats)
+
+                print(f'=> {stats["lines"]} linhas processadas, {stats["imported"]} clientes importados')
+        return stats
+
+    def _hash_batch(self, pool, batch):
+        '''Inicia a criptografia das senhas de um lote nos processos auxiliares.
+
+        Parameters
+        ----------
+        pool : multiprocessing.Pool
+            Processos auxiliares
+        batch : Optional[tuple]
+            Lote lido do arquivo
+
+        Returns
+        -------
+        tuple
+            O lote com as senhas substituídas pelo resultado assíncrono da
+            criptografia.
+        None
+            Caso não existam mais lotes.
+        '''
+        if batch is None:
+            return None
+
+        lines, rows, rejected, passwords = batch
+        chunksize = max(1, len(passwords) // ((self._processes or os.cpu_count() or 1) * 4))
+        return lines, rows, rejected, pool.map_async(Crypt.hash, passwords, chunksize)
+
+    def _batches(self, skip):
+        '''Lê o arquivo em lotes, ignorando as linhas já importadas.
+
+        Parameters
+        ----------
+        skip : int
+            Quantidade de linhas já processadas em uma importação anterior
+
+        Yields
+        ------
+        tuple
+            Quantidade de linhas lidas, linhas válidas `(linha, nome, CPF,
+            saldo)`, quantidade de linhas inválidas e as senhas das linhas
+            válidas.
+        '''
+        lines, rows, rejected, passwords = 0, [], 0, []
+
+        for line, record in enumerate(self._records(), start=1):
+            if line <= skip:
+                continue
+
+            lines += 1
+            row = ClientImporter._parse(record)
+
+            if row is None:
+                print(f'=> Registro {line} inválido, ignorado')
+                rejected += 1
+            else:
+                name, cpf, password, balance = row
+                rows.append((line, name, cpf, balance))
+                passwords.append(password)
+
+            if lines >= self._batch_size:
+                yield lines, rows, rejected, passwords
+                lines, rows, rejected, passwords = 0, [], 0, []
+
+        if lines:
+            yield lines, rows, rejected, passwords
+
+    def _records(self):
+        '''Percorre os registros do arquivo.
+
+        Yields
+        ------
+        dict
+            Cada registro do arquivo.
+        '''
+        with open(self._path, newline='', encoding='utf-8') as file:
+            if self._format == 'csv':
+                yield from csv.DictReader(file)
+                return
+
+            for text in file:
+                try:
+                    yield json.loads(text) if text.strip() else None
+                except ValueError:
+                    yield None
+
+    @staticmethod
+    def _parse(record):
+        '''Valida e normaliza um registro do arquivo.
+
+        Parameters
+        ----------
+        record : Optional[dict]
+            Registro lido do arquivo
+
+        Returns
+        -------
+        tuple
+            Nome, CPF (apenas dígitos), senha e saldo inicial.
+        None
+            Caso o registro seja inválido.
+        '''
+        if not isinstance(record, dict):
+            return None
+
+        name = str(record.get('name') or '').strip()
+        cpf = ''.join(filter(str.isdigit, str(record.get('cpf') or '')))
+        password = str(record.get('password') or '')
+
+        try:
+            balance = float(record.get('balance') or 0)
+        except (TypeError, ValueError):
+            return None
+
+        if not name or len(name) > 150 or len(cpf) != 11 or not password or balance < 0:
+            return None
+        return name, cpf, password, balance
+
+    def _load_batch(self, rows):
+        '''Carrega um lote de clientes já com as senhas criptografadas.
+
+        Parameters
+        ----------
+        rows : list[tuple]
+            Linhas `(linha, nome, CPF, senha, saldo)`
+
+        Returns
+        -------
+        int
+            Quantidade de clientes importados.
+        None
+            Caso não seja possível carregar o lote.
+        '''
+        if not rows:
+            return 0
+
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        buffer.seek(0)
+
+        now = datetime.now()
+
+        if not History.ensure_partition(now):
+            return None
+
+        with bank_db.transaction() as transaction:
+            bank_db.run_query(f'''CREATE TEMP TABLE {ClientImporter._staging_table} (
+                line INTEGER,
+                name VARCHAR(150),
+                cpf VARCHAR(11),
+                password VARCHAR(100),
+                balance FLOAT
+            ) ON COMMIT DROP;''')
+
+            if transaction.failed:
+                return None
+
+            columns = ['line', 'name', 'cpf', 'password', 'balance']
+
+            if not bank_db.copy_from(ClientImporter._staging_table, buffer, columns):
+                transaction.rollback()
+                return None
+
+            result = bank_db.run_query(f'''WITH staged AS (
+                    SELECT DISTINCT ON (cpf) name, cpf, password, balance
+                    FROM {ClientImporter._staging_table}
+                    ORDER BY cpf, line
+                ), new_clients AS (
+                    INSERT INTO {Client.table_name} (name, cpf, password)
+                    SELECT name, cpf, password FROM staged
+                    ON CONFLICT (cpf) DO NOTHING
+                    RETURNING id, cpf
+                ), new_accounts AS (
+                    INSERT INTO {Account.table_name} (id, balance, version)
+                    SELECT new_clients.id, staged.balance, 1
+                    FROM new_clients JOIN staged USING (cpf)
+                    RETURNING id, balance
+                ), opening AS (
+                    INSERT INTO {Journal.entries_table} (type)
+                    SELECT %s WHERE EXISTS (SELECT 1 FROM new_accounts WHERE balance <> 0)
+                    RETURNING id
+                ), opening_postings AS (
+                    INSERT INTO {Journal.postings_table} (entry_id, account_id, amount)
+                    SELECT opening.id, new_accounts.id, new_accounts.balance
+                    FROM opening, new_accounts
+                    WHERE new_accounts.balance <> 0
+                    UNION ALL
+                    SELECT opening.id, NULL, -SUM(new_accounts.balance)
+                    FROM opening, new_accounts
+                    GROUP BY opening.id
+                ), opening_stats AS (
+                    INSERT INTO {DailyAccountStats.table_name} (account_id, day, type, count, total)
+                    SELECT id, %s::DATE, %s, 1, balance FROM new_accounts
+                )
+                INSERT INTO {History.table_name} (type, timestamp, account_id, amount, balance_after, sequence)
+                SELECT %s, %s, id, balance, balance, 1 FROM new_accounts
+                RETURNING account_id
+            ;''', [Journal.OPENING, now, History.OPENING, History.OPENING, now])
+
+            if result is None:
+                transaction.rollback()
+                return None
+        return None if transaction.failed else len(result)
+
+    def _load_checkpoint(self):
+        '''Lê o checkpoint de uma importação anterior do mesmo arquivo.
+
+        Returns
+        -------
+        dict
+            Contadores da importação.
+        '''
+        stats = {'lines': 0, 'imported': 0, 'skipped': 0, 'rejected': 0}
+
+        try:
+            with open(self._checkpoint, encoding='utf-8') as file:
+                checkpoint = json.load(file)
+        except (OSError, ValueError):
+            return stats
+
+        if checkpoint.get('source') != os.path.abspath(self._path):
+            return stats
+
+        print(f'=> Retomando a importação após a linha {checkpoint.get("lines", 0)}')
+        stats.update({key: int(checkpoint.get(key, 0)) for key in stats})
+        return stats
+
+    def _save_checkpoint(self, stats):
+        '''Grava o checkpoint da importação de forma atômica.
+
+        Parameters
+        ----------
+        stats : dict
+            Contadores da importação
+        '''
+        temporary = f'{self._checkpoint}.tmp'
+
+        with open(temporary, 'w', encoding='utf-8') as file:
+            json.dump({'source': os.path.abspath(self._path), **stats}, file)
+
+        os.replace(temporary, self._checkpoint)
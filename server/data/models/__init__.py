@@ -1,3 +1,7 @@
 from .client import Client
+from .account_slot import AccountSlot
 from .account import Account
 from .history import History
+from .idempotency_key import IdempotencyKey
+from .journal import Journal
+from .daily_account_stats import DailyAccountStats
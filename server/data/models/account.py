@@ -1,5 +1,6 @@
 from data.db import bank_db
 from .history import History
+from .account_slot import AccountSlot
 
 
 class Account:
@@ -15,6 +16,8 @@ class Account:
         Saldo da conta
     balance_fmt : str
         Saldo da conta formatado em reais
+    version : int
+        Versão da conta, incrementada a cada registro de transação gravado
     history : list[History]
         Obtém o histórico de transações da conta bancária atual
 
@@ -31,19 +34,24 @@ class Account:
         Persiste os atributos do objeto no banco de dados
     format_money(amount):
         Formata um valor em reais
+    format_code(identifier):
+        Formata o número de uma conta a partir do ID
     migrate():
         Cria a tabela de contas bancárias no banco de dados
     get(identifier):
         Obtém a instância de uma conta a partir do ID
+    advance_versions(counts):
+        Reserva as próximas versões das contas movimentadas por uma operação
     '''
     __slots__ = [
         '_id',
         '_balance',
+        '_version',
     ]
 
     table_name = 'accounts'
 
-    def __init__(self, owner_id, balance=0.0):
+    def __init__(self, owner_id, balance=0.0, version=0):
         '''
         Parameters
         ----------
@@ -51,9 +59,12 @@ class Account:
             ID do cliente dono da conta.
         balance : float
             Saldo bancário.
+        version : int
+            Versão da conta.
         '''
         self._id = owner_id
         self._balance = balance
+        self._version = version
     
     @property
     def id(self):
@@ -75,7 +86,7 @@ class Account:
         str
             Número da conta formatado.
         '''
-        return str(self._id).zfill(4)
+        return Account.format_code(self._id)
     
     @property
     def balance(self):
@@ -98,6 +109,19 @@ class Account:
             Saldo formato em reais (R$).
         '''
         return Account.format_money(self._balance)
+
+    @property
+    def version(self):
+        '''Versão da conta, incrementada a cada novo registro no histórico. É
+        também a sequência do último registro da conta, então permite
+        verificar se o histórico mudou sem consultá-lo.
+
+        Returns
+        -------
+        int
+            Versão da conta.
+        '''
+        return self._version
     
     @property
     def history(self):
@@ -193,7 +217,11 @@ class Account:
         }
 
         if Account.get(self._id):
+            data['version'] = self._version + 1
             result = bank_db.update(Account.table_name, 'id=%s', data, [self._id])
+
+            if result:
+                self._version += 1
             return bool(result)
 
         result = bank_db.insert(Account.table_name, data)
@@ -219,6 +247,22 @@ class Account:
         '''
         return f'R$ {float(amount):.2f}'
 
+    @staticmethod
+    def format_code(identifier):
+        '''Formata o número de uma conta a partir do ID.
+
+        Parameters
+        ----------
+        identifier : int
+            ID da conta bancária
+
+        Returns
+        -------
+        str
+            Número da conta formatado.
+        '''
+        return str(identifier).zfill(4)
+
     @staticmethod
     def migrate():
         '''Cria a tabela de contas bancárias no banco de dados.
@@ -226,15 +270,22 @@ class Account:
         bank_db.create_table(Account.table_name, f'''
 			id INTEGER PRIMARY KEY,
             balance FLOAT NOT NULL DEFAULT 0,
+            version BIGINT NOT NULL DEFAULT 0,
+            slots SMALLINT NOT NULL DEFAULT 0,
 
             FOREIGN KEY (id)
                 REFERENCES clients (id)
                 ON UPDATE CASCADE ON DELETE CASCADE
         ''')
+        bank_db.run_query(f'''ALTER TABLE {Account.table_name}
+            ADD COLUMN IF NOT EXISTS version BIGINT NOT NULL DEFAULT 0,
+            ADD COLUMN IF NOT EXISTS slots SMALLINT NOT NULL DEFAULT 0
+        ;''')
 
     @staticmethod
     def get(identifier):
-        '''Obtém a instância de uma conta a partir do ID.
+        '''Obtém a instância de uma conta a partir do ID. O saldo inclui os
+        saldos parciais da conta (`AccountSlot`), caso existam.
 
         Parameters
         ----------
@@ -248,5 +299,51 @@ class Account:
         None
             Caso não seja encontrada uma conta.
         '''
-        result = bank_db.search(Account.table_name, f'id=%s', params=[identifier], limit=1)
-        return Account(result[0], result[1]) if result else None
+        attr = f'id, {AccountSlot.balance_sql(Account.table_name)}, version'
+        result = bank_db.search(Account.table_name, f'id=%s', attr=attr, params=[identifier], limit=1)
+        return Account(*result) if result else None
+
+    @staticmethod
+    def advance_versions(counts):
+        '''Reserva as próximas versões das contas movimentadas por uma
+        operação, uma para cada novo registro de transação, e obtém o saldo
+        atual delas. Deve ser chamado dentro de uma transação, depois de o
+        saldo ser alterado.
+
+        As contas são bloqueadas em ordem de ID até o fim da transação, então
+        as operações em uma conta recebem versões na ordem em que são
+        confirmadas, inclusive nas contas com saldos parciais, cujos créditos
+        não bloqueiam a conta. O saldo é lido após o bloqueio e inclui todas as
+        operações confirmadas antes.
+
+        Parameters
+        ----------
+        counts : dict[int, int]
+            Quantidade de versões reservadas para cada conta, indexada pelo ID
+
+        Returns
+        -------
+        dict[int, tuple[float, int]]
+            Saldo e última versão reservada de cada conta, indexados pelo ID.
+        None
+            Caso alguma conta não seja encontrada.
+        '''
+        if bank_db.run_query(f'''SELECT id FROM {Account.table_name}
+            WHERE id = ANY(%s)
+            ORDER BY id
+            FOR NO KEY UPDATE
+        ;''', [sorted(counts)]) is None:
+            return None
+
+        result = bank_db.run_values(f'''UPDATE {Account.table_name}
+            SET version = {Account.table_name}.version + counts.count
+            FROM (VALUES %s) AS counts (id, count)
+            WHERE {Account.table_name}.id = counts.id
+            RETURNING {Account.table_name}.id,
+                {AccountSlot.balance_sql(Account.table_name)},
+                {Account.table_name}.version
+        ;''', list(counts.items()), template='(%s::INTEGER, %s::BIGINT)')
+
+        if result is None or len(result) != len(counts):
+            return None
+        return {account_id: (balance, version) for account_id, balance, version in result}
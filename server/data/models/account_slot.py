@@ -0,0 +1,200 @@
+from data.db import bank_db
+
+
+class AccountSlot:
+    '''Classe modelo que realiza as operações na tabela de saldos parciais
+    das contas bancárias.
+
+    Uma conta com muitas movimentações simultâneas (por exemplo, a conta de
+    um lojista que recebe milhares de transferências por minuto) pode ter o
+    seu saldo dividido em vários saldos parciais. Cada crédito altera apenas
+    um saldo parcial sorteado, então créditos simultâneos na mesma conta não
+    aguardam o bloqueio de uma única linha. Os débitos consomem os saldos
+    parciais necessários.
+
+    O saldo da conta é a soma do saldo da tabela de contas com os saldos
+    parciais. A versão da conta fica apenas na tabela de contas e é
+    incrementada quando os registros de transações são gravados.
+
+    Methods
+    -------
+    migrate():
+        Cria a tabela de saldos parciais no banco de dados
+    balance_sql(account):
+        SQL do saldo total de uma conta
+    configure(account_id, slots):
+        Define a quantidade de saldos parciais de uma conta
+    debit(account_id, amount):
+        Debita uma quantia dos saldos parciais de uma conta
+    '''
+    table_name = 'account_slots'
+
+    MAX_SLOTS = 64
+
+    @staticmethod
+    def migrate():
+        '''Cria a tabela de saldos parciais no banco de dados. Uma tabela
+        antiga, com a versão de cada saldo parcial, tem as versões somadas à
+        versão da conta antes de a coluna ser removida.
+        '''
+        with bank_db.transaction():
+            bank_db.create_table(AccountSlot.table_name, '''
+                account_id INTEGER NOT NULL,
+                slot SMALLINT NOT NULL,
+                balance FLOAT NOT NULL DEFAULT 0 CHECK (balance >= 0),
+
+                PRIMARY KEY (account_id, slot),
+                FOREIGN KEY (account_id)
+                    REFERENCES accounts (id)
+                    ON UPDATE CASCADE ON DELETE CASCADE
+            ''')
+
+            versioned = bank_db.run_query('''SELECT 1 FROM information_schema.columns
+                WHERE table_schema = current_schema() AND table_name = %s AND column_name = 'version'
+            ;''', [AccountSlot.table_name])
+
+            if versioned:
+                bank_db.run_query(f'''UPDATE accounts
+                    SET version = accounts.version + slots.version
+                    FROM (
+                        SELECT account_id, SUM(version) AS version
+                        FROM {AccountSlot.table_name}
+                        GROUP BY account_id
+                    ) slots
+                    WHERE accounts.id = slots.account_id
+                ;''')
+                bank_db.run_query(f'ALTER TABLE {AccountSlot.table_name} DROP COLUMN version;')
+
+    @staticmethod
+    def balance_sql(account):
+        '''SQL do saldo total de uma conta: o saldo da tabela de contas somado
+        aos saldos parciais.
+
+        Parameters
+        ----------
+        account : str
+            Nome (ou apelido) da tabela de contas na consulta
+
+        Returns
+        -------
+        str
+            Expressão SQL do saldo total.
+        '''
+        return f'''({account}.balance + COALESCE((
+            SELECT SUM(balance) FROM {AccountSlot.table_name}
+            WHERE account_id = {account}.id
+        ), 0))'''
+
+    @staticmethod
+    def configure(account_id, slots):
+        '''Define a quantidade de saldos parciais de uma conta. Os saldos
+        parciais existentes são reunidos no saldo da conta e, caso `slots`
+        seja maior que zero, o saldo é movido para os novos saldos parciais.
+        Deve ser chamado dentro de uma transação.
+
+        Parameters
+        ----------
+        account_id : int
+            ID da conta bancária
+        slots : int
+            Quantidade de saldos parciais (zero desativa a divisão)
+
+        Returns
+        -------
+        bool
+            Booleano indicando se a operação foi concluída.
+        '''
+        if not 0 <= slots <= AccountSlot.MAX_SLOTS:
+            return False
+
+        merged = bank_db.run_query(f'''UPDATE accounts
+            SET balance = {AccountSlot.balance_sql('accounts')},
+                slots = %s
+            WHERE id = %s
+            RETURNING balance
+        ;''', [slots, account_id])
+
+        if not merged:
+            return False
+
+        if bank_db.run_query(f'''DELETE FROM {AccountSlot.table_name}
+            WHERE account_id = %s
+        ;''', [account_id]) is None:
+            return False
+
+        if not slots:
+            return True
+
+        rows = [(account_id, slot, merged[0][0] if slot == 0 else 0.0) for slot in range(slots)]
+        result = bank_db.run_values(f'''INSERT INTO {AccountSlot.table_name}
+            (account_id, slot, balance)
+            VALUES %s
+            RETURNING slot
+        ;''', rows, template='(%s::INTEGER, %s::SMALLINT, %s::FLOAT)')
+
+        if not result:
+            return False
+
+        return bool(bank_db.run_query('''UPDATE accounts
+            SET balance = 0
+            WHERE id = %s
+            RETURNING id
+        ;''', [account_id]))
+
+    @staticmethod
+    def debit(account_id, amount):
+        '''Debita uma quantia dos saldos parciais de uma conta, começando pelos
+        maiores. Os saldos parciais são bloqueados sempre na mesma ordem, então
+        débitos simultâneos na conta não entram em impasse. Nada é debitado se
+        os saldos parciais não cobrirem a quantia inteira ou se algum deles
+        ficar negativo. Deve ser chamado dentro de uma transação.
+
+        Parameters
+        ----------
+        account_id : int
+            ID da conta bancária
+        amount : float
+            Quantia a ser debitada
+
+        Returns
+        -------
+        bool
+            Booleano indicando se a conta possui saldo suficiente e a quantia
+            foi debitada.
+        '''
+        rows = bank_db.run_query(f'''SELECT slot, balance
+            FROM {AccountSlot.table_name}
+            WHERE account_id = %s
+            ORDER BY slot
+            FOR UPDATE
+        ;''', [account_id])
+
+        if not rows:
+            return False
+
+        claims = []
+        remaining = amount
+
+        for slot, balance in sorted(rows, key=lambda row: (-row[1], row[0])):
+            if remaining <= 0:
+                break
+
+            claim = min(balance, remaining)
+
+            if claim > 0:
+                claims.append((account_id, slot, claim))
+                remaining -= claim
+
+        if remaining > 0 or not claims:
+            return False
+
+        result = bank_db.run_values(f'''UPDATE {AccountSlot.table_name}
+            SET balance = {AccountSlot.table_name}.balance - claims.amount
+            FROM (VALUES %s) AS claims (account_id, slot, amount)
+            WHERE {AccountSlot.table_name}.account_id = claims.account_id
+                AND {AccountSlot.table_name}.slot = claims.slot
+                AND {AccountSlot.table_name}.balance - claims.amount >= 0
+            RETURNING {AccountSlot.table_name}.slot
+        ;''', claims, template='(%s::INTEGER, %s::SMALLINT, %s::FLOAT)')
+
+        return bool(result) and len(result) == len(claims)
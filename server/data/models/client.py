@@ -29,6 +29,8 @@ class Client:
         Obtém a instância de um cliente a partir do ID ou CPF
     getAll()
         Obtém uma listagem de todos os clientes
+    iterAll(itersize=2000)
+        Percorre todos os clientes sob demanda
     '''
     __slots__ = [
         '_id',
@@ -202,3 +204,21 @@ class Client:
         '''
         result = bank_db.search(Client.table_name) or []
         return list(map(lambda row: Client(row[1], row[2], row[3], row[0]), result))
+
+    @staticmethod
+    def iterAll(itersize=2000):
+        '''Percorre todos os clientes sob demanda, com consumo de memória
+        constante.
+
+        Parameters
+        ----------
+        itersize : int
+            Quantidade de clientes buscados no banco de dados a cada lote
+
+        Yields
+        ------
+        Client
+            Cada cliente cadastrado.
+        '''
+        for row in bank_db.iter_search(Client.table_name, sql='ORDER BY id', itersize=itersize):
+            yield Client(row[1], row[2], row[3], row[0])
@@ -0,0 +1,162 @@
+from datetime import time, timedelta
+
+from data.db import bank_db
+from .account import Account
+from .history import History
+
+
+class DailyAccountStats:
+    '''Classe modelo que realiza as operações na tabela de totais diários das
+    contas bancárias.
+
+    Cada linha guarda a quantidade e a soma das quantias dos registros de
+    transações de um tipo, em uma conta e em um dia. Os totais são
+    atualizados na mesma transação que grava os registros, então os resumos
+    por período consultam uma linha por dia e tipo em vez de percorrer o
+    histórico.
+
+    Os totais de cada dia e tipo são divididos em partes (`bucket`), uma para
+    cada saldo parcial da conta (`AccountSlot`). Cada gravação soma em uma
+    parte sorteada, então as transações simultâneas de uma conta com muitas
+    movimentações não aguardam o bloqueio de uma única linha, e os resumos
+    somam as partes.
+
+    Methods
+    -------
+    migrate():
+        Cria a tabela de totais diários no banco de dados
+    add(logs):
+        Soma novos registros de transações aos totais diários
+    summary(account_id, start=None, end=None, group_by=None):
+        Obtém os totais de uma conta por tipo em um período
+    '''
+    table_name = 'daily_account_stats'
+
+    GROUPS = ('day', 'month')
+
+    @staticmethod
+    def migrate():
+        '''Cria a tabela de totais diários no banco de dados. Quando a tabela é
+        criada, os totais são calculados a partir do histórico existente. Uma
+        tabela antiga, sem as partes, recebe a coluna `bucket`.
+        '''
+        with bank_db.transaction():
+            bank_db.create_table(DailyAccountStats.table_name, '''
+                account_id INTEGER NOT NULL,
+                day DATE NOT NULL,
+                type VARCHAR(30) NOT NULL,
+                bucket SMALLINT NOT NULL DEFAULT 0,
+                count INTEGER NOT NULL DEFAULT 0,
+                total FLOAT NOT NULL DEFAULT 0,
+
+                PRIMARY KEY (account_id, day, type, bucket),
+                FOREIGN KEY (account_id)
+                    REFERENCES accounts (id)
+                    ON UPDATE CASCADE ON DELETE CASCADE
+            ''')
+
+            sharded = bank_db.run_query('''SELECT 1 FROM information_schema.columns
+                WHERE table_schema = current_schema() AND table_name = %s AND column_name = 'bucket'
+            ;''', [DailyAccountStats.table_name])
+
+            if sharded is not None and not sharded:
+                bank_db.run_query(f'''ALTER TABLE {DailyAccountStats.table_name}
+                    ADD COLUMN bucket SMALLINT NOT NULL DEFAULT 0,
+                    DROP CONSTRAINT {DailyAccountStats.table_name}_pkey,
+                    ADD PRIMARY KEY (account_id, day, type, bucket)
+                ;''')
+
+            bank_db.run_query(f'''INSERT INTO {DailyAccountStats.table_name}
+                (account_id, day, type, count, total)
+                SELECT account_id, timestamp::DATE, type, COUNT(*), COALESCE(SUM(amount), 0)
+                FROM {History.table_name}
+                WHERE NOT EXISTS (SELECT 1 FROM {DailyAccountStats.table_name})
+                GROUP BY account_id, timestamp::DATE, type
+            ;''')
+
+    @staticmethod
+    def add(logs):
+        '''Soma novos registros de transações aos totais diários com um único
+        comando, cada total em uma parte sorteada entre os saldos parciais da
+        conta. Deve ser chamado na mesma transação que grava os registros.
+
+        Parameters
+        ----------
+        logs : list[History]
+            Registros de transações já salvos
+
+        Returns
+        -------
+        bool
+            Booleano indicando se a operação foi concluída.
+        '''
+        totals = {}
+
+        for log in logs:
+            key = (log.account_id, log.timestamp.date(), log.type)
+            count, total = totals.get(key, (0, 0.0))
+            totals[key] = (count + 1, total + (log.amount or 0.0))
+
+        if not totals:
+            return True
+
+        result = bank_db.run_values(f'''INSERT INTO {DailyAccountStats.table_name}
+            (account_id, day, type, bucket, count, total)
+            SELECT totals.account_id, totals.day, totals.type,
+                FLOOR(RANDOM() * GREATEST(accounts.slots, 1))::SMALLINT,
+                totals.count, totals.total
+            FROM (VALUES %s) AS totals (account_id, day, type, count, total)
+            JOIN {Account.table_name} accounts ON accounts.id = totals.account_id
+            ON CONFLICT (account_id, day, type, bucket) DO UPDATE
+            SET count = {DailyAccountStats.table_name}.count + EXCLUDED.count,
+                total = {DailyAccountStats.table_name}.total + EXCLUDED.total
+            RETURNING account_id
+        ;''', [(*key, count, total) for key, (count, total) in sorted(totals.items())],
+            template='(%s::INTEGER, %s::DATE, %s, %s::INTEGER, %s::FLOAT)')
+
+        return result is not None and len(result) == len(totals)
+
+    @staticmethod
+    def summary(account_id, start=None, end=None, group_by=None):
+        '''Obtém a quantidade e a soma das quantias dos registros de uma conta
+        por tipo em um período. O período é considerado em dias inteiros.
+
+        Parameters
+        ----------
+        account_id : int
+            ID da conta bancária
+        start : Optional[datetime]
+            Início do período (inclusivo)
+        end : Optional[datetime]
+            Fim do período (exclusivo)
+        group_by : Optional[str]
+            Separa os totais por `'day'` (dia) ou `'month'` (mês); por padrão,
+            os totais são de todo o período.
+
+        Returns
+        -------
+        list[tuple]
+            Linhas `(início do dia ou mês, tipo, quantidade, soma)`, com o
+            início igual a `None` quando os totais não são separados.
+        None
+            Caso não seja possível realizar a consulta.
+        '''
+        query = ['account_id = %s']
+        params = [account_id]
+
+        if start:
+            query.append('day >= %s')
+            params.append(start.date())
+
+        if end:
+            query.append('day < %s')
+            params.append(end.date() if end.time() == time.min else end.date() + timedelta(days=1))
+
+        period = f"DATE_TRUNC('{group_by}', day)::DATE" if group_by in DailyAccountStats.GROUPS else 'NULL::DATE'
+
+        return bank_db.run_query(f'''SELECT {period} AS period, type, SUM(count), SUM(total)
+            FROM {DailyAccountStats.table_name}
+            WHERE {' AND '.join(query)}
+            GROUP BY period, type
+            ORDER BY period, type
+        ;''', params)
@@ -1,39 +1,124 @@
-from datetime import datetime
+from datetime import date, datetime
 
 from data.db import bank_db
 
 
 class History:
+    '''Classe modelo que realiza as operações na tabela de histórico de
+    transações.
+
+    Os registros guardam os dados da transação em colunas tipadas (quantia,
+    conta de contrapartida e saldo após a operação). O texto descritivo é
+    montado apenas na borda da API, então totais e filtros podem ser feitos
+    diretamente em SQL.
+
+    Attributes
+    ----------
+    id : int
+        ID do registro da transação
+    type : str
+        Tipo de transação
+    timestamp : datetime
+        Data e hora do registro da transação
+    message : Optional[str]
+        Descrição livre da transação (usada apenas por registros antigos)
+    account_id : int
+        ID da conta bancária
+    amount : Optional[float]
+        Quantia movimentada na transação
+    counterparty_account_id : Optional[int]
+        ID da conta de contrapartida de uma transferência
+    balance_after : Optional[float]
+        Saldo da conta após a transação
+    sequence : Optional[int]
+        Posição do registro entre os registros da conta, na ordem em que as
+        transações foram confirmadas
+
+    Methods
+    -------
+    save()
+        Persiste os atributos do objeto no banco de dados
+    save_many(logs)
+        Insere vários registros de transações com um único comando
+    migrate():
+        Cria a tabela de histórico de transações no banco de dados
+    get(identifier)
+        Obtém a instância de um registro de transação a partir do ID
+    ensure_partition(moment)
+        Cria a partição mensal que armazena um determinado momento
+    ensure_partitions(moment=None)
+        Cria as partições do mês atual e dos próximos meses
+    detach_partition(year, month)
+        Desanexa a partição mensal de um período
+    getAllByAccountId(account_id, start=None, end=None, since=None)
+        Obtém uma listagem dos registros de transações da conta
+    iterAllByAccountId(account_id, start=None, end=None, itersize=2000)
+        Percorre os registros de transações da conta sob demanda
+    getPageByAccountId(account_id, limit, before=None, start=None, end=None)
+        Obtém uma página dos registros de transações da conta, dos mais
+        recentes para os mais antigos
+    period_query(account_id, start=None, end=None)
+        Monta o filtro de busca dos registros de uma conta em um período
+    '''
     __slots__ = [
         '_id',
         '_type',
         '_timestamp',
         '_message',
         '_account_id',
+        '_amount',
+        '_counterparty_account_id',
+        '_balance_after',
+        '_sequence',
     ]
 
     table_name = 'history'
+    partitions_ahead = 2
+    _partitions = set()
+    legacy_columns = 'id, type, timestamp, message, account_id, amount, counterparty_account_id, balance_after'
+    columns = f'{legacy_columns}, sequence'
+
+    OPENING = 'ABERTURA DA CONTA'
+    WITHDRAW = 'SAQUE'
+    DEPOSIT = 'DEPÓSITO'
+    TRANSFER_SENT = 'TRANSFERÊNCIA ENVIADA'
+    TRANSFER_RECEIVED = 'TRANSFERÊNCIA RECEBIDA'
 
-    def __init__(self, type, message, account_id, timestamp=datetime.today(), id=None):
+    def __init__(self, type, account_id, amount=None, balance_after=None, counterparty_account_id=None,
+            message=None, timestamp=None, id=None, sequence=None):
         '''
         Parameters
         ----------
         type : str
             Tipo de transação
-        message : str
-            Descrição da transação
-        account_id : str
+        account_id : int
             ID da conta bancária
+        amount : Optional[float]
+            Quantia movimentada na transação
+        balance_after : Optional[float]
+            Saldo da conta após a transação
+        counterparty_account_id : Optional[int]
+            ID da conta de contrapartida de uma transferência
+        message : Optional[str]
+            Descrição livre da transação
         timestamp : Optional[datetime]
-            Data e hora do registro da transação
+            Data e hora do registro da transação (por padrão, o momento em que
+            o registro é salvo).
         id : Optional[int, None]
             ID do registro da transação
+        sequence : Optional[int]
+            Posição do registro entre os registros da conta (por padrão,
+            definida pela operação ao salvar o registro).
         '''
         self._id = id
         self._type = type
         self._timestamp = timestamp
         self._message = message
         self._account_id = account_id
+        self._amount = amount
+        self._counterparty_account_id = counterparty_account_id
+        self._balance_after = balance_after
+        self._sequence = sequence
 
     @property
     def id(self):
@@ -70,12 +155,14 @@ class History:
 
     @property
     def message(self):
-        '''Descrição da transação.
+        '''Descrição livre da transação.
 
         Returns
         -------
         str
             Descrição da transação.
+        None
+            Caso a transação não tenha descrição livre.
         '''
         return self._message
 
@@ -89,7 +176,7 @@ class History:
             Descrição da transação
         '''
         self._message = message
-    
+
     @property
     def account_id(self):
         '''ID da conta bancária.
@@ -101,6 +188,82 @@ class History:
         '''
         return self._account_id
 
+    @property
+    def amount(self):
+        '''Quantia movimentada na transação.
+
+        Returns
+        -------
+        float
+            Quantia movimentada.
+        None
+            Caso o registro não tenha a quantia (registros antigos).
+        '''
+        return self._amount
+
+    @property
+    def counterparty_account_id(self):
+        '''ID da conta de contrapartida de uma transferência.
+
+        Returns
+        -------
+        int
+            ID da conta de contrapartida.
+        None
+            Caso a transação não seja uma transferência.
+        '''
+        return self._counterparty_account_id
+
+    @property
+    def balance_after(self):
+        '''Saldo da conta após a transação.
+
+        Returns
+        -------
+        float
+            Saldo da conta após a transação.
+        None
+            Caso o registro não tenha o saldo (registros antigos).
+        '''
+        return self._balance_after
+
+    @balance_after.setter
+    def balance_after(self, balance_after):
+        '''Modifica o saldo da conta após a transação.
+
+        Parameters
+        ----------
+        balance_after : float
+            Saldo da conta após a transação
+        '''
+        self._balance_after = balance_after
+
+    @property
+    def sequence(self):
+        '''Posição do registro entre os registros da conta, igual à versão da
+        conta reservada para ele. Os registros de uma conta recebem posições
+        crescentes na ordem em que as transações são confirmadas.
+
+        Returns
+        -------
+        int
+            Posição do registro.
+        None
+            Caso o registro ainda não tenha sido salvo.
+        '''
+        return self._sequence
+
+    @sequence.setter
+    def sequence(self, sequence):
+        '''Modifica a posição do registro entre os registros da conta.
+
+        Parameters
+        ----------
+        sequence : int
+            Posição do registro
+        '''
+        self._sequence = sequence
+
     def save(self):
         '''Persiste os atributos do objeto no banco de dados.
 
@@ -109,11 +272,18 @@ class History:
         bool
             Booleano indicando se a operação foi concluída.
         '''
+        if self._timestamp is None:
+            self._timestamp = datetime.now()
+
         data = {
             'type': self._type,
             'timestamp': self._timestamp,
             'message': self._message,
-            'account_id': self._account_id
+            'account_id': self._account_id,
+            'amount': self._amount,
+            'counterparty_account_id': self._counterparty_account_id,
+            'balance_after': self._balance_after,
+            'sequence': self._sequence,
         }
 
         if bool(self._id) and History.get(self._id):
@@ -121,27 +291,323 @@ class History:
             return bool(result)
 
         result = bank_db.insert(History.table_name, data)
-        
+
         if result:
             self._id = result[0]
             return True
         return False
 
+    @staticmethod
+    def save_many(logs):
+        '''Insere vários registros de transações novos com um único comando.
+
+        Parameters
+        ----------
+        logs : list[History]
+            Registros de transações ainda não salvos
+
+        Returns
+        -------
+        bool
+            Booleano indicando se a operação foi concluída.
+        '''
+        now = datetime.now()
+        columns = ['type', 'timestamp', 'message', 'account_id', 'amount', 'counterparty_account_id', 'balance_after', 'sequence']
+        rows = []
+
+        for log in logs:
+            if log._timestamp is None:
+                log._timestamp = now
+
+            rows.append((
+                log._type,
+                log._timestamp,
+                log._message,
+                log._account_id,
+                log._amount,
+                log._counterparty_account_id,
+                log._balance_after,
+                log._sequence,
+            ))
+
+        result = bank_db.insert_many(History.table_name, columns, rows)
+
+        if result is None or len(result) != len(logs):
+            return False
+
+        for log, row in zip(logs, result):
+            log._id = row[0]
+        return True
+
     @staticmethod
     def migrate():
         '''Cria a tabela de histórico de transações no banco de dados.
+
+        A tabela é particionada por mês através da coluna `timestamp`, então
+        consultas por período acessam apenas as partições do intervalo e
+        partições antigas podem ser desanexadas e arquivadas. Uma tabela antiga
+        não particionada é convertida, recebendo antes as colunas tipadas com a
+        quantia e a conta de contrapartida extraídas das descrições.
+        '''
+        legacy = bank_db.table_kind(History.table_name) == 'r'
+
+        with bank_db.transaction():
+            if legacy:
+                History._upgrade_legacy_table()
+                bank_db.run_query(f'ALTER TABLE {History.table_name} RENAME TO {History.table_name}_legacy;')
+
+            bank_db.create_table(History.table_name, f'''
+				id SERIAL,
+                type VARCHAR(30) NOT NULL,
+                timestamp TIMESTAMP NOT NULL DEFAULT NOW(),
+                message VARCHAR(200),
+                account_id INTEGER NOT NULL,
+                amount FLOAT,
+                counterparty_account_id INTEGER,
+                balance_after FLOAT,
+                sequence BIGINT,
+
+                PRIMARY KEY (id, timestamp),
+                FOREIGN KEY (account_id)
+                    REFERENCES accounts (id)
+                    ON UPDATE CASCADE ON DELETE CASCADE,
+                FOREIGN KEY (counterparty_account_id)
+                    REFERENCES accounts (id)
+                    ON UPDATE CASCADE ON DELETE SET NULL
+            ''', 'PARTITION BY RANGE (timestamp)')
+
+            bank_db.run_query(f'''CREATE TABLE IF NOT EXISTS {History.table_name}_default
+                PARTITION OF {History.table_name} DEFAULT
+            ;''')
+
+            if legacy:
+                History._copy_legacy_table()
+
+            History._add_sequences()
+            History.ensure_partitions()
+
+            bank_db.run_query(f'''CREATE INDEX IF NOT EXISTS {History.table_name}_timestamp_brin_idx
+                ON {History.table_name} USING BRIN (timestamp)
+            ;''')
+            bank_db.run_query(f'''CREATE INDEX IF NOT EXISTS {History.table_name}_account_timestamp_idx
+                ON {History.table_name} (account_id, timestamp)
+            ;''')
+            bank_db.run_query(f'''CREATE INDEX IF NOT EXISTS {History.table_name}_account_sequence_idx
+                ON {History.table_name} (account_id, sequence)
+            ;''')
+
+    @staticmethod
+    def _add_sequences():
+        '''Adiciona a coluna `sequence` em uma tabela antiga e numera os
+        registros que ainda não a têm na ordem de data e hora. A versão de cada
+        conta passa a ser, no mínimo, a sequência do seu último registro.
+        '''
+        bank_db.run_query(f'ALTER TABLE {History.table_name} ADD COLUMN IF NOT EXISTS sequence BIGINT;')
+
+        if not bank_db.run_query(f'SELECT 1 FROM {History.table_name} WHERE sequence IS NULL LIMIT 1;'):
+            return
+
+        bank_db.run_query(f'''UPDATE {History.table_name}
+            SET sequence = numbered.sequence
+            FROM (
+                SELECT id, timestamp,
+                    ROW_NUMBER() OVER (PARTITION BY account_id ORDER BY timestamp, id) AS sequence
+                FROM {History.table_name}
+            ) numbered
+            WHERE {History.table_name}.id = numbered.id
+                AND {History.table_name}.timestamp = numbered.timestamp
+        ;''')
+        bank_db.run_query(f'''UPDATE accounts
+            SET version = last.sequence
+            FROM (
+                SELECT account_id, MAX(sequence) AS sequence
+                FROM {History.table_name}
+                GROUP BY account_id
+            ) last
+            WHERE accounts.id = last.account_id AND accounts.version < last.sequence
+        ;''')
+
+    @staticmethod
+    def _upgrade_legacy_table():
+        '''Adiciona as colunas tipadas na tabela antiga e extrai a quantia e a
+        conta de contrapartida das descrições dos registros.
         '''
-        bank_db.create_table(History.table_name, f'''
-			id SERIAL PRIMARY KEY,
-            type VARCHAR(30) NOT NULL,
-            timestamp TIMESTAMP NOT NULL DEFAULT NOW(),
-            message VARCHAR(200) NOT NULL,
-            account_id INTEGER NOT NULL,
+        bank_db.run_query(f'''ALTER TABLE {History.table_name}
+            ALTER COLUMN message DROP NOT NULL,
+            ADD COLUMN IF NOT EXISTS amount FLOAT,
+            ADD COLUMN IF NOT EXISTS counterparty_account_id INTEGER
+                REFERENCES accounts (id) ON UPDATE CASCADE ON DELETE SET NULL,
+            ADD COLUMN IF NOT EXISTS balance_after FLOAT
+        ;''')
 
-            FOREIGN KEY (account_id)
-                REFERENCES accounts (id)
-                ON UPDATE CASCADE ON DELETE CASCADE
-        ''')
+        bank_db.run_query(f'''UPDATE {History.table_name}
+            SET amount = substring(message FROM 'R\\$ (-?[0-9]+(\\.[0-9]+)?)')::FLOAT,
+                counterparty_account_id = (
+                    SELECT id FROM accounts
+                    WHERE id = substring(message FROM 'conta (?:destino|origem): ([0-9]+)')::INTEGER
+                )
+            WHERE amount IS NULL AND message ~ 'R\\$ -?[0-9]'
+        ;''')
+
+    @staticmethod
+    def _copy_legacy_table():
+        '''Copia os registros da tabela antiga para a tabela particionada e
+        remove a tabela antiga.
+        '''
+        legacy_table = f'{History.table_name}_legacy'
+        months = bank_db.run_query(f"SELECT DISTINCT date_trunc('month', timestamp) FROM {legacy_table};") or []
+
+        for (month,) in months:
+            History.ensure_partition(month)
+
+        bank_db.run_query(f'''INSERT INTO {History.table_name} ({History.legacy_columns})
+            SELECT {History.legacy_columns} FROM {legacy_table}
+        ;''')
+        bank_db.run_query(f'''SELECT setval(
+            pg_get_serial_sequence('{History.table_name}', 'id'),
+            COALESCE((SELECT MAX(id) FROM {History.table_name}), 0) + 1,
+            false
+        );''')
+        bank_db.run_query(f'DROP TABLE {legacy_table};')
+
+    @staticmethod
+    def partition_name(moment):
+        '''Obtém o nome da partição mensal que armazena um determinado momento.
+
+        Parameters
+        ----------
+        moment : Union[date, datetime]
+            Data ou data e hora
+
+        Returns
+        -------
+        str
+            Nome da partição.
+        '''
+        return f'{History.table_name}_y{moment.year:04d}m{moment.month:02d}'
+
+    @staticmethod
+    def ensure_partition(moment):
+        '''Cria a partição mensal que armazena um determinado momento, caso ela
+        não exista.
+
+        O comando bloqueia a tabela de histórico, então não deve ser executado
+        dentro das transações que movimentam dinheiro: as partições são
+        criadas com antecedência por `ensure_partitions()`, e os registros de
+        um mês sem partição são gravados na partição padrão. Caso a partição
+        padrão já tenha registros do mês, eles são movidos para a nova
+        partição na mesma transação.
+
+        As partições já garantidas são lembradas pelo processo após o `COMMIT`,
+        então as chamadas seguintes não acessam o banco de dados.
+
+        Parameters
+        ----------
+        moment : Union[date, datetime]
+            Data ou data e hora
+
+        Returns
+        -------
+        bool
+            Booleano indicando se a partição existe.
+        '''
+        name = History.partition_name(moment)
+
+        if name in History._partitions:
+            return True
+
+        start = date(moment.year, moment.month, 1)
+        end = History._add_months(start, 1)
+
+        with bank_db.transaction() as transaction:
+            if bank_db.table_kind(name) is None:
+                bank_db.run_query(f'''CREATE TABLE {name}
+                    (LIKE {History.table_name} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)
+                ;''')
+                bank_db.run_query(f'''WITH moved AS (
+                        DELETE FROM {History.table_name}_default
+                        WHERE timestamp >= %s AND timestamp < %s
+                        RETURNING {History.columns}
+                    )
+                    INSERT INTO {name} ({History.columns})
+                    SELECT {History.columns} FROM moved
+                ;''', [start, end])
+                bank_db.run_query(f'''ALTER TABLE {History.table_name}
+                    ATTACH PARTITION {name}
+                    FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')
+                ;''')
+
+            bank_db.on_commit(lambda: History._partitions.add(name))
+
+        return not transaction.failed
+
+    @staticmethod
+    def ensure_partitions(moment=None):
+        '''Cria as partições do mês de um momento e dos `partitions_ahead`
+        meses seguintes. Executado na migração e periodicamente pelo servidor,
+        fora das transações que movimentam dinheiro.
+
+        Parameters
+        ----------
+        moment : Optional[date]
+            Data de referência (por padrão, a data atual)
+
+        Returns
+        -------
+        bool
+            Booleano indicando se todas as partições existem.
+        '''
+        moment = moment or date.today()
+        result = True
+
+        for offset in range(History.partitions_ahead + 1):
+            month = History._add_months(moment, offset)
+
+            if not History.ensure_partition(month):
+                print(f'=> Não foi possível criar a partição {History.partition_name(month)}')
+                result = False
+        return result
+
+    @staticmethod
+    def detach_partition(year, month):
+        '''Desanexa a partição mensal de um período, mantendo-a como uma tabela
+        comum que pode ser arquivada ou removida.
+
+        Parameters
+        ----------
+        year : int
+            Ano da partição
+        month : int
+            Mês da partição
+
+        Returns
+        -------
+        bool
+            Booleano indicando se a operação foi concluída.
+        '''
+        name = History.partition_name(date(year, month, 1))
+        result = bank_db.run_query(f'ALTER TABLE {History.table_name} DETACH PARTITION {name};')
+        History._partitions.discard(name)
+        return result is not None
+
+    @staticmethod
+    def _add_months(moment, months):
+        '''Obtém o primeiro dia do mês deslocado a partir de uma data.
+
+        Parameters
+        ----------
+        moment : Union[date, datetime]
+            Data de referência
+        months : int
+            Quantidade de meses a deslocar
+
+        Returns
+        -------
+        date
+            Primeiro dia do mês resultante.
+        '''
+        index = moment.year * 12 + moment.month - 1 + months
+        return date(index // 12, index % 12 + 1, 1)
 
     @staticmethod
     def get(identifier):
@@ -159,24 +625,167 @@ class History:
         None
             Caso não seja encontrada um registro de transação.
         '''
-        result = bank_db.search(History.table_name, f'id=%s', params=[identifier], limit=1)
-        return History(result[1], result[3], result[4], result[2], result[0]) if result else None
+        result = bank_db.search(History.table_name, f'id=%s', attr=History.columns, params=[identifier], limit=1)
+        return History.from_row(result) if result else None
+
+    @staticmethod
+    def getAllByAccountId(account_id, start=None, end=None, since=None):
+        '''Obtém uma listagem dos registros de transações a partir da conta
+        bancária, opcionalmente limitada a um período.
+
+        Parameters
+        ----------
+        account_id : int
+            ID da conta bancária
+        start : Optional[datetime]
+            Início do período (inclusivo)
+        end : Optional[datetime]
+            Fim do período (exclusivo)
+        since : Optional[int]
+            Sequência do último registro já conhecido: apenas os registros
+            confirmados depois dele são obtidos.
+
+        Returns
+        -------
+        list[History]
+            Lista de registros de transações, na ordem de confirmação.
+        '''
+        query, params = History.period_query(account_id, start, end)
+
+        if since is not None:
+            query += ' AND sequence > %s'
+            params.append(since)
+
+        result = bank_db.search(History.table_name, query, attr=History.columns, sql='ORDER BY sequence, id', params=params) or []
+        return list(map(History.from_row, result))
 
     @staticmethod
-    def getAllByAccountId(account_id):
-        '''Obtém uma listagem de todos os registros de transações a partir da
-        conta bancária.
+    def iterAllByAccountId(account_id, start=None, end=None, itersize=2000):
+        '''Percorre os registros de transações da conta bancária sob demanda,
+        com consumo de memória constante, opcionalmente limitados a um período.
 
         Parameters
         ----------
         account_id : int
             ID da conta bancária
+        start : Optional[datetime]
+            Início do período (inclusivo)
+        end : Optional[datetime]
+            Fim do período (exclusivo)
+        itersize : int
+            Quantidade de registros buscados no banco de dados a cada lote
+
+        Yields
+        ------
+        History
+            Cada registro de transação da conta, em ordem cronológica.
+        '''
+        query, params = History.period_query(account_id, start, end)
+        rows = bank_db.iter_search(History.table_name, query, attr=History.columns, sql='ORDER BY timestamp, id', params=params, itersize=itersize)
+
+        for row in rows:
+            yield History.from_row(row)
+
+    @staticmethod
+    def getPageByAccountId(account_id, limit, before=None, start=None, end=None):
+        '''Obtém uma página dos registros de transações da conta bancária, dos
+        mais recentes para os mais antigos, opcionalmente limitada a um período.
+
+        A paginação usa a posição do último registro da página anterior
+        (`before`) em vez de um deslocamento, então o custo de cada página é o
+        mesmo independente de quantas páginas já foram lidas.
+
+        Parameters
+        ----------
+        account_id : int
+            ID da conta bancária
+        limit : int
+            Quantidade máxima de registros da página
+        before : Optional[tuple[datetime, int]]
+            Data e hora e ID do último registro da página anterior
+        start : Optional[datetime]
+            Início do período (inclusivo)
+        end : Optional[datetime]
+            Fim do período (exclusivo)
 
         Returns
         -------
         list[History]
             Lista de registros de transações.
         '''
-        result = bank_db.search(History.table_name, f'account_id=%s', params=[account_id]) or []
-        return list(map(lambda row: History(row[1], row[3], row[4], row[2], row[0]), result))
-    
\ No newline at end of file
+        query, params = History.period_query(account_id, start, end)
+
+        if before:
+            query += ' AND (timestamp, id) < (%s, %s)'
+            params += list(before)
+
+        result = bank_db.search(
+            History.table_name,
+            query,
+            attr=History.columns,
+            sql='ORDER BY timestamp DESC, id DESC',
+            limit=limit,
+            params=params,
+        ) or []
+
+        # `search()` retorna apenas a linha quando o limite é 1.
+        if limit == 1 and result:
+            result = [result]
+        return list(map(History.from_row, result))
+
+    @staticmethod
+    def period_query(account_id, start=None, end=None):
+        '''Monta o filtro de busca dos registros de uma conta em um período.
+
+        Parameters
+        ----------
+        account_id : int
+            ID da conta bancária
+        start : Optional[datetime]
+            Início do período (inclusivo)
+        end : Optional[datetime]
+            Fim do período (exclusivo)
+
+        Returns
+        -------
+        tuple[str, list]
+            O SQL do filtro e a lista de valores que serão inseridos nele.
+        '''
+        query = 'account_id=%s'
+        params = [account_id]
+
+        if start:
+            query += ' AND timestamp >= %s'
+            params.append(start)
+
+        if end:
+            query += ' AND timestamp < %s'
+            params.append(end)
+        return query, params
+
+    @staticmethod
+    def from_row(row):
+        '''Cria a instância de um registro de transação a partir de uma linha
+        da tabela, na ordem de `History.columns`.
+
+        Parameters
+        ----------
+        row : tuple
+            Linha da tabela de histórico de transações
+
+        Returns
+        -------
+        History
+            Instância de um registro de transação.
+        '''
+        return History(
+            row[1],
+            row[4],
+            amount=row[5],
+            balance_after=row[7],
+            counterparty_account_id=row[6],
+            message=row[3],
+            timestamp=row[2],
+            id=row[0],
+            sequence=row[8],
+        )
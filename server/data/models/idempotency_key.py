@@ -0,0 +1,120 @@
+from data.db import bank_db
+
+
+class IdempotencyKey:
+    '''Classe modelo que realiza as operações na tabela de chaves de
+    idempotência.
+
+    Cada chave identifica uma operação enviada por um cliente e guarda a
+    resposta obtida, para que uma nova tentativa com a mesma chave receba a
+    resposta original em vez de executar a operação novamente.
+
+    Methods
+    -------
+    migrate():
+        Cria a tabela de chaves de idempotência no banco de dados
+    claim(client_id, key, action):
+        Reserva uma chave para uma operação
+    get(client_id, key):
+        Obtém a operação e a resposta registradas para uma chave
+    store(client_id, key, response):
+        Registra a resposta de uma operação
+    '''
+    table_name = 'idempotency_keys'
+
+    @staticmethod
+    def migrate():
+        '''Cria a tabela de chaves de idempotência no banco de dados.
+        '''
+        bank_db.create_table(IdempotencyKey.table_name, '''
+            client_id INTEGER NOT NULL,
+            key VARCHAR(64) NOT NULL,
+            action VARCHAR(50) NOT NULL,
+            response TEXT,
+            created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+
+            PRIMARY KEY (client_id, key),
+            FOREIGN KEY (client_id)
+                REFERENCES clients (id)
+                ON UPDATE CASCADE ON DELETE CASCADE
+        ''')
+
+    @staticmethod
+    def claim(client_id, key, action):
+        '''Reserva uma chave para uma operação. Apenas a primeira reserva de
+        cada chave é concluída.
+
+        Parameters
+        ----------
+        client_id : int
+            ID do cliente
+        key : str
+            Chave de idempotência
+        action : str
+            Nome da operação
+
+        Returns
+        -------
+        bool
+            Booleano indicando se a chave foi reservada.
+        '''
+        result = bank_db.run_query(f'''INSERT INTO {IdempotencyKey.table_name}
+            (client_id, key, action)
+            VALUES (%s, %s, %s)
+            ON CONFLICT (client_id, key) DO NOTHING
+            RETURNING key
+        ;''', [client_id, key, action])
+        return bool(result)
+
+    @staticmethod
+    def get(client_id, key):
+        '''Obtém a operação e a resposta registradas para uma chave.
+
+        Parameters
+        ----------
+        client_id : int
+            ID do cliente
+        key : str
+            Chave de idempotência
+
+        Returns
+        -------
+        tuple[str, Optional[str]]
+            Nome da operação e resposta em JSON (ou `None`, caso a operação
+            ainda não tenha sido concluída).
+        None
+            Caso a chave não exista.
+        '''
+        result = bank_db.search(
+            IdempotencyKey.table_name,
+            'client_id=%s AND key=%s',
+            attr='action, response',
+            limit=1,
+            params=[client_id, key],
+        )
+        return tuple(result) if result else None
+
+    @staticmethod
+    def store(client_id, key, response):
+        '''Registra a resposta de uma operação.
+
+        Parameters
+        ----------
+        client_id : int
+            ID do cliente
+        key : str
+            Chave de idempotência
+        response : str
+            Resposta da operação em JSON
+
+        Returns
+        -------
+        bool
+            Booleano indicando se a resposta foi registrada.
+        '''
+        result = bank_db.run_query(f'''UPDATE {IdempotencyKey.table_name}
+            SET response=%s
+            WHERE client_id=%s AND key=%s
+            RETURNING key
+        ;''', [response, client_id, key])
+        return bool(result)
@@ -0,0 +1,260 @@
+from data.db import bank_db
+from .account import Account
+from .account_slot import AccountSlot
+
+
+class Journal:
+    '''Classe modelo que realiza as operações no livro razão de partidas
+    dobradas.
+
+    Cada operação bancária é registrada como um lançamento (`journal_entries`)
+    com as suas partidas (`postings`): valores positivos creditam e negativos
+    debitam uma conta, e a soma das partidas de um lançamento é sempre zero.
+    O dinheiro que entra ou sai do banco (depósitos e saques) é lançado na
+    conta caixa, representada pelas partidas sem conta (`account_id` nulo).
+
+    Os lançamentos e as partidas são imutáveis. O saldo das contas é uma
+    projeção das partidas, atualizada no mesmo comando que as registra, e
+    `verify()` confere se as duas continuam de acordo. Nas contas com saldos
+    parciais (`AccountSlot`), os créditos são projetados em um saldo parcial
+    sorteado.
+
+    Methods
+    -------
+    migrate():
+        Cria as tabelas do livro razão no banco de dados
+    open_balances():
+        Registra o saldo das contas que ainda não possuem partidas
+    post(type, postings):
+        Registra um lançamento e atualiza o saldo das contas movimentadas
+    verify():
+        Confere os lançamentos e o saldo das contas com as partidas
+    '''
+    entries_table = 'journal_entries'
+    postings_table = 'postings'
+
+    OPENING = 'ABERTURA DA CONTA'
+    WITHDRAW = 'SAQUE'
+    DEPOSIT = 'DEPÓSITO'
+    TRANSFER = 'TRANSFERÊNCIA'
+
+    TOLERANCE = 0.005
+
+    @staticmethod
+    def migrate():
+        '''Cria as tabelas do livro razão no banco de dados, impede que os
+        lançamentos e as partidas sejam alterados ou removidos e registra o
+        saldo das contas criadas antes do livro razão.
+        '''
+        bank_db.create_table(Journal.entries_table, '''
+            id BIGSERIAL PRIMARY KEY,
+            type VARCHAR(50) NOT NULL,
+            created_at TIMESTAMP NOT NULL DEFAULT NOW()
+        ''')
+        bank_db.create_table(Journal.postings_table, f'''
+            id BIGSERIAL PRIMARY KEY,
+            entry_id BIGINT NOT NULL,
+            account_id INTEGER,
+            amount FLOAT NOT NULL,
+
+            FOREIGN KEY (entry_id)
+                REFERENCES {Journal.entries_table} (id)
+        ''')
+        bank_db.run_query(f'''CREATE INDEX IF NOT EXISTS postings_account_id_idx
+            ON {Journal.postings_table} (account_id)
+        ;''')
+        bank_db.run_query(f'''CREATE INDEX IF NOT EXISTS postings_entry_id_idx
+            ON {Journal.postings_table} (entry_id)
+        ;''')
+        bank_db.run_query('''CREATE OR REPLACE FUNCTION journal_immutable() RETURNS trigger AS $$
+            BEGIN
+                RAISE EXCEPTION 'O livro razão não pode ser alterado';
+            END;
+            $$ LANGUAGE plpgsql
+        ;''')
+
+        for table_name in (Journal.entries_table, Journal.postings_table):
+            bank_db.run_query(f'''DROP TRIGGER IF EXISTS {table_name}_immutable ON {table_name};
+                CREATE TRIGGER {table_name}_immutable
+                    BEFORE UPDATE OR DELETE ON {table_name}
+                    FOR EACH ROW EXECUTE PROCEDURE journal_immutable()
+            ;''')
+
+        Journal.open_balances()
+
+    @staticmethod
+    def open_balances():
+        '''Registra, em um único lançamento de abertura contra a conta caixa,
+        o saldo das contas que ainda não possuem partidas (por exemplo, as
+        criadas antes do livro razão).
+
+        Returns
+        -------
+        int
+            Quantidade de contas registradas.
+        None
+            Caso não seja possível realizar a operação.
+        '''
+        result = bank_db.run_query(f'''WITH missing AS (
+                SELECT id, {AccountSlot.balance_sql('accounts')} AS balance
+                FROM {Account.table_name} accounts
+                WHERE {AccountSlot.balance_sql('accounts')} <> 0 AND NOT EXISTS (
+                    SELECT 1 FROM {Journal.postings_table} postings
+                    WHERE postings.account_id = accounts.id
+                )
+            ), entry AS (
+                INSERT INTO {Journal.entries_table} (type)
+                SELECT %s WHERE EXISTS (SELECT 1 FROM missing)
+                RETURNING id
+            )
+            INSERT INTO {Journal.postings_table} (entry_id, account_id, amount)
+            SELECT entry.id, missing.id, missing.balance FROM entry, missing
+            UNION ALL
+            SELECT entry.id, NULL, -SUM(missing.balance) FROM entry, missing GROUP BY entry.id
+            RETURNING account_id
+        ;''', [Journal.OPENING])
+
+        if result is None:
+            return None
+        return sum(1 for (account_id,) in result if account_id is not None)
+
+    @staticmethod
+    def post(type, postings):
+        '''Registra um lançamento e atualiza o saldo das contas movimentadas,
+        com as partidas e a projeção gravadas em um único comando (apenas os
+        débitos de contas com saldos parciais são feitos em seguida). Deve ser
+        chamado dentro de uma transação, que precisa ser desfeita caso o
+        lançamento não seja registrado.
+
+        As contas sem saldos parciais são bloqueadas antes, em ordem de ID,
+        então lançamentos simultâneos que movimentam as mesmas contas em
+        sentidos opostos aguardam um ao outro em vez de entrar em impasse.
+
+        Parameters
+        ----------
+        type : str
+            Tipo do lançamento
+        postings : list[tuple]
+            Partidas `(ID da conta ou None para a conta caixa, quantia)`, que
+            devem somar zero
+
+        Returns
+        -------
+        dict[int, float]
+            Saldo de cada conta movimentada após o lançamento, indexado pelo ID
+            da conta. O saldo de uma conta com saldos parciais creditada não
+            inclui os créditos simultâneos ainda não confirmados: o saldo
+            definitivo é obtido com `Account.advance_versions()`.
+        None
+            Caso o lançamento não esteja balanceado, alguma conta não exista ou
+            não tenha saldo suficiente.
+        '''
+        postings = [(account_id, float(amount)) for account_id, amount in postings]
+
+        if not postings or abs(sum(amount for _, amount in postings)) > Journal.TOLERANCE:
+            return None
+
+        accounts = {account_id for account_id, _ in postings if account_id is not None}
+
+        if len(accounts) > 1 and bank_db.run_query(f'''SELECT id FROM {Account.table_name}
+            WHERE id = ANY(%s) AND slots = 0
+            ORDER BY id
+            FOR NO KEY UPDATE
+        ;''', [sorted(accounts)]) is None:
+            return None
+
+        entry = bank_db.insert(Journal.entries_table, {'type': type})
+
+        if not entry:
+            return None
+
+        result = bank_db.run_values(f'''WITH lines (entry_id, account_id, amount) AS (
+                VALUES %s
+            ), posted AS (
+                INSERT INTO {Journal.postings_table} (entry_id, account_id, amount)
+                SELECT entry_id, account_id, amount FROM lines
+            ), deltas AS (
+                SELECT accounts.id, accounts.slots, SUM(lines.amount) AS amount,
+                    FLOOR(RANDOM() * GREATEST(accounts.slots, 1))::INTEGER AS slot
+                FROM lines JOIN {Account.table_name} accounts ON accounts.id = lines.account_id
+                GROUP BY accounts.id, accounts.slots
+            ), updated AS (
+                UPDATE {Account.table_name}
+                SET balance = {Account.table_name}.balance + deltas.amount
+                FROM deltas
+                WHERE {Account.table_name}.id = deltas.id
+                    AND deltas.slots = 0
+                    AND {Account.table_name}.balance + deltas.amount >= 0
+                RETURNING {Account.table_name}.id, {Account.table_name}.balance
+            ), credited AS (
+                UPDATE {AccountSlot.table_name}
+                SET balance = {AccountSlot.table_name}.balance + deltas.amount
+                FROM deltas
+                WHERE {AccountSlot.table_name}.account_id = deltas.id
+                    AND {AccountSlot.table_name}.slot = deltas.slot
+                    AND deltas.slots > 0
+                    AND deltas.amount >= 0
+                RETURNING {AccountSlot.table_name}.account_id, deltas.amount
+            )
+            SELECT id, balance, FALSE FROM updated
+            UNION ALL
+            SELECT accounts.id, {AccountSlot.balance_sql('accounts')} + credited.amount, FALSE
+            FROM credited JOIN {Account.table_name} accounts ON accounts.id = credited.account_id
+            UNION ALL
+            SELECT id, amount, TRUE FROM deltas
+            WHERE slots > 0 AND amount < 0
+        ;''', [(entry[0], account_id, amount) for account_id, amount in postings],
+            template='(%s::BIGINT, %s::INTEGER, %s::FLOAT)')
+
+        if result is None or len(result) != len(accounts):
+            return None
+
+        balances = {}
+
+        for account_id, balance, debit in result:
+            if debit:
+                if not AccountSlot.debit(account_id, -balance):
+                    return None
+
+                balance = Account.get(account_id).balance
+
+            balances[account_id] = balance
+        return balances
+
+    @staticmethod
+    def verify():
+        '''Confere, com consultas sobre todo o livro razão, se cada lançamento
+        está balanceado e se o saldo de cada conta é igual à soma das suas
+        partidas.
+
+        Returns
+        -------
+        dict
+            Lançamentos desbalanceados (`entries`, pares `(ID, soma)`) e contas
+            com o saldo divergente (`accounts`, trios `(ID, saldo, soma das
+            partidas)`).
+        None
+            Caso não seja possível realizar a verificação.
+        '''
+        entries = bank_db.run_query(f'''SELECT entry_id, SUM(amount)
+            FROM {Journal.postings_table}
+            GROUP BY entry_id
+            HAVING ABS(SUM(amount)) > %s
+            ORDER BY entry_id
+        ;''', [Journal.TOLERANCE])
+
+        accounts = bank_db.run_query(f'''SELECT accounts.id, {AccountSlot.balance_sql('accounts')}, COALESCE(totals.amount, 0)
+            FROM {Account.table_name} accounts
+            LEFT JOIN (
+                SELECT account_id, SUM(amount) AS amount
+                FROM {Journal.postings_table}
+                WHERE account_id IS NOT NULL
+                GROUP BY account_id
+            ) totals ON totals.account_id = accounts.id
+            WHERE ABS({AccountSlot.balance_sql('accounts')} - COALESCE(totals.amount, 0)) > %s
+            ORDER BY accounts.id
+        ;''', [Journal.TOLERANCE])
+
+        if entries is None or accounts is None:
+            return None
+        return {'entries': entries, 'accounts': accounts}
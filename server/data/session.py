@@ -1,4 +1,4 @@
-import random, string
+import random, string, time
 
 from lib.crypt import Crypt
 from .bank_handler import Bank
@@ -7,6 +7,16 @@ from .bank_handler import Bank
 class Session:
     '''Classe que permite gerenciar as sessões dos usuários.
 
+    Cada sessão expira após um tempo fixo (`ttl`) desde a sua criação, que é
+    informado ao usuário para que ele saiba até quando a sessão é válida sem
+    consultar o servidor. As sessões expiradas que não são mais usadas são
+    removidas por `sweep()`, executado periodicamente pelo servidor.
+
+    Attributes
+    ----------
+    ttl : float
+        Tempo de duração (em segundos) de cada sessão
+
     Methods
     -------
     get_id_by_token(token)
@@ -19,22 +29,39 @@ class Session:
         Cria a sessão de um usuário a partir do ID
     logout(token)
         Deleta a sessão de um usuário a partir do token
+    sweep()
+        Remove as sessões expiradas
     '''
     __slots__ = [
         '_db',
+        '_ttl',
         '_session_tokens',
     ]
 
-    def __init__(self, db: Bank):
+    def __init__(self, db: Bank, ttl=8 * 60 * 60):
         '''
         Parameters
         ----------
         db : Bank
             Instância do manipulador do banco de dados.
+        ttl : float
+            Tempo de duração (em segundos) de cada sessão
         '''
         self._db = db
+        self._ttl = ttl
         self._session_tokens = {}
 
+    @property
+    def ttl(self):
+        '''Tempo de duração (em segundos) de cada sessão.
+
+        Returns
+        -------
+        float
+            Tempo de duração das sessões.
+        '''
+        return self._ttl
+
     def get_id_by_token(self, token):
         '''Obtém o ID do usuário a partir do token salvo nas sessões.
 
@@ -50,8 +77,10 @@ class Session:
         None
             Caso o token não exista nas sessões salvas.
         '''
-        if self.check(token):
-            return self._session_tokens[token]
+        session = self._session_tokens.get(token)
+
+        if session and self.check(token):
+            return session[0]
         return None
 
     def check(self, token):
@@ -65,9 +94,18 @@ class Session:
         Returns
         -------
         bool
-            Booleano indicando se o token existe nas sessões salvas.
+            Booleano indicando se o token existe nas sessões salvas e ainda
+            não expirou.
         '''
-        return token in self._session_tokens
+        session = self._session_tokens.get(token)
+
+        if not session:
+            return False
+
+        if session[1] <= time.monotonic():
+            self._session_tokens.pop(token, None)
+            return False
+        return True
 
     def login(self, cpf, password):
         '''Cria a sessão de um usuário a partir do CPF e senha.
@@ -107,7 +145,7 @@ class Session:
             Token gerado.
         '''
         token = f'{self._generate_token()}_{client_id}'
-        self._session_tokens[token] = client_id
+        self._session_tokens[token] = (client_id, time.monotonic() + self._ttl)
         return token
 
     def logout(self, token):
@@ -118,8 +156,23 @@ class Session:
         token : str
             Token do usuário
         '''
-        if self.check(token):
-            del self._session_tokens[token]
+        self._session_tokens.pop(token, None)
+
+    def sweep(self):
+        '''Remove as sessões expiradas, inclusive as dos tokens que não são
+        mais enviados pelos usuários.
+
+        Returns
+        -------
+        int
+            Quantidade de sessões removidas.
+        '''
+        now = time.monotonic()
+        expired = [token for token, session in list(self._session_tokens.items()) if session[1] <= now]
+
+        for token in expired:
+            self._session_tokens.pop(token, None)
+        return len(expired)
 
     def _generate_token(self, size=10):
         '''Gera um token de tamanho determinado.
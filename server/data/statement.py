@@ -0,0 +1,116 @@
+from datetime import datetime
+
+from data.db import bank_db
+from data.models import Account, History
+
+
+class Statement:
+    '''Classe responsável por exportar o extrato de uma conta bancária.
+
+    Os registros são exportados pelo próprio PostgreSQL através de
+    `COPY ... TO STDOUT` e escritos no destino conforme chegam, então o
+    consumo de memória é constante independente do tamanho do histórico.
+
+    Methods
+    -------
+    write(file, account_id, start=None, end=None, format='csv')
+        Escreve o extrato de uma conta em um destino
+    '''
+    FORMATS = ('csv', 'ofx')
+
+    _signed_amount = f'''CASE WHEN type IN ('{History.WITHDRAW}', '{History.TRANSFER_SENT}')
+        THEN -amount ELSE amount END'''
+
+    @staticmethod
+    def write(file, account_id, start=None, end=None, format='csv'):
+        '''Escreve o extrato de uma conta em um destino.
+
+        Parameters
+        ----------
+        file : object
+            Objeto com o método `write()` que recebe o extrato em bytes
+        account_id : int
+            ID da conta bancária
+        start : Optional[datetime]
+            Início do período (inclusivo)
+        end : Optional[datetime]
+            Fim do período (exclusivo)
+        format : str
+            Formato do extrato: `'csv'` ou `'ofx'`
+
+        Raises
+        ------
+        ValueError
+            Caso o formato informado não seja suportado.
+        psycopg2.Error
+            Caso não seja possível exportar os registros.
+        '''
+        if format not in Statement.FORMATS:
+            raise ValueError(f'Formato de extrato não suportado: {format}')
+
+        query, params = History.period_query(account_id, start, end)
+
+        if format == 'csv':
+            return Statement._write_csv(file, query, params)
+        return Statement._write_ofx(file, account_id, query, params, start, end)
+
+    @staticmethod
+    def _write_csv(file, query, params):
+        '''Escreve o extrato no formato CSV, com cabeçalho.
+        '''
+        bank_db.copy_to(f'''SELECT
+                id,
+                timestamp,
+                type,
+                {Statement._signed_amount} AS amount,
+                lpad(counterparty_account_id::TEXT, 4, '0') AS counterparty_account_code,
+                balance_after,
+                message
+            FROM {History.table_name}
+            WHERE {query}
+            ORDER BY timestamp, id
+        ''', file, params)
+
+    @staticmethod
+    def _write_ofx(file, account_id, query, params, start, end):
+        '''Escreve o extrato no formato OFX (1.0.2, SGML).
+
+        Cada transação é montada pelo próprio banco de dados em uma linha
+        `<STMTTRN>`, e apenas o cabeçalho e o rodapé são escritos pelo Python.
+        '''
+        account = Account.get(account_id)
+        now = datetime.now()
+        date_format = '%Y%m%d%H%M%S'
+
+        file.write((
+            'OFXHEADER:100\r\nDATA:OFXSGML\r\nVERSION:102\r\nSECURITY:NONE\r\n'
+            'ENCODING:UTF-8\r\nCHARSET:NONE\r\nCOMPRESSION:NONE\r\n'
+            'OLDFILEUID:NONE\r\nNEWFILEUID:NONE\r\n\r\n'
+            '<OFX>\r\n<BANKMSGSRSV1>\r\n<STMTTRNRS>\r\n<TRNUID>1\r\n'
+            '<STATUS>\r\n<CODE>0\r\n<SEVERITY>INFO\r\n</STATUS>\r\n'
+            '<STMTRS>\r\n<CURDEF>BRL\r\n'
+            f'<BANKACCTFROM>\r\n<BANKID>SMARTBANK\r\n<ACCTID>{Account.format_code(account_id)}\r\n'
+            '<ACCTTYPE>CHECKING\r\n</BANKACCTFROM>\r\n'
+            f'<BANKTRANLIST>\r\n<DTSTART>{(start or datetime(1970, 1, 1)).strftime(date_format)}\r\n'
+            f'<DTEND>{(end or now).strftime(date_format)}\r\n'
+        ).encode())
+
+        bank_db.copy_to(f'''SELECT format(
+                '<STMTTRN><TRNTYPE>%%s<DTPOSTED>%%s<TRNAMT>%%s<FITID>%%s<MEMO>%%s</STMTTRN>',
+                CASE WHEN {Statement._signed_amount} < 0 THEN 'DEBIT' ELSE 'CREDIT' END,
+                to_char(timestamp, 'YYYYMMDDHH24MISS'),
+                to_char(COALESCE({Statement._signed_amount}, 0), 'FM999999999990.00'),
+                id,
+                type
+            )
+            FROM {History.table_name}
+            WHERE {query}
+            ORDER BY timestamp, id
+        ''', file, params, options='FORMAT text')
+
+        file.write((
+            '</BANKTRANLIST>\r\n'
+            f'<LEDGERBAL>\r\n<BALAMT>{float(account.balance if account else 0):.2f}\r\n'
+            f'<DTASOF>{now.strftime(date_format)}\r\n</LEDGERBAL>\r\n'
+            '</STMTRS>\r\n</STMTTRNRS>\r\n</BANKMSGSRSV1>\r\n</OFX>\r\n'
+        ).encode())
@@ -0,0 +1,181 @@
+from concurrent.futures import Future
+import threading
+import queue
+import time
+
+
+class GroupCommitter:
+	'''Agrupa operações concorrentes em uma única transação (group commit).
+
+	Uma thread escritora recebe as operações enviadas com `submit()`, espera
+	por uma janela curta para reunir as que chegam ao mesmo tempo e executa
+	todas na mesma transação, cada uma em seu próprio savepoint. Assim, várias
+	operações pagam um único `COMMIT` (e uma única escrita do WAL em disco),
+	e a falha de uma operação desfaz apenas o seu savepoint.
+
+	Quem envia a operação só recebe o resultado após o `COMMIT` do grupo. Se o
+	`COMMIT` falhar, todas as operações do grupo recebem o valor padrão
+	informado no envio.
+
+    Methods
+    -------
+	submit(operation, default=None)
+		Executa uma operação no próximo grupo e aguarda o seu resultado
+	in_writer()
+		Indica se a thread atual é a thread escritora
+	close()
+		Encerra a thread escritora após os grupos pendentes
+	'''
+	def __init__(self, db, window=0.002, max_batch=256):
+		'''
+        Parameters
+        ----------
+        db : Pyg
+			Banco de dados em que as operações são executadas
+        window : float
+			Tempo máximo (em segundos) de espera por novas operações após a
+			primeira operação de um grupo
+        max_batch : int
+			Quantidade máxima de operações de um grupo
+        '''
+		self._db = db
+		self._window = window
+		self._max_batch = max_batch
+		self._queue = queue.Queue()
+		self._thread = threading.Thread(target=self._write, name='group-commit', daemon=True)
+		self._thread.start()
+
+	def submit(self, operation, default=None):
+		'''Executa uma operação no próximo grupo e aguarda o seu resultado.
+		Chamado pela própria thread escritora (por exemplo, por uma operação
+		que executa outra), a operação é executada imediatamente.
+
+        Parameters
+        ----------
+        operation : function
+			Função sem parâmetros que realiza a operação no banco de dados
+        default : Any
+			Resultado caso o `COMMIT` do grupo falhe
+
+        Returns
+        -------
+        Any
+			Resultado da operação.
+
+        Raises
+        ------
+        Exception
+			A exceção lançada pela operação, caso exista.
+        '''
+		if self.in_writer():
+			return operation()
+
+		future = Future()
+		self._queue.put((operation, default, future))
+		return future.result()
+
+	def in_writer(self):
+		'''Indica se a thread atual é a thread escritora.
+
+        Returns
+        -------
+        bool
+            Booleano indicando se a thread atual executa os grupos.
+        '''
+		return threading.current_thread() is self._thread
+
+	def close(self):
+		'''Encerra a thread escritora após executar os grupos pendentes.
+		'''
+		self._queue.put(None)
+		self._thread.join()
+
+	def _collect(self, first):
+		'''Reúne as operações de um grupo até a janela terminar ou o grupo
+		ficar cheio.
+
+        Parameters
+        ----------
+        first : tuple
+			Primeira operação do grupo
+
+        Returns
+        -------
+        tuple[list, bool]
+			Operações do grupo e um booleano indicando se a thread deve ser
+			encerrada após executá-lo.
+		'''
+		batch = [first]
+		deadline = time.monotonic() + self._window
+
+		while len(batch) < self._max_batch:
+			timeout = deadline - time.monotonic()
+
+			try:
+				item = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+			except queue.Empty:
+				break
+
+			if item is None:
+				return batch, True
+
+			batch.append(item)
+		return batch, False
+
+	def _write(self):
+		'''Executa os grupos de operações até a thread ser encerrada.
+		'''
+		while True:
+			first = self._queue.get()
+
+			if first is None:
+				return
+
+			batch, closing = self._collect(first)
+			self._commit(batch)
+
+			if closing:
+				return
+
+	def _commit(self, batch):
+		'''Executa um grupo de operações em uma única transação e entrega o
+		resultado de cada uma após o `COMMIT`.
+
+        Parameters
+        ----------
+        batch : list[tuple]
+			Operações do grupo `(operação, valor padrão, future)`
+		'''
+		results = []
+		committed = False
+
+		try:
+			with self._db.transaction() as transaction:
+				for operation, default, future in batch:
+					if transaction.failed:
+						break
+
+					try:
+						with self._db.transaction():
+							results.append((future, operation(), None))
+					except Exception as error:
+						results.append((future, None, error))
+
+			committed = not transaction.failed
+		except Exception as error:
+			print(error)
+
+		done = set()
+
+		if committed:
+			for future, result, error in results:
+				if error:
+					future.set_exception(error)
+				else:
+					future.set_result(result)
+
+				done.add(future)
+
+		for operation, default, future in batch:
+			if future not in done:
+				future.set_result(default)
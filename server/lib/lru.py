@@ -0,0 +1,70 @@
+from collections import OrderedDict
+import threading
+
+
+class LRUCache:
+	'''Cache em memória com quantidade máxima de itens, que descarta primeiro
+	os itens usados há mais tempo (LRU).
+
+	O cache é seguro para ser usado por várias threads.
+
+    Methods
+    -------
+	get(key, default=None)
+		Obtém o valor de uma chave
+	set(key, value)
+		Armazena o valor de uma chave
+	'''
+	def __init__(self, max_size=10000):
+		'''
+        Parameters
+        ----------
+        max_size : int
+			Quantidade máxima de itens armazenados
+        '''
+		self._max_size = max_size
+		self._items = OrderedDict()
+		self._locker = threading.Lock()
+
+	def __len__(self):
+		return len(self._items)
+
+	def get(self, key, default=None):
+		'''Obtém o valor de uma chave, marcando-a como usada recentemente.
+
+        Parameters
+        ----------
+        key : Hashable
+			Chave do item
+        default : Any
+			Valor retornado caso a chave não exista
+
+        Returns
+        -------
+        Any
+			Valor armazenado na chave, ou `default` caso ela não exista.
+        '''
+		with self._locker:
+			if key not in self._items:
+				return default
+
+			self._items.move_to_end(key)
+			return self._items[key]
+
+	def set(self, key, value):
+		'''Armazena o valor de uma chave, descartando o item usado há mais tempo
+		caso o cache esteja cheio.
+
+        Parameters
+        ----------
+        key : Hashable
+			Chave do item
+        value : Any
+			Valor a ser armazenado
+        '''
+		with self._locker:
+			self._items[key] = value
+			self._items.move_to_end(key)
+
+			if len(self._items) > self._max_size:
+				self._items.popitem(last=False)
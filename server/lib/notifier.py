@@ -0,0 +1,110 @@
+import threading
+import queue
+
+
+class Notifier:
+	'''Distribui mensagens para os assinantes de um tópico.
+
+	As mensagens publicadas são entregues por uma thread própria, então quem
+	publica não aguarda a entrega, mesmo que algum assinante seja lento. Um
+	assinante que retorna `False` ou lança uma exceção ao receber uma
+	mensagem é removido.
+
+	O notificador é seguro para ser usado por várias threads.
+
+    Methods
+    -------
+	subscribe(topic, callback)
+		Inscreve uma função para receber as mensagens de um tópico
+	unsubscribe(topic, callback)
+		Remove a inscrição de uma função em um tópico
+	publish(topic, message)
+		Publica uma mensagem em um tópico
+	close()
+		Encerra a entrega das mensagens
+	'''
+	def __init__(self):
+		self._subscribers = {}
+		self._locker = threading.Lock()
+		self._queue = queue.Queue()
+		self._thread = threading.Thread(target=self._deliver, name='notifier', daemon=True)
+		self._thread.start()
+
+	def subscribe(self, topic, callback):
+		'''Inscreve uma função para receber as mensagens de um tópico.
+
+        Parameters
+        ----------
+        topic : Hashable
+			Tópico das mensagens
+        callback : function
+			Função que recebe cada mensagem publicada no tópico
+		'''
+		with self._locker:
+			self._subscribers.setdefault(topic, []).append(callback)
+
+	def unsubscribe(self, topic, callback):
+		'''Remove a inscrição de uma função em um tópico.
+
+        Parameters
+        ----------
+        topic : Hashable
+			Tópico das mensagens
+        callback : function
+			Função inscrita no tópico
+		'''
+		with self._locker:
+			callbacks = self._subscribers.get(topic, [])
+
+			if callback in callbacks:
+				callbacks.remove(callback)
+
+			if not callbacks:
+				self._subscribers.pop(topic, None)
+
+	def publish(self, topic, message):
+		'''Publica uma mensagem em um tópico. Mensagens de tópicos sem
+		assinantes são descartadas.
+
+        Parameters
+        ----------
+        topic : Hashable
+			Tópico da mensagem
+        message : Any
+			Conteúdo da mensagem
+		'''
+		with self._locker:
+			if topic not in self._subscribers:
+				return
+
+		self._queue.put((topic, message))
+
+	def close(self):
+		'''Encerra a entrega das mensagens após as que já foram publicadas.
+		'''
+		self._queue.put(None)
+		self._thread.join()
+
+	def _deliver(self):
+		'''Entrega as mensagens publicadas aos assinantes de cada tópico.
+		'''
+		while True:
+			item = self._queue.get()
+
+			if item is None:
+				return
+
+			topic, message = item
+
+			with self._locker:
+				callbacks = list(self._subscribers.get(topic, []))
+
+			for callback in callbacks:
+				try:
+					keep = callback(message)
+				except Exception as error:
+					print(error)
+					keep = False
+
+				if keep is False:
+					self.unsubscribe(topic, callback)
@@ -0,0 +1,38 @@
+from datetime import datetime, timedelta
+
+
+def parse_period(start=None, end=None):
+	'''Converte os limites de um período no formato ISO 8601.
+
+	Quando o fim é apenas uma data (sem horário), o dia inteiro é incluído no
+	período.
+
+    Parameters
+    ----------
+    start : Optional[str]
+		Início do período (inclusivo)
+    end : Optional[str]
+		Fim do período
+
+    Returns
+    -------
+    tuple[Optional[datetime], Optional[datetime]]
+		O início (inclusivo) e o fim (exclusivo) do período.
+
+    Raises
+    ------
+    ValueError
+		Caso alguma das datas seja inválida ou o início seja posterior ao fim.
+    TypeError
+		Caso alguma das datas não seja uma string.
+	'''
+	start = datetime.fromisoformat(start) if start else None
+
+	if end and len(end) == len('YYYY-MM-DD'):
+		end = datetime.fromisoformat(end) + timedelta(days=1)
+	else:
+		end = datetime.fromisoformat(end) if end else None
+
+	if start and end and start > end:
+		raise ValueError('O início do período é posterior ao fim.')
+	return start, end
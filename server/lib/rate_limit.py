@@ -0,0 +1,119 @@
+from collections import OrderedDict
+import threading
+import time
+
+
+class TokenBucket:
+	'''Balde de fichas (token bucket) usado para limitar a taxa de operações.
+
+	O balde é reabastecido continuamente a uma taxa fixa até a sua capacidade
+	máxima, e cada operação consome uma ou mais fichas.
+
+    Methods
+    -------
+	consume(amount=1)
+		Tenta consumir fichas do balde
+	'''
+	__slots__ = [
+		'_rate',
+		'_capacity',
+		'_tokens',
+		'_updated_at',
+	]
+
+	def __init__(self, rate, capacity):
+		'''
+        Parameters
+        ----------
+        rate : float
+			Quantidade de fichas reabastecidas por segundo
+        capacity : float
+			Quantidade máxima de fichas no balde (rajada permitida)
+        '''
+		self._rate = rate
+		self._capacity = capacity
+		self._tokens = capacity
+		self._updated_at = time.monotonic()
+
+	def consume(self, amount=1):
+		'''Tenta consumir fichas do balde.
+
+        Parameters
+        ----------
+        amount : float
+			Quantidade de fichas a serem consumidas
+
+        Returns
+        -------
+        float
+			Zero caso as fichas tenham sido consumidas, ou o tempo (em segundos)
+			até que existam fichas suficientes.
+        '''
+		now = time.monotonic()
+		self._tokens = min(self._capacity, self._tokens + (now - self._updated_at) * self._rate)
+		self._updated_at = now
+
+		if self._tokens >= amount:
+			self._tokens -= amount
+			return 0.0
+		return (amount - self._tokens) / self._rate if self._rate > 0 else float('inf')
+
+
+class RateLimiter:
+	'''Limitador de taxa que mantém um balde de fichas para cada chave (token
+	de sessão, endereço IP, etc.).
+
+	A quantidade de chaves acompanhadas é limitada: as chaves usadas há mais
+	tempo são descartadas primeiro, mantendo o consumo de memória constante.
+
+    Methods
+    -------
+	hit(key, amount=1)
+		Registra uma operação para a chave informada
+	'''
+	def __init__(self, rate, capacity, max_keys=10000):
+		'''
+        Parameters
+        ----------
+        rate : float
+			Quantidade de operações permitidas por segundo para cada chave
+        capacity : float
+			Quantidade de operações permitidas em rajada para cada chave
+        max_keys : int
+			Quantidade máxima de chaves acompanhadas simultaneamente
+        '''
+		self._rate = rate
+		self._capacity = capacity
+		self._max_keys = max_keys
+		self._buckets = OrderedDict()
+		self._locker = threading.Lock()
+
+	def hit(self, key, amount=1):
+		'''Registra uma operação para a chave informada.
+
+        Parameters
+        ----------
+        key : Hashable
+			Chave que identifica a origem da operação
+        amount : float
+			Custo da operação em fichas
+
+        Returns
+        -------
+        float
+			Zero caso a operação seja permitida, ou o tempo (em segundos) que
+			deve ser aguardado antes de tentar novamente.
+        '''
+		with self._locker:
+			bucket = self._buckets.get(key)
+
+			if bucket is None:
+				bucket = TokenBucket(self._rate, self._capacity)
+				self._buckets[key] = bucket
+
+				if len(self._buckets) > self._max_keys:
+					self._buckets.popitem(last=False)
+			else:
+				self._buckets.move_to_end(key)
+
+			return bucket.consume(amount)
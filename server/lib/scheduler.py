@@ -0,0 +1,46 @@
+import threading
+
+
+class PeriodicTask:
+	'''Executa uma função periodicamente em uma thread própria.
+
+	A primeira execução acontece após o primeiro intervalo. Uma exceção
+	lançada pela função é registrada e não interrompe as execuções
+	seguintes.
+
+    Methods
+    -------
+	close()
+		Encerra as execuções
+	'''
+	def __init__(self, function, interval, name='periodic-task'):
+		'''
+        Parameters
+        ----------
+        function : function
+			Função sem parâmetros executada a cada intervalo
+        interval : float
+			Tempo (em segundos) entre as execuções
+        name : str
+			Nome da thread
+        '''
+		self._function = function
+		self._interval = interval
+		self._stop_event = threading.Event()
+		self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+		self._thread.start()
+
+	def close(self):
+		'''Encerra as execuções, aguardando a execução em andamento.
+		'''
+		self._stop_event.set()
+		self._thread.join()
+
+	def _run(self):
+		'''Executa a função a cada intervalo até a tarefa ser encerrada.
+		'''
+		while not self._stop_event.wait(self._interval):
+			try:
+				self._function()
+			except Exception as error:
+				print(error)
@@ -1,6 +1,9 @@
+from concurrent import futures
 import threading
+import codecs
 import socket
 import signal
+import json
 import time
 
 
@@ -9,7 +12,7 @@ class StoppableThread(threading.Thread):
 
     Methods
     -------
-    stop()
+    stop(timeout=None)
 		Finaliza a thread
 	'''
 	def __init__(self):
@@ -17,12 +20,17 @@ class StoppableThread(threading.Thread):
 		self.daemon = True
 		self._stop_event = threading.Event() 
 
-	def stop(self):
+	def stop(self, timeout=None):
 		'''Finaliza a thread caso ela esteja ativa.
+
+        Parameters
+        ----------
+        timeout : Optional[float]
+			Tempo máximo (em segundos) de espera pela finalização da thread
 		'''
 		if self.is_alive() == True:
 			self._stop_event.set()
-			self.join()
+			self.join(timeout)
 
 
 class Server(StoppableThread):
@@ -37,10 +45,21 @@ class Server(StoppableThread):
 	run()
 		Cria e configura o servidor para aceitar as conexões dos clientes e
 		passar a execução delas para uma nova thread processar as requisições.
+	shutdown()
+		Encerra o servidor de forma graciosa, aguardando as requisições em
+		andamento e executando as rotinas de encerramento registradas.
+	add_shutdown_hook(hook)
+		Registra uma função que será executada no encerramento do servidor
+	reap_threads()
+		Remove da listagem as threads referentes as conexões dos clientes que
+		já foram finalizadas.
     stop_threads()
-		Finaliza todas as threads referentes as conexões dos clientes
+		Finaliza todas as threads referentes as conexões dos clientes,
+		aguardando as requisições em andamento até o prazo de encerramento.
 	'''
-	def __init__(self, handler, host='', port=8001):
+	def __init__(self, handler, host='', port=8001, idle_timeout=300.0, read_timeout=5.0, reap_interval=1.0,
+			max_connections=None, busy_message='{"error": true, "message": "Servidor ocupado."}', drain_timeout=10.0,
+			max_request_size=1024 * 1024, workers=16, max_in_flight=32):
 		'''
         Parameters
         ----------
@@ -51,70 +70,220 @@ class Server(StoppableThread):
 			de todos).
         port : int
 			Porta em que o servidor será executado (por padrão é a 8001)
+        idle_timeout : float
+			Tempo máximo (em segundos) que uma conexão pode ficar sem enviar
+			requisições antes de ser encerrada.
+        read_timeout : float
+			Tempo máximo (em segundos) que cada leitura do socket pode ficar
+			bloqueada antes de verificar novamente o estado da conexão.
+        reap_interval : float
+			Intervalo (em segundos) entre as limpezas das threads de conexões
+			já finalizadas.
+        max_connections : Optional[int]
+			Quantidade máxima de conexões simultâneas (por padrão é ilimitada)
+        busy_message : str
+			Resposta enviada para as conexões recusadas por excesso de conexões
+        drain_timeout : float
+			Tempo máximo (em segundos) de espera pelas requisições em andamento
+			durante o encerramento do servidor.
+        max_request_size : int
+			Tamanho máximo (em caracteres) de uma requisição
+        workers : int
+			Quantidade de threads que processam as requisições identificadas
+			(com `request_id`), compartilhadas por todas as conexões.
+        max_in_flight : int
+			Quantidade máxima de requisições identificadas em processamento ao
+			mesmo tempo em uma conexão.
         '''
 		StoppableThread.__init__(self)
 		self._host = host
 		self._port = port
 		self._handler = handler
+		self._idle_timeout = idle_timeout
+		self._read_timeout = read_timeout
+		self._reap_interval = reap_interval
+		self._max_connections = max_connections
+		self._busy_message = busy_message
+		self._drain_timeout = drain_timeout
+		self._max_request_size = max_request_size
+		self._max_in_flight = max_in_flight
+		self._executor = futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix='request')
 		self._client_threads = []
+		self._shutdown_hooks = []
+		self._shutdown_event = threading.Event()
+		self._server_socket = None
+		self._accepted = 0
+		self._rejected = 0
 
 	def listen(self):
 		'''Inicializa a thread do servidor para que seja possível aceitar
 		as conexões dos clientes e processar as solicitações.
 		'''
+		def handle_exit(signum, frame):
+			self._shutdown_event.set()
+
+		signal.signal(signal.SIGTERM, handle_exit)
+		signal.signal(signal.SIGINT, handle_exit)
+
 		self.start()
+		self._shutdown_event.wait()
+		self.shutdown()
 
-		def handle_exit():
-			self.stop()
+	def shutdown(self):
+		'''Encerra o servidor de forma graciosa: para de aceitar conexões,
+		aguarda as requisições em andamento até o prazo de encerramento, fecha
+		as conexões ociosas e executa as rotinas de encerramento registradas.
+		'''
+		print('=> Shutting down server...')
+		self._stop_event.set()
+		self._shutdown_event.set()
 
-		while True:
+		if self._server_socket:
 			try:
-				time.sleep(0.1)
-			except KeyboardInterrupt:
-				break
-		
-		signal.signal(signal.SIGTERM, handle_exit)
-		signal.signal(signal.SIGINT, handle_exit)
+				self._server_socket.shutdown(socket.SHUT_RDWR)
+			except socket.error:
+				pass
+
+		if self.is_alive():
+			self.join()
+
+		for hook in self._shutdown_hooks:
+			try:
+				hook()
+			except Exception as error:
+				print(error)
+
+		print(f'=> Server stopped ({self._accepted} connections accepted, {self._rejected} rejected)')
+
+	def add_shutdown_hook(self, hook):
+		'''Registra uma função que será executada no encerramento do servidor,
+		após a finalização de todas as conexões.
+
+        Parameters
+        ----------
+        hook : function
+			Função sem parâmetros executada no encerramento
+		'''
+		self._shutdown_hooks.append(hook)
 	
 	def run(self):
 		'''Cria e configura o servidor para aceitar as conexões dos clientes e
 		passar a execução delas para uma nova thread processar as requisições.
 		'''
-		try:
-			self._server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-			self._server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-			self._server_socket.bind((self._host, self._port))
-			self._server_socket.listen()
-			print(f'=> Server listening at port {self._port}...\n')
-		except socket.error:
-			interval = 10
-			print(f'=> Address already in use. Retrying in {interval} seconds...\n')
-			time.sleep(interval)
-			self.run()
+		while self._stop_event.is_set() == False:
+			try:
+				self._server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+				self._server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+				self._server_socket.bind((self._host, self._port))
+				self._server_socket.listen()
+				print(f'=> Server listening at port {self._port}...\n')
+				break
+			except socket.error:
+				interval = 10
+				print(f'=> Address already in use. Retrying in {interval} seconds...\n')
+				self._server_socket.close()
+				self._stop_event.wait(interval)
+
+		if self._stop_event.is_set():
+			return
 	
+		self._server_socket.settimeout(self._reap_interval)
+		last_reap = time.monotonic()
+
 		while self._stop_event.is_set() == False:
 			try:
 				client_socket, client_address = self._server_socket.accept()
+
+				if not self._admit():
+					print(f'=> Socket rejected: {client_address[0]}:{client_address[1]}')
+					self._rejected += 1
+					self._reject(client_socket)
+					continue
+
 				print(f'=> Socket connected: {client_address[0]}:{client_address[1]}')
 				
-				client_thread = SocketHandler(client_socket, client_address, self._handler)
+				client_thread = SocketHandler(
+					client_socket,
+					client_address,
+					self._handler,
+					idle_timeout=self._idle_timeout,
+					read_timeout=self._read_timeout,
+					max_request_size=self._max_request_size,
+					executor=self._executor,
+					max_in_flight=self._max_in_flight,
+				)
 				self._client_threads.append(client_thread)
+				self._accepted += 1
 				client_thread.start()
 			except socket.timeout:
-				print('=> Socket connection timeout')
+				pass
+			except socket.error as error:
+				if self._stop_event.is_set():
+					break
+				print(error)
 
-				for thread in self._client_threads:
-					if thread.is_alive() == False:
-						self._client_threads.remove(thread)
+			if time.monotonic() - last_reap >= self._reap_interval:
+				self.reap_threads()
+				last_reap = time.monotonic()
 		self.stop_threads()
+		self._executor.shutdown(wait=False, cancel_futures=True)
 		self._server_socket.close()
 
+	def _admit(self):
+		'''Verifica se uma nova conexão pode ser aceita sem ultrapassar o limite
+		de conexões simultâneas.
+
+        Returns
+        -------
+        bool
+            Booleano indicando se a conexão pode ser aceita.
+        '''
+		if self._max_connections is None or len(self._client_threads) < self._max_connections:
+			return True
+
+		self.reap_threads()
+		return len(self._client_threads) < self._max_connections
+
+	def _reject(self, client_socket):
+		'''Envia a resposta de servidor ocupado e encerra a conexão recusada.
+
+        Parameters
+        ----------
+        client_socket : socket
+			Socket que indica a conexão do cliente
+        '''
+		try:
+			client_socket.settimeout(self._read_timeout)
+			client_socket.sendall(self._busy_message.encode())
+		except socket.error:
+			pass
+		finally:
+			client_socket.close()
+
+	def reap_threads(self):
+		'''Remove da listagem as threads referentes as conexões dos clientes
+		que já foram finalizadas.
+		'''
+		self._client_threads = [thread for thread in self._client_threads if thread.is_alive()]
+
 	def stop_threads(self):
-		'''Finaliza todas as threads referentes as conexões dos clientes.
+		'''Finaliza todas as threads referentes as conexões dos clientes,
+		aguardando as requisições em andamento até o prazo de encerramento.
+
+		As conexões ociosas são encerradas imediatamente e as que ainda estiverem
+		processando uma requisição após o prazo são fechadas à força.
 		'''
+		deadline = time.monotonic() + self._drain_timeout
+
+		for thread in self._client_threads:
+			thread.drain()
+
+		for thread in self._client_threads:
+			thread.join(max(0.0, deadline - time.monotonic()))
+
 		for thread in self._client_threads:
 			if thread.is_alive() == True:
-				thread.stop()
+				thread.abort()
 		self._client_threads = []
 	
 
@@ -123,13 +292,25 @@ class SocketHandler(StoppableThread):
 	dados recebidos e a função de resposta para serem processadas pelo controlador.
 	Cada instância gera uma nova thread no servidor.
 
+	Requisições com o campo `request_id` são processadas em paralelo pelas
+	threads compartilhadas do servidor, então várias delas podem estar em
+	andamento na mesma conexão e as respostas podem chegar fora de ordem (o
+	controlador devolve o `request_id` na resposta). As demais requisições são
+	processadas na ordem em que chegam.
+
 	Methods
     -------
 	run()
 		Recebe as requisições do cliente, decodifica e injeta os dados
 		recebidos e a função de resposta para serem processadas pelo controlador.
+	drain()
+		Deixa de receber novas requisições, permitindo que a requisição em
+		andamento seja concluída.
+	abort()
+		Encerra a conexão imediatamente
 	'''
-	def __init__(self, client_socket, client_address, handler):
+	def __init__(self, client_socket, client_address, handler, idle_timeout=300.0, read_timeout=5.0,
+			max_request_size=1024 * 1024, executor=None, max_in_flight=32):
 		'''
         Parameters
         ----------
@@ -139,26 +320,243 @@ class SocketHandler(StoppableThread):
 			Tupla contendo o endereço e a porta do socket cliente
         handler : AppController
 			Classe controladora que processa as requisições do usuário
+        idle_timeout : float
+			Tempo máximo (em segundos) que a conexão pode ficar sem enviar
+			requisições antes de ser encerrada.
+        read_timeout : float
+			Tempo máximo (em segundos) que cada leitura do socket pode ficar
+			bloqueada antes de verificar novamente o estado da conexão.
+        max_request_size : int
+			Tamanho máximo (em caracteres) de uma requisição
+        executor : Optional[concurrent.futures.Executor]
+			Executor das requisições identificadas (por padrão, todas as
+			requisições são processadas em ordem pela thread da conexão).
+        max_in_flight : int
+			Quantidade máxima de requisições identificadas em processamento ao
+			mesmo tempo. Ao atingir o limite, a leitura de novas requisições
+			aguarda.
         '''
 		StoppableThread.__init__(self)
 		self._client_socket = client_socket
 		self._client_address = client_address
 		self._handler = handler
+		self._idle_timeout = idle_timeout
+		self._max_request_size = max_request_size
+		self._executor = executor
+		self._in_flight = threading.BoundedSemaphore(max_in_flight)
+		self._pending = set()
+		self._send_locker = threading.Lock()
+		self._scan = (0, 0, False, False)
+		self._client_socket.settimeout(read_timeout)
 
 	def run(self):
 		'''Recebe as requisições do cliente, decodifica e injeta os dados
 		recebidos e a função de resposta para serem processadas pelo controlador.
+
+		Uma requisição pode chegar dividida em várias leituras, ou várias
+		requisições em uma mesma leitura: os dados são acumulados e cada
+		documento JSON completo é processado separadamente. Um conteúdo
+		incompleto que não for complementado até o tempo de leitura é
+		descartado, e o cliente recebe uma resposta de erro.
 		'''
+		last_activity = time.monotonic()
+		decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+		buffer = ''
+
 		while self._stop_event.is_set() == False:     
 			try:
-				data = self._client_socket.recv(1024).decode()
+				data = self._client_socket.recv(64 * 1024)
 				
 				if len(data) > 0:
-					response = lambda message: self._client_socket.send(message.encode())
-					self._handler(data, response)
+					last_activity = time.monotonic()
+					buffer += decoder.decode(data)
+
+					if len(buffer) > self._max_request_size:
+						self._respond('{"error": true, "message": "Requisição muito grande."}')
+						self._stop_event.set()
+					else:
+						buffer = self._dispatch(buffer)
 				else:
 					self._stop_event.set()
+			except socket.timeout:
+				if buffer:
+					self._respond('{"error": true, "message": "Requisição incompleta."}')
+					self._scan = (0, 0, False, False)
+					buffer = ''
+
+				if time.monotonic() - last_activity >= self._idle_timeout:
+					print(f'=> Socket idle timeout: {self._client_address[0]}:{self._client_address[1]}')
+					self._stop_event.set()
 			except:
 				self._stop_event.set()
+
+		futures.wait(list(self._pending))
 		self._client_socket.close()
-	
\ No newline at end of file
+
+	def _dispatch(self, buffer):
+		'''Processa todas as requisições completas presentes no buffer.
+
+		O fim de cada documento JSON é encontrado por `_find_end()`, que
+		continua a leitura de onde parou na chamada anterior, então cada
+		caractere recebido é percorrido uma única vez, mesmo que a requisição
+		chegue em muitas partes.
+
+        Parameters
+        ----------
+        buffer : str
+			Dados recebidos e ainda não processados
+
+        Returns
+        -------
+        str
+            Dados restantes, que ainda não formam uma requisição completa.
+		'''
+		while True:
+			if self._scan[0] == 0:
+				buffer = buffer.lstrip()
+
+			if not buffer:
+				return buffer
+
+			end = self._find_end(buffer)
+
+			if end is None:
+				return buffer
+
+			data, buffer = buffer[:end], buffer[end:]
+			self._scan = (0, 0, False, False)
+
+			try:
+				request = json.loads(data)
+			except ValueError:
+				request = None
+
+			if self._executor and isinstance(request, dict) and 'request_id' in request:
+				self._submit(data)
+			else:
+				self._handle(data)
+
+	def _find_end(self, buffer):
+		'''Procura o fim do primeiro documento JSON do buffer, a partir da
+		posição em que a procura anterior parou.
+
+		Apenas a profundidade de objetos e listas e o estado das strings são
+		acompanhados; a validação do documento fica com o controlador. Um
+		conteúdo que não começa com `{` ou `[` é considerado completo, para que
+		o controlador responda com o erro.
+
+        Parameters
+        ----------
+        buffer : str
+			Dados recebidos e ainda não processados
+
+        Returns
+        -------
+        int
+            Posição seguinte ao fim do documento.
+        None
+            Caso o documento ainda esteja incompleto.
+		'''
+		position, depth, in_string, escaped = self._scan
+
+		if position == 0 and buffer[0] not in '{[':
+			return len(buffer)
+
+		for position in range(position, len(buffer)):
+			char = buffer[position]
+
+			if in_string:
+				if escaped:
+					escaped = False
+				elif char == '\\':
+					escaped = True
+				elif char == '"':
+					in_string = False
+			elif char == '"':
+				in_string = True
+			elif char in '{[':
+				depth += 1
+			elif char in '}]':
+				depth -= 1
+
+				if depth == 0:
+					return position + 1
+
+		self._scan = (len(buffer), depth, in_string, escaped)
+		return None
+
+	def _submit(self, data):
+		'''Agenda uma requisição identificada para ser processada em paralelo.
+
+        Parameters
+        ----------
+        data : str
+			Dados da requisição
+		'''
+		self._in_flight.acquire()
+		future = self._executor.submit(self._handle, data)
+		self._pending.add(future)
+		future.add_done_callback(self._finish)
+
+	def _finish(self, future):
+		'''Libera a vaga de uma requisição identificada que foi concluída.
+
+        Parameters
+        ----------
+        future : concurrent.futures.Future
+			Execução da requisição
+		'''
+		self._pending.discard(future)
+		self._in_flight.release()
+
+		if not future.cancelled() and future.exception():
+			print(future.exception())
+
+	def _handle(self, data):
+		'''Injeta uma requisição e a função de resposta no controlador.
+
+        Parameters
+        ----------
+        data : str
+			Dados da requisição
+		'''
+		self._handler(data, self._respond, self._client_address)
+
+	def _respond(self, message):
+		'''Envia uma resposta para o cliente.
+
+        Parameters
+        ----------
+        message : Union[str, bytes]
+			Conteúdo da resposta
+		'''
+		with self._send_locker:
+			self._client_socket.sendall(message if isinstance(message, bytes) else message.encode())
+
+	def drain(self):
+		'''Deixa de receber novas requisições, permitindo que a requisição em
+		andamento seja concluída e sua resposta enviada.
+		'''
+		self._stop_event.set()
+		self._shutdown_socket(socket.SHUT_RD)
+
+	def abort(self):
+		'''Encerra a conexão imediatamente.
+		'''
+		self._stop_event.set()
+		self._shutdown_socket(socket.SHUT_RDWR)
+
+	def _shutdown_socket(self, how):
+		'''Interrompe a leitura e/ou escrita do socket do cliente.
+
+        Parameters
+        ----------
+        how : int
+			Modo de interrupção (`socket.SHUT_RD`, `socket.SHUT_WR` ou
+			`socket.SHUT_RDWR`)
+		'''
+		try:
+			self._client_socket.shutdown(how)
+		except socket.error:
+			pass
+
@@ -0,0 +1,67 @@
+class ChunkedWriter:
+	'''Escritor que envia dados em blocos delimitados pelo tamanho, permitindo
+	transmitir respostas grandes sem conhecer o tamanho total antecipadamente.
+
+	Cada bloco é enviado como `<tamanho em hexadecimal>\r\n<dados>\r\n`, e o
+	fim da transmissão é indicado por um bloco de tamanho zero (`0\r\n`). Os
+	dados recebidos são acumulados até `buffer_size` bytes antes do envio, para
+	evitar muitas escritas pequenas no socket.
+
+    Methods
+    -------
+	write(data)
+		Acumula os dados e envia os blocos completos
+	flush()
+		Envia os dados acumulados
+	close()
+		Envia os dados acumulados e o bloco que indica o fim da transmissão
+	'''
+	def __init__(self, send, buffer_size=64 * 1024):
+		'''
+        Parameters
+        ----------
+        send : function
+			Função que envia bytes para o cliente
+        buffer_size : int
+			Quantidade de bytes acumulados antes de enviar um bloco
+        '''
+		self._send = send
+		self._buffer_size = buffer_size
+		self._buffer = bytearray()
+
+	def write(self, data):
+		'''Acumula os dados e envia os blocos completos.
+
+        Parameters
+        ----------
+        data : Union[bytes, str]
+			Dados a serem enviados
+
+        Returns
+        -------
+        int
+            Quantidade de bytes recebidos.
+        '''
+		if isinstance(data, str):
+			data = data.encode()
+
+		self._buffer += data
+
+		if len(self._buffer) >= self._buffer_size:
+			self.flush()
+		return len(data)
+
+	def flush(self):
+		'''Envia os dados acumulados como um bloco.
+		'''
+		if not self._buffer:
+			return
+
+		self._send(f'{len(self._buffer):x}\r\n'.encode() + bytes(self._buffer) + b'\r\n')
+		self._buffer.clear()
+
+	def close(self):
+		'''Envia os dados acumulados e o bloco que indica o fim da transmissão.
+		'''
+		self.flush()
+		self._send(b'0\r\n')
@@ -8,3 +8,37 @@ PG_PORT = os.getenv('PG_PORT')
 PG_DATABASE = os.getenv('PG_DATABASE')
 PG_USER = os.getenv('PG_USER')
 PG_PASSWORD = os.getenv('PG_PASSWORD')
+PG_REPLICAS = [dsn.strip() for dsn in os.getenv('PG_REPLICAS', '').split(',') if dsn.strip()]
+PG_REPLICA_MAX_LAG = float(os.getenv('PG_REPLICA_MAX_LAG', 1))
+PG_POOL_SIZE = int(os.getenv('PG_POOL_SIZE', 20))
+
+SERVER_HOST = os.getenv('SERVER_HOST', '')
+SERVER_PORT = int(os.getenv('SERVER_PORT', 8001))
+SERVER_IDLE_TIMEOUT = float(os.getenv('SERVER_IDLE_TIMEOUT', 300))
+SERVER_READ_TIMEOUT = float(os.getenv('SERVER_READ_TIMEOUT', 5))
+SERVER_MAX_CONNECTIONS = int(os.getenv('SERVER_MAX_CONNECTIONS', 512))
+SERVER_DRAIN_TIMEOUT = float(os.getenv('SERVER_DRAIN_TIMEOUT', 10))
+SERVER_MAX_REQUEST_SIZE = int(os.getenv('SERVER_MAX_REQUEST_SIZE', 1024 * 1024))
+SERVER_WORKERS = int(os.getenv('SERVER_WORKERS', 16))
+SERVER_MAX_IN_FLIGHT = int(os.getenv('SERVER_MAX_IN_FLIGHT', 32))
+
+RATE_LIMIT_IP = float(os.getenv('RATE_LIMIT_IP', 50))
+RATE_LIMIT_IP_BURST = float(os.getenv('RATE_LIMIT_IP_BURST', 100))
+RATE_LIMIT_TOKEN = float(os.getenv('RATE_LIMIT_TOKEN', 10))
+RATE_LIMIT_TOKEN_BURST = float(os.getenv('RATE_LIMIT_TOKEN_BURST', 20))
+RATE_LIMIT_EXPENSIVE = float(os.getenv('RATE_LIMIT_EXPENSIVE', 0.5))
+RATE_LIMIT_EXPENSIVE_BURST = float(os.getenv('RATE_LIMIT_EXPENSIVE_BURST', 5))
+
+BULK_TRANSFER_MAX_LINES = int(os.getenv('BULK_TRANSFER_MAX_LINES', 5000))
+
+IDEMPOTENCY_CACHE_SIZE = int(os.getenv('IDEMPOTENCY_CACHE_SIZE', 10000))
+
+HISTORY_PAGE_MAX_SIZE = int(os.getenv('HISTORY_PAGE_MAX_SIZE', 500))
+
+SESSION_TTL = float(os.getenv('SESSION_TTL', 8 * 60 * 60))
+SESSION_SWEEP_INTERVAL = float(os.getenv('SESSION_SWEEP_INTERVAL', 5 * 60))
+
+GROUP_COMMIT_WINDOW = float(os.getenv('GROUP_COMMIT_WINDOW', 0))
+GROUP_COMMIT_MAX_BATCH = int(os.getenv('GROUP_COMMIT_MAX_BATCH', 256))
+
+HISTORY_PARTITION_INTERVAL = float(os.getenv('HISTORY_PARTITION_INTERVAL', 6 * 60 * 60))
@@ -0,0 +1,167 @@
+from contextlib import contextmanager
+import threading
+import unittest
+import time
+
+from lib.group_commit import GroupCommitter
+
+
+class FakeTransaction:
+	def __init__(self):
+		self.failed = False
+
+	def rollback(self):
+		self.failed = True
+
+
+class FakeDb:
+	'''Banco de dados falso que registra os comandos de transação executados.
+	'''
+	def __init__(self, fail_commit=False):
+		self.events = []
+		self.depth = 0
+		self.fail_commit = fail_commit
+
+	@contextmanager
+	def transaction(self):
+		transaction = FakeTransaction()
+		depth = self.depth
+		self.depth += 1
+		self.events.append('BEGIN' if depth == 0 else 'SAVEPOINT')
+
+		try:
+			yield transaction
+		except:
+			transaction.rollback()
+			raise
+		finally:
+			self.depth -= 1
+
+			if depth > 0:
+				self.events.append('ROLLBACK TO SAVEPOINT' if transaction.failed else 'RELEASE SAVEPOINT')
+			else:
+				if self.fail_commit:
+					transaction.rollback()
+
+				self.events.append('ROLLBACK' if transaction.failed else 'COMMIT')
+
+
+class GroupCommitterTest(unittest.TestCase):
+	def start(self, db, max_batch=256):
+		committer = GroupCommitter(db, window=0.05, max_batch=max_batch)
+		self.addCleanup(committer.close)
+		return committer
+
+	def submit_blocked(self, committer, operations):
+		'''Envia as operações enquanto a thread escritora está ocupada, então
+		todas entram no mesmo grupo, na ordem de envio.
+		'''
+		started = threading.Event()
+		release = threading.Event()
+		results = {}
+
+		def block():
+			started.set()
+			release.wait(5)
+
+		threads = [threading.Thread(target=committer.submit, args=(block,))]
+		threads[0].start()
+		started.wait(5)
+
+		for index, (operation, default) in enumerate(operations):
+			def run(index=index, operation=operation, default=default):
+				try:
+					results[index] = committer.submit(operation, default)
+				except Exception as error:
+					results[index] = error
+
+			size = committer._queue.qsize()
+			thread = threading.Thread(target=run)
+			thread.start()
+			threads.append(thread)
+
+			while committer._queue.qsize() == size:
+				time.sleep(0.001)
+
+		release.set()
+
+		for thread in threads:
+			thread.join(5)
+		return results
+
+	def test_operations_run_in_order_in_one_transaction(self):
+		db = FakeDb()
+		committer = self.start(db)
+		executed = []
+
+		def operation(value):
+			def run():
+				executed.append(value)
+				db.events.append(f'op {value}')
+				return value * 10
+			return run
+
+		results = self.submit_blocked(committer, [(operation(value), None) for value in range(5)])
+
+		self.assertEqual(executed, list(range(5)))
+		self.assertEqual(results, {value: value * 10 for value in range(5)})
+		self.assertEqual(db.events[db.events.index('BEGIN', 1):], [
+			'BEGIN',
+			*[event for value in range(5) for event in ('SAVEPOINT', f'op {value}', 'RELEASE SAVEPOINT')],
+			'COMMIT',
+		])
+
+	def test_failed_operation_only_rolls_back_its_savepoint(self):
+		db = FakeDb()
+		committer = self.start(db)
+		error = RuntimeError('falha')
+
+		def fail():
+			raise error
+
+		results = self.submit_blocked(committer, [
+			(lambda: 'primeira', None),
+			(fail, None),
+			(lambda: 'terceira', None),
+		])
+
+		self.assertEqual(results[0], 'primeira')
+		self.assertIs(results[1], error)
+		self.assertEqual(results[2], 'terceira')
+		self.assertIn('ROLLBACK TO SAVEPOINT', db.events)
+		self.assertEqual(db.events[-1], 'COMMIT')
+
+	def test_failed_commit_returns_defaults(self):
+		db = FakeDb(fail_commit=True)
+		committer = self.start(db)
+
+		self.assertEqual(committer.submit(lambda: 'resultado', 'padrão'), 'padrão')
+		self.assertEqual(db.events[-1], 'ROLLBACK')
+
+	def test_result_is_released_after_commit(self):
+		db = FakeDb()
+		committer = self.start(db)
+
+		committer.submit(lambda: db.events.append('op'))
+		self.assertEqual(db.events[-1], 'COMMIT')
+
+	def test_submit_from_writer_runs_inline(self):
+		db = FakeDb()
+		committer = self.start(db)
+
+		result = committer.submit(lambda: (committer.in_writer(), committer.submit(lambda: 'interna')))
+
+		self.assertEqual(result, (True, 'interna'))
+		self.assertFalse(committer.in_writer())
+
+	def test_max_batch_splits_groups(self):
+		db = FakeDb()
+		committer = self.start(db, max_batch=2)
+
+		self.submit_blocked(committer, [(lambda: None, None) for _ in range(4)])
+
+		self.assertEqual(db.events.count('BEGIN'), 3)
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,45 @@
+import unittest
+
+from lib.lru import LRUCache
+
+
+class LRUCacheTest(unittest.TestCase):
+	def test_evicts_least_recently_used(self):
+		cache = LRUCache(max_size=2)
+		cache.set('a', 1)
+		cache.set('b', 2)
+		cache.set('c', 3)
+
+		self.assertEqual(len(cache), 2)
+		self.assertIsNone(cache.get('a'))
+		self.assertEqual(cache.get('b'), 2)
+		self.assertEqual(cache.get('c'), 3)
+
+	def test_get_marks_as_recently_used(self):
+		cache = LRUCache(max_size=2)
+		cache.set('a', 1)
+		cache.set('b', 2)
+		cache.get('a')
+		cache.set('c', 3)
+
+		self.assertEqual(cache.get('a'), 1)
+		self.assertIsNone(cache.get('b'))
+
+	def test_set_existing_key_replaces_value(self):
+		cache = LRUCache(max_size=2)
+		cache.set('a', 1)
+		cache.set('b', 2)
+		cache.set('a', 10)
+		cache.set('c', 3)
+
+		self.assertEqual(len(cache), 2)
+		self.assertEqual(cache.get('a'), 10)
+		self.assertIsNone(cache.get('b'))
+
+	def test_get_default(self):
+		cache = LRUCache()
+		self.assertEqual(cache.get('missing', 'default'), 'default')
+
+
+if __name__ == '__main__':
+	unittest.main()
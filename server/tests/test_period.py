@@ -0,0 +1,39 @@
+from datetime import datetime
+import unittest
+
+from lib.period import parse_period
+
+
+class ParsePeriodTest(unittest.TestCase):
+	def test_empty_period(self):
+		self.assertEqual(parse_period(), (None, None))
+
+	def test_date_end_includes_whole_day(self):
+		start, end = parse_period('2024-01-01', '2024-01-31')
+
+		self.assertEqual(start, datetime(2024, 1, 1))
+		self.assertEqual(end, datetime(2024, 2, 1))
+
+	def test_datetime_end_is_kept(self):
+		_, end = parse_period(None, '2024-01-31T12:30:00')
+		self.assertEqual(end, datetime(2024, 1, 31, 12, 30))
+
+	def test_same_day(self):
+		start, end = parse_period('2024-01-31', '2024-01-31')
+		self.assertLess(start, end)
+
+	def test_start_after_end(self):
+		with self.assertRaises(ValueError):
+			parse_period('2024-02-01', '2024-01-01T00:00:00')
+
+	def test_invalid_date(self):
+		with self.assertRaises(ValueError):
+			parse_period('2024-13-01')
+
+	def test_invalid_type(self):
+		with self.assertRaises(TypeError):
+			parse_period(20240101)
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,88 @@
+from unittest import mock
+import unittest
+
+from lib.rate_limit import TokenBucket, RateLimiter
+
+
+class Clock:
+	def __init__(self):
+		self.now = 1000.0
+
+	def __call__(self):
+		return self.now
+
+
+class TokenBucketTest(unittest.TestCase):
+	def setUp(self):
+		self.clock = Clock()
+		patcher = mock.patch('lib.rate_limit.time.monotonic', self.clock)
+		patcher.start()
+		self.addCleanup(patcher.stop)
+
+	def test_consumes_burst_then_waits(self):
+		bucket = TokenBucket(rate=2, capacity=3)
+
+		for _ in range(3):
+			self.assertEqual(bucket.consume(), 0.0)
+
+		self.assertAlmostEqual(bucket.consume(), 0.5)
+
+	def test_refills_over_time(self):
+		bucket = TokenBucket(rate=2, capacity=3)
+
+		for _ in range(3):
+			bucket.consume()
+
+		self.clock.now += 0.5
+		self.assertEqual(bucket.consume(), 0.0)
+		self.assertGreater(bucket.consume(), 0.0)
+
+	def test_refill_is_capped_at_capacity(self):
+		bucket = TokenBucket(rate=2, capacity=3)
+		bucket.consume()
+		self.clock.now += 60
+
+		for _ in range(3):
+			self.assertEqual(bucket.consume(), 0.0)
+
+		self.assertGreater(bucket.consume(), 0.0)
+
+	def test_amount_larger_than_one(self):
+		bucket = TokenBucket(rate=1, capacity=5)
+
+		self.assertEqual(bucket.consume(4), 0.0)
+		self.assertAlmostEqual(bucket.consume(3), 2.0)
+
+	def test_zero_rate_never_refills(self):
+		bucket = TokenBucket(rate=0, capacity=1)
+		bucket.consume()
+
+		self.assertEqual(bucket.consume(), float('inf'))
+
+
+class RateLimiterTest(unittest.TestCase):
+	def setUp(self):
+		self.clock = Clock()
+		patcher = mock.patch('lib.rate_limit.time.monotonic', self.clock)
+		patcher.start()
+		self.addCleanup(patcher.stop)
+
+	def test_keys_are_limited_separately(self):
+		limiter = RateLimiter(rate=1, capacity=1)
+
+		self.assertEqual(limiter.hit('a'), 0.0)
+		self.assertGreater(limiter.hit('a'), 0.0)
+		self.assertEqual(limiter.hit('b'), 0.0)
+
+	def test_evicts_least_recently_used_key(self):
+		limiter = RateLimiter(rate=1, capacity=1, max_keys=2)
+		limiter.hit('a')
+		limiter.hit('b')
+		limiter.hit('c')
+
+		self.assertEqual(limiter.hit('a'), 0.0)
+		self.assertGreater(limiter.hit('c'), 0.0)
+
+
+if __name__ == '__main__':
+	unittest.main()